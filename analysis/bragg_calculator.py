@@ -3,7 +3,56 @@
 BraggCalculator: compute Bragg peak positions (q_xy, q_z) and Miller indices for a given unit cell and sample rotation.
 """
 import numpy as np
-import math
+
+from .lattice import (direct_basis, reciprocal_basis, rotation_matrix, symmetric_hkl_grid,
+                      q_vectors, q_xy_z, X_AXIS, Y_AXIS)
+from .perf import timed
+
+
+def _nonzero(hkl):
+    """Drop the (0,0,0) reflection."""
+    return hkl[np.any(hkl != 0, axis=1)]
+
+
+def _unique_rings(q_mag, hkl):
+    """
+    Group rounded |q| values into rings: (q_unique, multiplicity, representative hkl).
+    """
+    # sort by |q|, then by descending (h, k, l) so the first entry per ring is the largest index
+    order = np.lexsort((-hkl[:, 2], -hkl[:, 1], -hkl[:, 0], q_mag))
+    q_sorted = q_mag[order]
+    q_unique, first, counts = np.unique(q_sorted, return_index=True, return_counts=True)
+    return q_unique, counts, hkl[order][first]
+
+
+def _fiber_collapse(B, contact_plane, hkl, tilt=None, decimals=4):
+    """
+    Collapse reciprocal vectors onto (|q_xy|, q_z) for a fiber-textured film.
+    B: (3,3) array whose rows are the reciprocal basis vectors.
+    contact_plane: (h,k,l) whose normal is the film normal (fiber axis).
+    tilt: optional (3,3) rotation applied to the fiber axis before projecting.
+    Reflections that land on the same rounded spot are merged.
+    Returns (q_xy, q_z, hkl, multiplicity).
+    """
+    n = np.asarray(contact_plane, dtype=float) @ B
+    n_norm = np.linalg.norm(n)
+    if n_norm == 0:
+        raise ValueError("Contact plane (0, 0, 0) does not define a fiber axis")
+    n = n / n_norm
+    if tilt is not None:
+        n = tilt.T @ n
+    G = hkl @ B
+    q_z = G @ n
+    q_xy = np.sqrt(np.clip(np.einsum('ij,ij->i', G, G) - q_z**2, 0.0, None))
+    # adding 0.0 folds -0.0 into 0.0 so in-plane spots merge cleanly
+    q_xy, q_z = np.round(q_xy, decimals) + 0.0, np.round(q_z, decimals) + 0.0
+    keep = (q_z >= 0) & ((q_xy > 0) | (q_z > 0))
+    q_xy, q_z, hkl = q_xy[keep], q_z[keep], hkl[keep]
+    order = np.lexsort((-hkl[:, 2], -hkl[:, 1], -hkl[:, 0], q_z, q_xy))
+    spots, first, counts = np.unique(np.column_stack((q_xy[order], q_z[order])),
+                                     axis=0, return_index=True, return_counts=True)
+    return spots[:, 0], spots[:, 1], hkl[order][first], counts
+
 
 class BraggCalculator:
     def __init__(self, a, b, c, alpha, beta, gamma):
@@ -12,23 +61,18 @@ class BraggCalculator:
           a, b, c (Å) and angles alpha, beta, gamma (degrees).
         Precompute direct lattice vectors a1,a2,a3.
         """
-        # Convert angles to radians
-        alpha_r = math.radians(alpha)
-        beta_r  = math.radians(beta)
-        gamma_r = math.radians(gamma)
-        # Direct lattice vectors in Cartesian
-        self.a1 = np.array([a, 0.0, 0.0])
-        self.a2 = np.array([
-            b * math.cos(gamma_r),
-            b * math.sin(gamma_r),
-            0.0
-        ])
-        # c vector with components c_x, c_y, c_z
-        c_x = c * math.cos(beta_r)
-        c_y = c * (math.cos(alpha_r) - math.cos(beta_r)*math.cos(gamma_r)) / math.sin(gamma_r)
-        c_z = math.sqrt(max(0.0, c**2 - c_x**2 - c_y**2))
-        self.a3 = np.array([c_x, c_y, c_z])
+        self.M = direct_basis(a, b, c, alpha, beta, gamma)
+        self.a1, self.a2, self.a3 = self.M
+
+    @staticmethod
+    def orientation_matrix(thetax, thetay):
+        """
+        Right-multiplied rotation of the direct cell rows, M @ Rx @ Ry, with
+        Rx about X by thetax and Ry about Y by -thetay (degrees).
+        """
+        return rotation_matrix(X_AXIS, thetax) @ rotation_matrix(Y_AXIS, -thetay)
 
+    @timed('bragg.compute_peaks')
     def compute_peaks(self, orientation=(0.0, 0.0, 0.0), hkl_range=(1, 1, 1)):
         """
         Compute Bragg peak positions for Miller indices in [-h..h],[-k..k],[-l..l],
@@ -38,49 +82,51 @@ class BraggCalculator:
           q_z : numpy array of out-of-plane components
           hkl : numpy array of shape (N,3) of Miller indices
         """
-        # Unpack
         thetax, thetay, _ = orientation
-        hmax, kmax, lmax = hkl_range
-        # Rotation matrices
-        tx = math.radians(thetax)
-        ty = math.radians(thetay)
-        Rx = np.array([
-            [1, 0, 0],
-            [0, math.cos(tx), -math.sin(tx)],
-            [0, math.sin(tx),  math.cos(tx)]
-        ])
-        Ry = np.array([
-            [ math.cos(ty), 0, -math.sin(ty)],
-            [0, 1, 0],
-            [ math.sin(ty), 0,  math.cos(ty)]
-        ])
-
-        # Rotate direct cell
-        M = np.vstack([self.a1, self.a2, self.a3])  # shape (3,3)
-        M = M @ Rx
-        M = M @ Ry
-        aa1, aa2, aa3 = M[0], M[1], M[2]
+        hmax = hkl_range[0]
+        B = reciprocal_basis(self.M @ self.orientation_matrix(thetax, thetay))
+        # cubic grid over the h range, excluding (0,0,0)
+        hkl = _nonzero(symmetric_hkl_grid(hmax))
+        q_xy, q_z = q_xy_z(hkl @ B)
+        return q_xy, q_z, hkl
 
-        # Reciprocal lattice
-        V = np.dot(aa3, np.cross(aa1, aa2))
-        b1 = 2*math.pi * np.cross(aa2, aa3) / V
-        b2 = 2*math.pi * np.cross(aa3, aa1) / V
-        b3 = 2*math.pi * np.cross(aa1, aa2) / V
-
-        # Generate Miller index grid
-        i = np.arange(-hmax, hmax+1)
-        H, K, L = np.meshgrid(i, i, i, indexing='ij')
-
-        # Compute reciprocal space vectors
-        G1 = H * b1[0] + K * b2[0] + L * b3[0]
-        G2 = H * b1[1] + K * b2[1] + L * b3[1]
-        G3 = H * b1[2] + K * b2[2] + L * b3[2]
+    def compute_peaks_batch(self, orientations, hkl_range=(1, 1, 1)):
+        """
+        compute_peaks for an (N, 3) array of orientations in one pass.
+        Returns q_xy, q_z of shape (N, P) and the shared hkl (P, 3).
+        """
+        o = np.asarray(orientations, dtype=float).reshape(-1, 3)
+        R = (rotation_matrix(X_AXIS, o[:, 0]) @ rotation_matrix(Y_AXIS, -o[:, 1]))
+        B = reciprocal_basis(self.M @ R)
+        hkl = _nonzero(symmetric_hkl_grid(hkl_range[0]))
+        q_xy, q_z = q_xy_z(q_vectors(B, hkl))
+        return q_xy, q_z, hkl
 
-        # Flatten and compute q_xy, q_z
-        q_xy = np.hypot(G1, G2).ravel()
-        q_z  = G3.ravel()
-        hkl  = np.vstack((H.ravel(), K.ravel(), L.ravel())).T
+    @timed('bragg.powder_rings')
+    def powder_rings(self, hkl_range=(1, 1, 1), decimals=4):
+        """
+        Debye-Scherrer ring radii for a randomly oriented sample.
+        Returns:
+          q   : numpy array of unique |q| values (ascending)
+          mult: numpy array of multiplicities
+          hkl : numpy array of shape (N,3) with one representative index per ring
+        """
+        B = reciprocal_basis(self.M)
+        hkl = _nonzero(symmetric_hkl_grid(*hkl_range))
+        q = np.round(np.linalg.norm(hkl @ B, axis=1), decimals)
+        return _unique_rings(q, hkl)
 
-        # Exclude the (0,0,0) reflection
-        mask = ~((hkl[:,0]==0) & (hkl[:,1]==0) & (hkl[:,2]==0))
-        return q_xy[mask], q_z[mask], hkl[mask]
+    @timed('bragg.fiber_peaks')
+    def compute_fiber_peaks(self, contact_plane=(0, 0, 1), hkl_range=(1, 1, 1), decimals=4):
+        """
+        Peak positions for a fiber-textured film lying on `contact_plane`.
+        The in-plane rotation is averaged out, so each reflection reduces to
+        (|q_xy|, q_z) and symmetry-equivalent spots are merged.
+        Returns:
+          q_xy: numpy array of in-plane magnitudes
+          q_z : numpy array of out-of-plane components
+          hkl : numpy array of shape (N,3), one representative index per spot
+          mult: numpy array of the number of reflections merged into each spot
+        """
+        B = reciprocal_basis(self.M)
+        return _fiber_collapse(B, contact_plane, symmetric_hkl_grid(*hkl_range), decimals=decimals)
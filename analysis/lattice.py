@@ -0,0 +1,158 @@
+# File: ewald/analysis/lattice.py
+"""
+Lattice math shared by the calculators, the peak cache, the notebook viewer
+and the UI: direct and reciprocal bases, rotation matrices and hkl grids.
+
+Bases are (..., 3, 3) arrays whose rows are the lattice vectors, so every
+function also takes stacks of lattices or orientations and broadcasts over
+the leading axes. Scalar rotation matrices and hkl grids are cached and
+returned read-only; copy them before modifying.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+TWO_PI = 2 * np.pi
+X_AXIS, Y_AXIS, Z_AXIS = (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)
+
+
+def _readonly(a):
+    a.setflags(write=False)
+    return a
+
+
+def direct_basis(a, b, c, alpha, beta, gamma):
+    """
+    Cartesian direct basis from lengths (Å) and angles (degrees): a along x,
+    b in the xy-plane. Arguments broadcast; returns (..., 3, 3) with rows
+    a, b, c.
+    """
+    a, b, c = (np.asarray(v, dtype=float) for v in (a, b, c))
+    ca, cb, cg = (np.cos(np.deg2rad(v)) for v in (alpha, beta, gamma))
+    sg = np.sin(np.deg2rad(gamma))
+    c_x = c * cb
+    c_y = c * (ca - cb * cg) / sg
+    c_z = np.sqrt(np.clip(c**2 - c_x**2 - c_y**2, 0.0, None))
+    zero = np.zeros(np.broadcast(a, b, c, ca, cb, cg).shape)
+    rows = [np.stack(np.broadcast_arrays(a, zero, zero), axis=-1),
+            np.stack(np.broadcast_arrays(b * cg, b * sg, zero), axis=-1),
+            np.stack(np.broadcast_arrays(c_x, c_y, c_z), axis=-1)]
+    return np.stack(rows, axis=-2)
+
+
+def reciprocal_basis(M):
+    """Reciprocal basis (rows a*, b*, c*, including 2π) of direct bases M (..., 3, 3)."""
+    M = np.asarray(M, dtype=float)
+    a, b, c = M[..., 0, :], M[..., 1, :], M[..., 2, :]
+    bc, ca, ab = np.cross(b, c), np.cross(c, a), np.cross(a, b)
+    factor = TWO_PI / np.einsum('...i,...i->...', a, bc)
+    return np.stack((bc, ca, ab), axis=-2) * factor[..., None, None]
+
+
+def _rodrigues(axis, theta):
+    ux, uy, uz = axis
+    c, s = np.cos(theta), np.sin(theta)
+    C = 1 - c
+    R = np.empty(np.shape(theta) + (3, 3))
+    R[..., 0, 0], R[..., 0, 1], R[..., 0, 2] = c + ux*ux*C, ux*uy*C - uz*s, ux*uz*C + uy*s
+    R[..., 1, 0], R[..., 1, 1], R[..., 1, 2] = uy*ux*C + uz*s, c + uy*uy*C, uy*uz*C - ux*s
+    R[..., 2, 0], R[..., 2, 1], R[..., 2, 2] = uz*ux*C - uy*s, uz*uy*C + ux*s, c + uz*uz*C
+    return R
+
+
+@lru_cache(maxsize=4096)
+def _rotation_cached(axis, angle_deg):
+    return _readonly(_rodrigues(axis, np.deg2rad(angle_deg)))
+
+
+def rotation_matrix(axis, angle_deg):
+    """
+    Right-handed rotation about `axis` by `angle_deg` degrees (Rodrigues).
+    Scalar angles are cached; an array of angles gives (..., 3, 3).
+    """
+    axis = np.asarray(axis, dtype=float)
+    axis = tuple(float(v) for v in axis / np.linalg.norm(axis))
+    if np.ndim(angle_deg) == 0:
+        return _rotation_cached(axis, float(angle_deg))
+    return _rodrigues(axis, np.deg2rad(np.asarray(angle_deg, dtype=float)))
+
+
+def _euler(omega, chi, phi):
+    return (rotation_matrix(Z_AXIS, phi) @ rotation_matrix(Y_AXIS, chi)
+            @ rotation_matrix(X_AXIS, omega))
+
+
+@lru_cache(maxsize=4096)
+def _euler_cached(omega, chi, phi):
+    return _readonly(_euler(omega, chi, phi))
+
+
+def euler_matrix(omega, chi, phi):
+    """
+    Sample orientation: rotation about X (omega), then Y (chi), then Z (phi),
+    angles in degrees, i.e. Rz @ Ry @ Rx. Arrays broadcast to (..., 3, 3);
+    all-scalar calls are cached.
+    """
+    if all(np.ndim(v) == 0 for v in (omega, chi, phi)):
+        return _euler_cached(float(omega), float(chi), float(phi))
+    return _euler(omega, chi, phi)
+
+
+def orientation_matrices(orientations):
+    """Stack of euler_matrix for an (N, 3) array of (omega, chi, phi)."""
+    o = np.asarray(orientations, dtype=float).reshape(-1, 3)
+    return euler_matrix(o[:, 0], o[:, 1], o[:, 2])
+
+
+def rotate_basis(M, R):
+    """Apply rotations R (..., 3, 3) to every row vector of bases M (..., 3, 3)."""
+    return np.asarray(M) @ np.swapaxes(R, -1, -2)
+
+
+def rotate_lattice(a, b, c, axis, angle_deg):
+    """
+    Rotate lattice vectors a, b, c about `axis` by `angle_deg` degrees.
+    """
+    R = rotation_matrix(axis, angle_deg)
+    return R @ a, R @ b, R @ c
+
+
+@lru_cache(maxsize=64)
+def _hkl_grid_cached(h, k, l):
+    H, K, L = np.meshgrid(np.array(h), np.array(k), np.array(l), indexing='ij')
+    return _readonly(np.stack((H.ravel(), K.ravel(), L.ravel()), axis=1))
+
+
+def hkl_grid(h, k=None, l=None):
+    """
+    (N, 3) Miller indices of the product of index sequences h, k, l (l
+    fastest, as in nested loops); k and l default to h. Cached.
+    """
+    k = h if k is None else k
+    l = h if l is None else l
+    return _hkl_grid_cached(*(tuple(int(i) for i in idx) for idx in (h, k, l)))
+
+
+def symmetric_hkl_grid(hmax, kmax=None, lmax=None):
+    """hkl_grid over [-hmax..hmax] x [-kmax..kmax] x [-lmax..lmax]."""
+    kmax = hmax if kmax is None else kmax
+    lmax = hmax if lmax is None else lmax
+    return hkl_grid(*(range(-n, n + 1) for n in (hmax, kmax, lmax)))
+
+
+def q_vectors(B, hkl):
+    """Scattering vectors hkl @ B for bases B (..., 3, 3): shape (..., N, 3)."""
+    return np.asarray(hkl) @ B
+
+
+def q_xy_z(q):
+    """(|q_xy|, q_z) of scattering vectors (..., 3)."""
+    return np.hypot(q[..., 0], q[..., 1]), q[..., 2]
+
+
+def q_chi(q):
+    """(|q|, chi in degrees from +q_z) of scattering vectors; chi is 0 for q = 0."""
+    q_mag = np.linalg.norm(q, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos_chi = np.where(q_mag > 0, np.clip(q[..., 2] / q_mag, -1, 1), 1.0)
+    return q_mag, np.degrees(np.arccos(cos_chi))
@@ -0,0 +1,135 @@
+# File: ewald/analysis/pattern_simulator.py
+"""
+PatternSimulator: render calculated Bragg peaks as a synthetic 2D (q_xy, q_z)
+intensity map on the same grid as an integrated reciprocal-space image.
+
+Peaks are splatted onto a polar (|q|, chi) histogram, broadened along chi by
+the mosaic (orientation) distribution and along |q| by the instrumental
+resolution with FFT convolutions, then sampled back onto the cartesian grid
+through a per-pixel lookup table computed once per grid.
+"""
+import numpy as np
+
+
+def _profile(x, sigma, shape):
+    """Unit-area broadening profile sampled at offsets x (same units as sigma)."""
+    if shape == 'lorentzian':
+        gamma = sigma  # half width at half maximum
+        k = gamma / (np.pi * (x**2 + gamma**2))
+    elif shape == 'gaussian':
+        k = np.exp(-0.5 * (x / sigma)**2)
+    else:
+        raise ValueError(f"Unknown profile {shape!r}. Expected 'gaussian' or 'lorentzian'")
+    return k / k.sum()
+
+
+class PatternSimulator:
+    """
+    Precomputes the polar lookup for a fixed (q_xy, q_z) grid so that each
+    `render` call is two 1D FFT convolutions plus one gather.
+
+    qxy, qz: 1D coordinate arrays of the target image (columns, rows).
+    dchi: angular bin width of the intermediate polar grid in degrees.
+    """
+    def __init__(self, qxy, qz, dchi=0.25):
+        self.qxy = np.asarray(qxy, dtype=float)
+        self.qz = np.asarray(qz, dtype=float)
+        QXY, QZ = np.meshgrid(self.qxy, self.qz)
+        q = np.hypot(QXY, QZ)
+        chi = np.degrees(np.arctan2(QXY, QZ))  # measured from q_z, as in the calculators
+
+        steps = np.concatenate((np.abs(np.diff(self.qxy)), np.abs(np.diff(self.qz))))
+        steps = steps[steps > 0]
+        self.dq = float(steps.min()) if steps.size else 1e-3
+        self.dchi = float(dchi)
+        self.q_edges = (0.0, float(q.max()) + self.dq)
+        self.chi_edges = (float(chi.min()), float(chi.max()) + self.dchi)
+        self.n_q = int(np.ceil((self.q_edges[1] - self.q_edges[0]) / self.dq))
+        self.n_chi = int(np.ceil((self.chi_edges[1] - self.chi_edges[0]) / self.dchi))
+
+        # flat polar index of every image pixel
+        iq = np.clip(((q - self.q_edges[0]) / self.dq).astype(np.intp), 0, self.n_q - 1)
+        ic = np.clip(((chi - self.chi_edges[0]) / self.dchi).astype(np.intp), 0, self.n_chi - 1)
+        self._lookup = iq * self.n_chi + ic
+        self._kernels = {}
+
+    @property
+    def shape(self):
+        return self._lookup.shape
+
+    def nbytes(self):
+        """Bytes of the pixel lookup table, grid and cached kernel FFTs."""
+        kernels = sum(k[0].nbytes for k in self._kernels.values())
+        return self._lookup.nbytes + self.qxy.nbytes + self.qz.nbytes + kernels
+
+    def _kernel_fft(self, axis_len, sigma_bins, shape):
+        """Cached rfft of a broadening kernel for linear convolution along one axis."""
+        key = (axis_len, round(sigma_bins, 6), shape)
+        if key not in self._kernels:
+            half = int(np.ceil(5 * sigma_bins)) if shape == 'gaussian' else int(np.ceil(20 * sigma_bins))
+            half = min(max(half, 1), axis_len)
+            offsets = np.arange(-half, half + 1, dtype=float)
+            kernel = _profile(offsets, sigma_bins, shape)
+            n_fft = axis_len + 2 * half
+            self._kernels[key] = (np.fft.rfft(kernel, n_fft), half, n_fft)
+        return self._kernels[key]
+
+    def _convolve(self, polar, axis, sigma_bins, shape):
+        if sigma_bins <= 0:
+            return polar
+        axis_len = polar.shape[axis]
+        k_fft, half, n_fft = self._kernel_fft(axis_len, sigma_bins, shape)
+        f = np.fft.rfft(polar, n_fft, axis=axis)
+        if axis == 0:
+            f *= k_fft[:, None]
+        else:
+            f *= k_fft[None, :]
+        out = np.fft.irfft(f, n_fft, axis=axis)
+        return np.take(out, np.arange(half, half + axis_len), axis=axis)
+
+    def polar_map(self, qxy_peaks, qz_peaks, intensities=None,
+                  sigma_chi=1.0, sigma_q=0.005, mosaic_profile='gaussian'):
+        """
+        Broadened intensity on the intermediate (|q|, chi) grid.
+        sigma_chi: mosaic spread in degrees; sigma_q: instrumental width in 1/Å.
+        """
+        qxy_peaks = np.asarray(qxy_peaks, dtype=float)
+        qz_peaks = np.asarray(qz_peaks, dtype=float)
+        weights = np.ones_like(qxy_peaks) if intensities is None else np.asarray(intensities, dtype=float)
+        q0 = np.hypot(qxy_peaks, qz_peaks)
+        chi0 = np.degrees(np.arctan2(qxy_peaks, qz_peaks))
+        iq = ((q0 - self.q_edges[0]) / self.dq).astype(np.intp)
+        ic = ((chi0 - self.chi_edges[0]) / self.dchi).astype(np.intp)
+        inside = (iq >= 0) & (iq < self.n_q) & (ic >= 0) & (ic < self.n_chi)
+        flat = np.bincount(iq[inside] * self.n_chi + ic[inside], weights=weights[inside],
+                           minlength=self.n_q * self.n_chi)
+        polar = flat.reshape(self.n_q, self.n_chi)
+        polar = self._convolve(polar, 1, sigma_chi / self.dchi, mosaic_profile)
+        polar = self._convolve(polar, 0, sigma_q / self.dq, 'gaussian')
+        return polar
+
+    def render(self, qxy_peaks, qz_peaks, intensities=None,
+               sigma_chi=1.0, sigma_q=0.005, mosaic_profile='gaussian'):
+        """
+        Return a (len(qz), len(qxy)) synthetic image matching the target grid.
+        """
+        polar = self.polar_map(qxy_peaks, qz_peaks, intensities,
+                               sigma_chi=sigma_chi, sigma_q=sigma_q,
+                               mosaic_profile=mosaic_profile)
+        return polar.ravel()[self._lookup]
+
+    @staticmethod
+    def residual(observed, simulated, mask=None):
+        """
+        observed - scale*simulated, with the scale fitted by least squares.
+        NaNs in `observed` (masked detector regions) are ignored in the fit.
+        Returns (residual, scale).
+        """
+        observed = np.asarray(observed, dtype=float)
+        valid = np.isfinite(observed)
+        if mask is not None:
+            valid &= mask
+        sim = simulated[valid]
+        denom = np.dot(sim, sim)
+        scale = np.dot(observed[valid], sim) / denom if denom > 0 else 0.0
+        return observed - scale * simulated, scale
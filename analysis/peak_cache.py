@@ -0,0 +1,127 @@
+# File: ewald/analysis/peak_cache.py
+"""
+PhasePeakCache: calculated Bragg peaks for one structure (phase), cached until
+that structure's lattice, orientation, or hkl range changes.
+"""
+import numpy as np
+
+from .reciprocal_calculator import ReciprocalCalculator
+from .lattice import euler_matrix, rotate_basis, symmetric_hkl_grid, q_xy_z
+from .perf import timed
+
+
+class PhasePeakCache:
+    """
+    Holds the lattice, orientation and hkl range of a single structure and the
+    peak arrays derived from them. `peaks()` only recomputes when one of the
+    inputs has changed since the last call; `version` increments on every
+    recompute so views can tell whether they need to redraw.
+    `rings()` does the same for powder rings, which ignore orientation, and
+    `fiber_peaks()` for fiber texture, which ignores phi.
+    """
+    def __init__(self, name, lattice, orientation=(0.0, 0.0, 0.0), peak_range=(1, 1, 1),
+                 contact_plane=(0, 0, 1)):
+        self.name = name
+        self.contact_plane = tuple(int(v) for v in contact_plane)
+        self.lattice = tuple(float(v) for v in lattice)
+        self.orientation = tuple(float(v) for v in orientation)
+        self.peak_range = tuple(int(v) for v in peak_range)
+        self.calc = ReciprocalCalculator(*self.lattice)
+        self.version = 0
+        self._key = None
+        self._qxy = self._qz = self._hkl = None
+        self.ring_version = 0
+        self._ring_key = None
+        self._rings = None
+        self.fiber_version = 0
+        self._fiber_key = None
+        self._fiber = None
+
+    def set_lattice(self, a, b, c, alpha, beta, gamma):
+        lattice = (float(a), float(b), float(c), float(alpha), float(beta), float(gamma))
+        if lattice != self.lattice:
+            self.lattice = lattice
+            self.calc.set_lattice(*lattice)
+
+    def set_orientation(self, omega, chi, phi):
+        self.orientation = (float(omega), float(chi), float(phi))
+
+    def set_peak_range(self, hmax, kmax, lmax):
+        self.peak_range = (int(hmax), int(kmax), int(lmax))
+
+    def set_contact_plane(self, h, k, l):
+        self.contact_plane = (int(h), int(k), int(l))
+
+    def nbytes(self):
+        """Bytes held by the cached peak, ring and fiber arrays."""
+        arrays = [self._qxy, self._qz, self._hkl]
+        arrays += list(self._rings or ()) + list(self._fiber or ())
+        return sum(a.nbytes for a in arrays if isinstance(a, np.ndarray))
+
+    def _cache_key(self):
+        return (self.lattice, self.orientation, self.peak_range)
+
+    def is_stale(self):
+        return self._key != self._cache_key()
+
+    def peaks(self):
+        """
+        Return (q_xy, q_z, hkl) arrays for reflections with q_xy > 0 and q_z > 0.
+        """
+        key = self._cache_key()
+        if key != self._key:
+            self._qxy, self._qz, self._hkl = self._compute()
+            self._key = key
+            self.version += 1
+        return self._qxy, self._qz, self._hkl
+
+    def seed(self, qxy, qz, hkl):
+        """
+        Install previously computed peaks (e.g. from a project file) as the
+        cached result for the current inputs, so no recompute is needed.
+        """
+        self._qxy = np.asarray(qxy, dtype=float)
+        self._qz = np.asarray(qz, dtype=float)
+        self._hkl = np.asarray(hkl, dtype=int).reshape(-1, 3)
+        self._key = self._cache_key()
+        self.version += 1
+
+    def rings(self):
+        """
+        Return (q, multiplicity, hkl) powder rings. Orientation is not part of
+        the cache key, so rotating the sample never triggers a recompute.
+        """
+        key = (self.lattice, self.peak_range)
+        if key != self._ring_key:
+            hmax = self.peak_range[0]
+            self._rings = self.calc.powder_rings(hkl_range=range(-hmax, hmax + 1))
+            self._ring_key = key
+            self.ring_version += 1
+        return self._rings
+
+    def fiber_peaks(self):
+        """
+        Return (q_xy, q_z, hkl, multiplicity) for fiber texture about the
+        contact-plane normal. omega and chi tilt the fiber axis; phi is not
+        part of the cache key because it cannot change the result.
+        """
+        omega, chi, _ = self.orientation
+        key = (self.lattice, self.peak_range, self.contact_plane, omega, chi)
+        if key != self._fiber_key:
+            hmax = self.peak_range[0]
+            tilt = euler_matrix(omega, chi, 0.0)
+            self._fiber = self.calc.fiber_peaks(self.contact_plane,
+                                                hkl_range=range(-hmax, hmax + 1), tilt=tilt)
+            self._fiber_key = key
+            self.fiber_version += 1
+        return self._fiber
+
+    @timed('peaks.compute')
+    def _compute(self):
+        M = np.vstack((self.calc.a_vec, self.calc.b_vec, self.calc.c_vec))
+        self.calc.update_reciprocal(*rotate_basis(M, euler_matrix(*self.orientation)))
+        # Same cubic index grid as find_peaks(range(-hmax, hmax+1))
+        hkl = symmetric_hkl_grid(self.peak_range[0])
+        q_xy, q_z = q_xy_z(hkl @ self.calc.star_basis)
+        keep = (q_xy > 0) & (q_z > 0)
+        return q_xy[keep], q_z[keep], hkl[keep]
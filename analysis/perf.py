@@ -0,0 +1,187 @@
+"""
+Timing instrumentation for the interactive hot paths.
+
+`timed` (decorator) and `timer` (context manager) record how long the
+calculator, rendering and integration paths take. Instrumentation is off by
+default and then costs one global check per call; turn it on with
+`enable()` or by starting the app with EWALD_PERF=1. Each timer name keeps a
+rolling window of recent durations (percentiles and a log-spaced histogram
+for the Performance panel), and an optional JSON-lines trace file receives
+one record per timed call:
+
+    {"t": 1718000000.123, "name": "peaks.compute", "ms": 1.42, "thread": "MainThread"}
+
+EWALD_PERF_TRACE=path enables timing and writes the trace at startup.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+# log-spaced histogram edges in seconds, 10 µs to 10 s
+HIST_EDGES = np.logspace(-5, 1, 25)
+
+_enabled = False
+_lock = threading.Lock()
+_stats: Dict[str, 'RollingStats'] = {}
+_trace = None
+
+
+class RollingStats:
+    """The last `window` durations (seconds) of one timer, plus lifetime totals."""
+
+    def __init__(self, window: int = 1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+
+    def percentiles(self, q=(50, 90, 99)):
+        if not self.samples:
+            return [0.0] * len(q)
+        return list(np.percentile(np.fromiter(self.samples, float), q))
+
+    def histogram(self, edges=HIST_EDGES):
+        """Counts of the rolling window per bin of `edges`; out-of-range values go to the end bins."""
+        values = np.clip(np.fromiter(self.samples, float), edges[0], edges[-1])
+        return np.histogram(values, bins=edges)[0]
+
+    def summary(self) -> dict:
+        p50, p90, p99 = self.percentiles()
+        return {'count': self.count, 'total': self.total, 'last': self.last,
+                'p50': p50, 'p90': p90, 'p99': p99,
+                'max': max(self.samples) if self.samples else 0.0}
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(trace_path: Optional[str] = None):
+    """Start recording; with `trace_path`, also append JSON lines to that file."""
+    global _enabled, _trace
+    with _lock:
+        if trace_path is not None:
+            if _trace is not None:
+                _trace.close()
+            _trace = open(trace_path, 'a', buffering=1)
+        _enabled = True
+
+
+def disable():
+    """Stop recording and close the trace file. Collected stats are kept."""
+    global _enabled, _trace
+    with _lock:
+        _enabled = False
+        if _trace is not None:
+            _trace.close()
+            _trace = None
+
+
+def trace_path() -> Optional[str]:
+    return _trace.name if _trace is not None else None
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def record(name: str, seconds: float):
+    """Add one duration to timer `name` (and the trace file, if open)."""
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = RollingStats()
+        stats.add(seconds)
+        if _trace is not None:
+            _trace.write(json.dumps({'t': round(time.time(), 6), 'name': name,
+                                     'ms': round(seconds * 1e3, 4),
+                                     'thread': threading.current_thread().name}) + "\n")
+
+
+def snapshot() -> Dict[str, dict]:
+    """{name: summary dict} of every timer, for display."""
+    with _lock:
+        return {name: stats.summary() for name, stats in _stats.items()}
+
+
+def histogram(name: str):
+    """(counts, edges) of the rolling window of timer `name`."""
+    with _lock:
+        stats = _stats.get(name)
+        counts = stats.histogram() if stats is not None else np.zeros(len(HIST_EDGES) - 1, int)
+    return counts, HIST_EDGES
+
+
+def timed(name: Optional[str] = None):
+    """
+    Decorator recording each call's duration under `name`
+    (default: module.qualname of the function).
+    """
+    def wrap(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - t0)
+        return wrapper
+    return wrap
+
+
+class _Timer:
+    __slots__ = ('name', 't0')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """Context manager timing its block under `name`; a shared no-op when disabled."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+if os.environ.get('EWALD_PERF_TRACE'):
+    enable(os.environ['EWALD_PERF_TRACE'])
+elif os.environ.get('EWALD_PERF', '').lower() in ('1', 'true', 'yes', 'on'):
+    enable()
+atexit.register(disable)
@@ -1,13 +1,10 @@
 from typing import Sequence, Tuple
 import numpy as np
 import scipy.spatial.transform as transform
-import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib import ticker
-from ipywidgets import FloatSlider, IntSlider, Checkbox, HBox, VBox, interactive_output
-from IPython.display import display
-import mplcursors
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from .bragg_calculator import _unique_rings, _fiber_collapse
+from .lattice import direct_basis, reciprocal_basis, hkl_grid, q_chi
+from .perf import timed
 
 
 class ReciprocalCalculator:
@@ -26,28 +23,16 @@ class ReciprocalCalculator:
 
     @staticmethod
     def _calc_real_space_abc(a_len, b_len, c_len, alpha_deg, beta_deg, gamma_deg):
-        α = np.deg2rad(alpha_deg)
-        β = np.deg2rad(beta_deg)
-        γ = np.deg2rad(gamma_deg)
-        V = (a_len * b_len * c_len *
-             np.sqrt(1 - np.cos(α)**2 - np.cos(β)**2 - np.cos(γ)**2
-                     + 2*np.cos(α)*np.cos(β)*np.cos(γ)))
-        a = np.array([a_len, 0.0, 0.0])
-        b = np.array([b_len * np.cos(γ), b_len * np.sin(γ), 0.0])
-        c = np.array([
-            c_len * np.cos(β),
-            c_len * (np.cos(α) - np.cos(β)*np.cos(γ)) / np.sin(γ),
-            V / (a_len * b_len * np.sin(γ))
-        ])
-        return a, b, c
+        return tuple(direct_basis(a_len, b_len, c_len, alpha_deg, beta_deg, gamma_deg))
 
     @staticmethod
     def _calc_reciprocal_space(a, b, c):
-        vol = np.dot(a, np.cross(b, c))
-        factor = 2 * np.pi / vol
-        return (factor * np.cross(b, c),
-                factor * np.cross(c, a),
-                factor * np.cross(a, b))
+        return tuple(reciprocal_basis(np.vstack((a, b, c))))
+
+    @property
+    def star_basis(self):
+        """(3, 3) array with rows a*, b*, c* of the current (possibly rotated) lattice."""
+        return np.vstack((self.a_star, self.b_star, self.c_star))
 
     @staticmethod
     def rotate_vector(v, axis, angle_deg):
@@ -69,12 +54,52 @@ class ReciprocalCalculator:
             chi_deg = 0.0
         return q_mag, chi_deg
 
+    @timed('calc.find_peaks')
     def find_peaks(self, hkl_range=range(-4,10), target_q=None, tol=0.1):
-        peaks = [((h, k, l), *self.calculate_q_chi(h,k,l))
-                 for h in hkl_range for k in hkl_range for l in hkl_range]
+        """
+        [((h, k, l), |q|, chi_deg), ...] over hkl_range^3 in nested-loop order,
+        optionally only peaks with ||q| - target_q| <= tol.
+        """
+        hkl, q_mag, chi = self.peak_arrays(hkl_range, target_q, tol)
+        return [(tuple(idx), q, c) for idx, q, c in zip(hkl.tolist(), q_mag.tolist(), chi.tolist())]
+
+    def peak_arrays(self, hkl_range=range(-4,10), target_q=None, tol=0.1):
+        """Array form of find_peaks: (hkl (N, 3), |q|, chi_deg)."""
+        hkl = hkl_grid(hkl_range)
+        q_mag, chi = q_chi(hkl @ self.star_basis)
         if target_q is not None:
-            peaks = [p for p in peaks if abs(p[1] - target_q) <= tol]
-        return peaks
+            keep = np.abs(q_mag - target_q) <= tol
+            hkl, q_mag, chi = hkl[keep], q_mag[keep], chi[keep]
+        return hkl, q_mag, chi
+
+    @timed('calc.powder_rings')
+    def powder_rings(self, hkl_range=range(-4,10), decimals=4):
+        """
+        Unique |q| values of the lattice with their multiplicities.
+        |q| does not depend on orientation, so this is a single vectorized pass
+        replacing repeated orientation scans for randomly oriented samples.
+        Returns (q_unique, multiplicity, hkl) where hkl holds one representative
+        (the lexicographically largest) Miller index per ring.
+        """
+        hkl = hkl_grid(hkl_range)
+        hkl = hkl[np.any(hkl != 0, axis=1)]
+        q_mag = np.round(np.linalg.norm(hkl @ self.star_basis, axis=1), decimals)
+        return _unique_rings(q_mag, hkl)
+
+    @timed('calc.fiber_peaks')
+    def fiber_peaks(self, contact_plane=(0, 0, 1), hkl_range=range(-4,10),
+                    tilt=None, decimals=4):
+        """
+        (|q_xy|, q_z) spots of a fiber-textured film whose `contact_plane` lies
+        on the substrate. Rotation about the film normal (phi) has no effect,
+        so it is not an input; `tilt` is an optional (3,3) rotation of the
+        fiber axis (e.g. omega/chi misalignment).
+        Returns (q_xy, q_z, hkl, multiplicity) with duplicate spots merged.
+        """
+        hkl = hkl_grid(hkl_range)
+        # unrotated basis: the contact plane alone fixes the orientation
+        B = reciprocal_basis(np.vstack((self.a_vec, self.b_vec, self.c_vec)))
+        return _fiber_collapse(B, contact_plane, hkl, tilt=tilt, decimals=decimals)
 
     def update_reciprocal(self, a_vec, b_vec, c_vec):
         self.a_star, self.b_star, self.c_star = self._calc_reciprocal_space(
@@ -1,21 +1,43 @@
+"""
+ReciprocalViewer: notebook tool overlaying the Bragg peaks of an adjustable
+lattice on a GIWAXS image.
+
+The figure, image, peak scatter, unit cell and peak table are built once in
+`show()`. A slider change only recomputes the peaks (`compute`, vectorized
+over all hkl through analysis.lattice) and updates those artists in place
+(`render`). With the ipympl backend (%matplotlib widget) the figure canvas is
+a live widget redrawn with draw_idle; with other backends the same figure is
+re-rendered into an Image widget. Table rows are cached per (hkl, q_xy, q_z), so only peaks that moved
+are re-formatted.
+"""
+import html
+import io
 from typing import Sequence, Tuple
+
 import numpy as np
-import pandas as pd
 import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import mplcursors
-from ipywidgets import FloatSlider, IntSlider, Checkbox, HBox, VBox, interactive_output, Dropdown, ToggleButtons, Output
-from ipywidgets import SelectMultiple
-from IPython.display import display, clear_output, HTML
+from ipywidgets import (FloatSlider, IntSlider, Checkbox, HBox, VBox, Dropdown,
+                        ToggleButtons, HTML, Image)
+from IPython.display import display
+
+from .lattice import rotation_matrix, rotate_lattice, euler_matrix, rotate_basis
+from .perf import timed
+
+TABLE_COLUMNS = ('q_xy', 'q_z', 'h', 'k', 'l', 'hkl')
+CELL_FACES = [(0, 1, 4, 2), (0, 1, 5, 3), (0, 2, 6, 3), (7, 4, 1, 5), (7, 6, 2, 4), (7, 5, 3, 6)]
+
 
 class ReciprocalViewer:
     def __init__(self, img_array, qxy, qz, calculator,
                  target_q=None, tol=0.1,
                  init_rot_x=0, init_rot_y=0, init_rot_z=0,
                  xlim: Tuple[float, float] = None,
-                 ylim: Tuple[float, float] = None):
+                 ylim: Tuple[float, float] = None,
+                 hkl_range=range(-4, 10)):
         self.img_array = img_array
         self.qxy       = qxy
         self.qz        = qz
@@ -26,6 +48,12 @@ class ReciprocalViewer:
 
         self.xlim = xlim
         self.ylim = ylim
+        self._hkl_range = hkl_range
+
+        # figure, artists and widgets are created in show()
+        self.fig = None
+        self._peak_hkl = np.empty((0, 3), dtype=int)
+        self._row_cache = {}
 
         # initialize sliders for lattice and orientation
         a0, b0, c0 = (calculator.a_len, calculator.b_len, calculator.c_len)
@@ -42,44 +70,43 @@ class ReciprocalViewer:
             'rot_z':     IntSlider(min=-180, max=180,   value=init_rot_z, description='rot_z'),
             'draw_cell': Checkbox(value=True, description='Draw Cell')
         }
+        self._sort_dd = Dropdown(options=list(TABLE_COLUMNS), description='Sort by:')
+        self._order_dd = ToggleButtons(options=[('Asc', True), ('Desc', False)], description='Order:')
+        self._table = HTML()
 
     @staticmethod
     def rot_matrix(u: np.ndarray, theta: float) -> np.ndarray:
-        ux, uy, uz = u
-        c, s = np.cos(theta), np.sin(theta)
-        return np.array([
-            [c + ux*ux*(1-c),    ux*uy*(1-c) - uz*s, ux*uz*(1-c) + uy*s],
-            [uy*ux*(1-c) + uz*s, c + uy*uy*(1-c),    uy*uz*(1-c) - ux*s],
-            [uz*ux*(1-c) - uy*s, uz*uy*(1-c) + ux*s, c + uz*uz*(1-c)]
-        ])
+        return rotation_matrix(u, np.rad2deg(theta))
 
     @staticmethod
     def rotate_lattice(a: np.ndarray, b: np.ndarray, c: np.ndarray,
                        rotation_axis: Sequence[float], rotation_degrees: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        axis = np.asarray(rotation_axis) / np.linalg.norm(rotation_axis)
-        theta = np.deg2rad(rotation_degrees)
-        R = ReciprocalViewer.rot_matrix(axis, theta)
-        return R @ a, R @ b, R @ c
-
-    def _update(self, **kwargs):
-        clear_output(wait=True)
-
-        # Create figure for GIWAXS image and unit cell
-        fig = plt.figure(figsize=(15, 6))
-
-        # Update lattice, compute peaks
-        self.calc.set_lattice(kwargs['a_len'], kwargs['b_len'], kwargs['c_len'],
-                              kwargs['alpha_deg'], kwargs['beta_deg'], kwargs['gamma_deg'])
-        a, b, c = self.calc.a_vec, self.calc.b_vec, self.calc.c_vec
-        a_rot, b_rot, c_rot = self.rotate_lattice(a, b, c, [1,0,0], kwargs['rot_x'])
-        a_rot, b_rot, c_rot = self.rotate_lattice(a_rot, b_rot, c_rot, [0,1,0], kwargs['rot_y'])
-        a_rot, b_rot, c_rot = self.rotate_lattice(a_rot, b_rot, c_rot, [0,0,1], kwargs['rot_z'])
-        self._a_rot, self._b_rot, self._c_rot = a_rot, b_rot, c_rot
-        self.calc.update_reciprocal(a_rot, b_rot, c_rot)
-        peaks = self.calc.find_peaks(target_q=self.target_q, tol=self.tol)
-
-        # Plot GIWAXS image
-        ax = fig.add_subplot(121)
+        return rotate_lattice(a, b, c, rotation_axis, rotation_degrees)
+
+    # --- computation (no widgets or artists) ---
+    @timed('viewer.compute')
+    def compute(self, a_len, b_len, c_len, alpha_deg, beta_deg, gamma_deg,
+                rot_x, rot_y, rot_z, **_):
+        """
+        Set the lattice and orientation on the calculator and return the
+        peaks as arrays (hkl (N, 3), q_xy, q_z), filtered by target_q/tol.
+        """
+        self.calc.set_lattice(a_len, b_len, c_len, alpha_deg, beta_deg, gamma_deg)
+        M = np.vstack((self.calc.a_vec, self.calc.b_vec, self.calc.c_vec))
+        # X, then Y, then Z: the same rotation as chaining rotate_lattice per axis
+        self._a_rot, self._b_rot, self._c_rot = rotate_basis(M, euler_matrix(rot_x, rot_y, rot_z))
+        self.calc.update_reciprocal(self._a_rot, self._b_rot, self._c_rot)
+
+        hkl, q_mag, chi = self.calc.peak_arrays(self._hkl_range, self.target_q, self.tol)
+        # same convention as find_peaks: chi from the q_z axis, q_xy = |q| sin(chi) >= 0
+        chi = np.radians(chi)
+        return hkl, q_mag * np.sin(chi), q_mag * np.cos(chi)
+
+    # --- figure ---
+    def _build_figure(self):
+        with plt.ioff():
+            self.fig = plt.figure(figsize=(15, 6))
+        ax = self.ax = self.fig.add_subplot(121)
         vmin, vmax = np.percentile(self.img_array, 1), np.percentile(self.img_array, 99.3)
         ax.imshow(self.img_array,
                   norm=matplotlib.colors.Normalize(vmin=vmin, vmax=vmax),
@@ -97,91 +124,122 @@ class ReciprocalViewer:
         ax.tick_params(axis='both', which='major', labelsize=10)
         ax.yaxis.set_major_locator(ticker.MaxNLocator(prune='both'))
 
-        # Overlay peaks
-        pts = []
-        for hkl, q_mag, chi in peaks:
-            cr = np.radians(chi)
-            x = q_mag * np.sin(cr)
-            y = q_mag * np.cos(cr)
-            p, = ax.plot(x, y, 'o', color='white', markersize=5, markeredgecolor='black')
-            p.set_gid(hkl)
-            pts.append(p)
-        
-        
-        mplc = mplcursors.cursor(pts, hover=True)
-        mplc.connect('add', lambda sel: sel.annotation.set_text(sel.artist.get_gid()))
-        mplc.connect('add', lambda sel: sel.annotation.set_position((0.1,0.1)))
-
-        # Optional 3D cell
-        if kwargs['draw_cell'] and self._a_rot is not None:
-            ax3d = fig.add_subplot(1, 2, 2, projection='3d')
-            ax3d.view_init(elev=15, azim=45)
-            ax3d.set_proj_type('ortho')
-            verts = np.array([[0,0,0], self._a_rot, self._b_rot, self._c_rot,
-                              self._a_rot+self._b_rot, self._a_rot+self._c_rot,
-                              self._b_rot+self._c_rot, self._a_rot+self._b_rot+self._c_rot])
-            faces = [[verts[i] for i in face] for face in [(0,1,4,2),(0,1,5,3),(0,2,6,3),
-                                                          (7,4,1,5),(7,6,2,4),(7,5,3,6)]]
-            pc = Poly3DCollection(faces, facecolors='cyan', edgecolors='black', alpha=0.8)
-            ax3d.add_collection3d(pc)
-            cen = verts.mean(axis=0)
-            lim = max(np.linalg.norm(v) for v in verts[1:4]) * 1.5
-            ax3d.set_xlim(cen[0]-lim, cen[0]+lim)
-            ax3d.set_ylim(cen[1]-lim, cen[1]+lim)
-            ax3d.set_zlim(cen[2]-lim, cen[2]+lim)
-            ax3d.set_box_aspect((1,1,1))
-
-        plt.tight_layout()
-        plt.show()
-
-        # Get actual plot limits for filtering
-        x_min, x_max = ax.get_xlim()
-        y_min, y_max = ax.get_ylim()
-
-        # Build table rows only for displayed peaks
-        rows = []
-        for hkl, q_mag, chi in peaks:
-            cr = np.radians(chi)
-            qxy_val = q_mag * np.sin(cr)
-            qz_val  = q_mag * np.cos(cr)
-            if not (x_min <= qxy_val <= x_max and y_min <= qz_val <= y_max):
-                continue
-            h, k, l = hkl
-            rows.append({
-                'q_xy': round(qxy_val, 2),
-                'q_z':  round(qz_val, 2),
-                'h':     int(h),
-                'k':     int(k),
-                'l':     int(l),
-                'hkl':   f"{hkl}"
-            })
-        df = pd.DataFrame(rows, columns=['q_xy', 'q_z', 'h', 'k', 'l', 'hkl'])
-
-        # Interactive table controls
-        sort_dd = Dropdown(options=df.columns.tolist(), description='Sort by:')
-        order_dd = ToggleButtons(options=[('Asc', True), ('Desc', False)], description='Order:')
-        out = Output()
-
-        def refresh(change=None):
-            out.clear_output(wait=True)
-            sorted_df = df.sort_values(by=sort_dd.value, ascending=order_dd.value)
-            html = sorted_df.to_html(index=False)
-            with out:
-                display(HTML(f'<div style="max-height:200px; overflow:auto;">{html}</div>'))
-
-        sort_dd.observe(refresh, names='value')
-        order_dd.observe(refresh, names='value')
-        refresh()
-        display(VBox([HBox([sort_dd, order_dd]), out]))
+        # one artist for all peaks; offsets are replaced on every update
+        self._scatter = ax.scatter([], [], s=30, c='white', edgecolors='black', zorder=3)
+        cursor = mplcursors.cursor(self._scatter, hover=True)
+        cursor.connect('add', lambda sel: sel.annotation.set_text(
+            str(tuple(int(i) for i in self._peak_hkl[sel.index]))))
+        cursor.connect('add', lambda sel: sel.annotation.set_position((0.1,0.1)))
+        self._cursor = cursor
+
+        ax3d = self.ax3d = self.fig.add_subplot(1, 2, 2, projection='3d')
+        ax3d.view_init(elev=15, azim=45)
+        ax3d.set_proj_type('ortho')
+        ax3d.set_box_aspect((1,1,1))
+        self._cell = Poly3DCollection([], facecolors='cyan', edgecolors='black', alpha=0.8)
+        ax3d.add_collection3d(self._cell)
+        self.fig.tight_layout()
+
+        live = type(self.fig.canvas).__module__.startswith('ipympl')
+        self._image = None if live else Image(format='png')
+        return self.fig.canvas if live else self._image
+
+    def _draw(self):
+        if self._image is None:
+            self.fig.canvas.draw_idle()
+        else:
+            buf = io.BytesIO()
+            self.fig.savefig(buf, format='png')
+            self._image.value = buf.getvalue()
+
+    def _render_cell(self, draw_cell):
+        self.ax3d.set_visible(draw_cell)
+        if not draw_cell or self._a_rot is None:
+            return
+        a, b, c = self._a_rot, self._b_rot, self._c_rot
+        verts = np.array([[0,0,0], a, b, c, a+b, a+c, b+c, a+b+c])
+        self._cell.set_verts([verts[list(face)] for face in CELL_FACES])
+        cen = verts.mean(axis=0)
+        lim = max(np.linalg.norm(v) for v in verts[1:4]) * 1.5
+        self.ax3d.set_xlim(cen[0]-lim, cen[0]+lim)
+        self.ax3d.set_ylim(cen[1]-lim, cen[1]+lim)
+        self.ax3d.set_zlim(cen[2]-lim, cen[2]+lim)
+
+    @timed('viewer.render')
+    def render(self, hkl, q_xy, q_z, draw_cell=True):
+        """Update scatter, unit cell and table in place, then redraw."""
+        self._peak_hkl = hkl
+        self._scatter.set_offsets(np.column_stack((q_xy, q_z)))
+        self._render_cell(draw_cell)
+        self._update_table()
+        self._draw()
+
+    # --- table ---
+    def _row_html(self, key):
+        if key not in self._row_cache:
+            if len(self._row_cache) > 20000:
+                self._row_cache.clear()
+            qxy_val, qz_val, h, k, l = key
+            cells = (f"{qxy_val:.2f}", f"{qz_val:.2f}", h, k, l, html.escape(str((h, k, l))))
+            self._row_cache[key] = '<tr>' + ''.join(f'<td>{c}</td>' for c in cells) + '</tr>'
+        return self._row_cache[key]
+
+    def _update_table(self, change=None):
+        """Rows for peaks inside the current axes limits, sorted by the chosen column."""
+        if self.fig is None:
+            return
+        offsets = np.asarray(self._scatter.get_offsets()).reshape(-1, 2)
+        hkl = self._peak_hkl
+        x_min, x_max = self.ax.get_xlim()
+        y_min, y_max = self.ax.get_ylim()
+        inside = ((offsets[:, 0] >= x_min) & (offsets[:, 0] <= x_max)
+                  & (offsets[:, 1] >= y_min) & (offsets[:, 1] <= y_max))
+        values = np.round(offsets[inside], 2)
+        hkl = hkl[inside]
+        columns = {'q_xy': values[:, 0], 'q_z': values[:, 1],
+                   'h': hkl[:, 0], 'k': hkl[:, 1], 'l': hkl[:, 2]}
+        sort_by = self._sort_dd.value
+        keys = ((hkl[:, 2], hkl[:, 1], hkl[:, 0]) if sort_by == 'hkl'
+                else (columns[sort_by],))
+        order = np.lexsort(keys) if len(hkl) else np.arange(0)
+        if not self._order_dd.value:
+            order = order[::-1]
+        rows = ''.join(self._row_html((float(values[i, 0]), float(values[i, 1]),
+                                       int(hkl[i, 0]), int(hkl[i, 1]), int(hkl[i, 2])))
+                       for i in order)
+        header = ''.join(f'<th>{c}</th>' for c in TABLE_COLUMNS)
+        table = (f'<div style="max-height:200px; overflow:auto;"><table>'
+                 f'<thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table></div>')
+        if table != self._table.value:
+            self._table.value = table
+
+    # --- widgets ---
+    def _values(self):
+        return {k: s.value for k, s in self._sliders.items()}
+
+    def _update(self, **kwargs):
+        hkl, q_xy, q_z = self.compute(**kwargs)
+        self.render(hkl, q_xy, q_z, kwargs.get('draw_cell', True))
+
+    def _on_change(self, change=None):
+        self._update(**self._values())
 
     def show(self):
+        figure_widget = self._build_figure()
         ui = VBox([
             HBox([self._sliders[k] for k in ('a_len','b_len','c_len')]),
             HBox([self._sliders[k] for k in ('alpha_deg','beta_deg','gamma_deg')]),
-            HBox([self._sliders[k] for k in ('rot_x','rot_y','rot_z','draw_cell')])
+            HBox([self._sliders[k] for k in ('rot_x','rot_y','rot_z','draw_cell')]),
+            figure_widget,
+            HBox([self._sort_dd, self._order_dd]),
+            self._table,
         ])
-        out = interactive_output(self._update, self._sliders)
-        display(ui, out)
-        init = {k: v.value for k, v in self._sliders.items()}
-        with out:
-            self._update(**init)
+        for slider in self._sliders.values():
+            slider.observe(self._on_change, names='value')
+        self._sort_dd.observe(self._update_table, names='value')
+        self._order_dd.observe(self._update_table, names='value')
+        # zooming on a live canvas changes which peaks the table lists
+        self.ax.callbacks.connect('xlim_changed', lambda ax: self._update_table())
+        self.ax.callbacks.connect('ylim_changed', lambda ax: self._update_table())
+        display(ui)
+        self._update(**self._values())
@@ -0,0 +1,210 @@
+"""
+Streaming reductions of image series along the series dimension.
+
+`ProfileReducer` bins every pixel of the (q_z, q_xy) grid once and then turns
+frames into 1D profiles with `np.bincount`, whole chunks at a time.
+`Waterfall` accumulates those profiles into a (frames, bins) array that grows
+as frames arrive, and `stream_waterfall` walks a series chunk by chunk so only
+`chunk_size` frames are ever held in memory.
+
+Modes:
+  'azimuthal'  I(|q|) averaged over chi in [chi_min, chi_max] (degrees from q_z)
+  'qxy'        I(q_xy) averaged over a q_z band
+  'qz'         I(q_z) averaged over a q_xy band
+"""
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..dataclass.export import read_frames, frame_count, load_coords, load_frames
+from .perf import timed
+
+REDUCTION_MODES = ('azimuthal', 'qxy', 'qz')
+
+
+class ProfileReducer:
+    """
+    Pixel-to-bin lookup for one reciprocal-space grid.
+
+    q_xy, q_z: 1D grid coordinates of the frames (frame shape is (len(q_z), len(q_xy)))
+    mode: one of REDUCTION_MODES
+    nbins: number of profile bins (defaults to the grid size along the profile axis)
+    q_range: (min, max) of the profile axis; defaults to the data range
+    chi_range: azimuthal wedge in degrees for 'azimuthal'
+    band: (min, max) of the other axis for 'qxy'/'qz'; defaults to all
+    """
+    def __init__(self, q_xy: np.ndarray, q_z: np.ndarray, mode: str = 'azimuthal',
+                 nbins: Optional[int] = None, q_range: Optional[Tuple[float, float]] = None,
+                 chi_range: Tuple[float, float] = (0.0, 90.0),
+                 band: Optional[Tuple[float, float]] = None):
+        if mode not in REDUCTION_MODES:
+            raise ValueError(f"Unknown reduction mode '{mode}' (expected one of {REDUCTION_MODES})")
+        self.mode = mode
+        q_xy = np.asarray(q_xy, dtype=float)
+        q_z = np.asarray(q_z, dtype=float)
+        QXY, QZ = np.meshgrid(q_xy, q_z)
+
+        if mode == 'azimuthal':
+            axis = np.hypot(QXY, QZ)
+            chi = np.degrees(np.arctan2(np.abs(QXY), QZ))
+            select = (chi >= chi_range[0]) & (chi <= chi_range[1])
+            nbins = nbins or int(max(len(q_xy), len(q_z)))
+        elif mode == 'qxy':
+            axis, other = QXY, QZ
+            select = np.ones(axis.shape, bool) if band is None else (other >= band[0]) & (other <= band[1])
+            nbins = nbins or len(q_xy)
+        else:
+            axis, other = QZ, QXY
+            select = np.ones(axis.shape, bool) if band is None else (other >= band[0]) & (other <= band[1])
+            nbins = nbins or len(q_z)
+
+        lo, hi = q_range if q_range is not None else (float(axis[select].min()), float(axis[select].max()))
+        self.edges = np.linspace(lo, hi, nbins + 1)
+        self.centers = 0.5 * (self.edges[1:] + self.edges[:-1])
+        self.nbins = nbins
+        self.shape = QXY.shape
+
+        bins = np.digitize(axis, self.edges) - 1
+        # the upper edge belongs to the last bin
+        bins[axis == hi] = nbins - 1
+        select &= (bins >= 0) & (bins < nbins)
+        self._pixels = np.flatnonzero(select.ravel())
+        self._bins = bins.ravel()[self._pixels]
+
+    def reduce(self, frame: np.ndarray) -> np.ndarray:
+        """Mean intensity per bin of one frame; empty bins are NaN."""
+        return self.reduce_chunk(np.asarray(frame)[None])[0]
+
+    @timed('reduce.chunk')
+    def reduce_chunk(self, frames: np.ndarray) -> np.ndarray:
+        """Profiles of a (n, q_z, q_xy) chunk as an (n, nbins) array."""
+        frames = np.asarray(frames, dtype=float).reshape(len(frames), -1)[:, self._pixels]
+        valid = np.isfinite(frames)
+        n = len(frames)
+        # offset each frame's bins so one bincount reduces the whole chunk
+        flat_bins = (self._bins[None, :] + self.nbins * np.arange(n)[:, None]).ravel()
+        sums = np.bincount(flat_bins, weights=np.where(valid, frames, 0.0).ravel(),
+                           minlength=n * self.nbins).reshape(n, self.nbins)
+        counts = np.bincount(flat_bins, weights=valid.ravel().astype(float),
+                             minlength=n * self.nbins).reshape(n, self.nbins)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+
+class Waterfall:
+    """
+    Growing (frames, bins) array of profiles along a series coordinate.
+    Storage is preallocated and doubled as frames are appended.
+    """
+    def __init__(self, reducer: ProfileReducer, capacity: int = 64):
+        self.reducer = reducer
+        self._data = np.full((capacity, reducer.nbins), np.nan)
+        self._coords = np.empty(capacity, dtype=object)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._data[:self.n]
+
+    @property
+    def coords(self) -> np.ndarray:
+        values = self._coords[:self.n]
+        try:
+            return values.astype(float)
+        except (TypeError, ValueError):
+            return values
+
+    @property
+    def q(self) -> np.ndarray:
+        return self.reducer.centers
+
+    def _reserve(self, extra: int):
+        needed = self.n + extra
+        if needed <= len(self._data):
+            return
+        capacity = max(needed, 2 * len(self._data))
+        data = np.full((capacity, self.reducer.nbins), np.nan)
+        data[:self.n] = self._data[:self.n]
+        coords = np.empty(capacity, dtype=object)
+        coords[:self.n] = self._coords[:self.n]
+        self._data, self._coords = data, coords
+
+    def append(self, frame: np.ndarray, coord=None):
+        """Reduce and append one frame (e.g. as it arrives from the detector)."""
+        self.extend(np.asarray(frame)[None], [self.n if coord is None else coord])
+
+    def extend(self, frames: np.ndarray, coords: Sequence):
+        """Reduce and append a chunk of frames."""
+        profiles = self.reducer.reduce_chunk(frames)
+        self._reserve(len(profiles))
+        self._data[self.n:self.n + len(profiles)] = profiles
+        self._coords[self.n:self.n + len(profiles)] = list(coords)
+        self.n += len(profiles)
+
+
+def _reads_store(series) -> bool:
+    """True for a lazy series handle whose stack is not loaded into memory."""
+    return getattr(series, 'is_loaded', True) is False
+
+
+def series_length(series) -> int:
+    """Number of frames of a SeriesImage or lazy series handle."""
+    if _reads_store(series):
+        return frame_count(series.store_path, series.entry, series.dim_name)
+    return series.data.sizes[series.dim_name]
+
+
+def series_coords(series) -> Dict[str, np.ndarray]:
+    """1D coordinates (q axes and series coordinate) without reading any frame."""
+    if _reads_store(series):
+        return load_coords(series.store_path, series.entry)
+    return {name: coord.values for name, coord in series.data.coords.items() if coord.ndim == 1}
+
+
+def series_frames(series, start: int, stop: int):
+    """
+    Frames [start, stop) of a SeriesImage or lazy series handle as a Dataset.
+    Lazy handles that are not loaded read only that slab from their store.
+    """
+    if _reads_store(series):
+        return load_frames(series.store_path, series.entry, series.dim_name, start, stop)
+    return series.data.isel({series.dim_name: slice(start, stop)})
+
+
+def iter_frame_chunks(series, chunk_size: int = 32) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (frames, coords) chunks of a SeriesImage or lazy series handle.
+    Lazy handles that are not loaded read each chunk straight from their
+    HDF5 store instead of loading the whole stack.
+    """
+    dim = series.dim_name
+    if _reads_store(series):
+        n = frame_count(series.store_path, series.entry, dim)
+        for start in range(0, n, chunk_size):
+            yield read_frames(series.store_path, series.entry, dim, start, min(start + chunk_size, n))
+        return
+    da = series.data[list(series.data.data_vars)[0]]
+    da = da.transpose(dim, ...)
+    coords = da.coords[dim].values if dim in da.coords else np.arange(da.sizes[dim])
+    for start in range(0, da.sizes[dim], chunk_size):
+        stop = min(start + chunk_size, da.sizes[dim])
+        yield da.isel({dim: slice(start, stop)}).values, coords[start:stop]
+
+
+def stream_waterfall(series, reducer: ProfileReducer, chunk_size: int = 32,
+                     callback: Optional[Callable[[Waterfall], None]] = None,
+                     waterfall: Optional[Waterfall] = None) -> Waterfall:
+    """
+    Reduce every frame of `series` chunk by chunk into a Waterfall.
+    `callback(waterfall)` is called after each chunk for incremental display;
+    returning True from it stops the walk early.
+    """
+    waterfall = waterfall or Waterfall(reducer)
+    for frames, coords in iter_frame_chunks(series, chunk_size):
+        waterfall.extend(frames, coords)
+        if callback is not None and callback(waterfall):
+            break
+    return waterfall
@@ -16,22 +16,7 @@ from ewald.ui.right_pane.unit_cell_view import UnitCellView
 from ewald.ui.bottom_pane.peak_table import PeakTableView
 from ewald.ui.right_pane.structure_tree import StructureTreeView
 from ewald.analysis.reciprocal_calculator import ReciprocalCalculator
-
-def rotate_lattice(a, b, c, axis, angle_deg):
-    """
-    Rotate lattice vectors a, b, c about `axis` by `angle_deg` degrees.
-    """
-    axis = np.array(axis, dtype=float)
-    axis /= np.linalg.norm(axis)
-    theta = np.deg2rad(angle_deg)
-    ux, uy, uz = axis
-    cth, sth = np.cos(theta), np.sin(theta)
-    R = np.array([
-        [cth + ux*ux*(1-cth),    ux*uy*(1-cth) - uz*sth, ux*uz*(1-cth) + uy*sth],
-        [uy*ux*(1-cth) + uz*sth, cth + uy*uy*(1-cth),    uy*uz*(1-cth) - ux*sth],
-        [uz*ux*(1-cth) - uy*sth, uz*uy*(1-cth) + ux*sth, cth + uz*uz*(1-cth)]
-    ], dtype=float)
-    return R.dot(a), R.dot(b), R.dot(c)
+from ewald.analysis.lattice import rotate_lattice
 
 class GIWAXSMainWindow(QMainWindow):
     def __init__(self, img_array, qxy, qz,
@@ -0,0 +1,48 @@
+"""
+Run the EWALD benchmark suites or compare two result files.
+
+    python -m ewald.benchmarks [suite ...] [--quick] [--repeat N] [--output FILE]
+    python -m ewald.benchmarks --compare BASELINE.json CURRENT.json [--threshold 1.1]
+"""
+import argparse
+import importlib
+import sys
+from pathlib import Path
+
+from ._harness import run_suites, compare
+
+SUITES = sorted(p.stem.replace('bench_', '') for p in Path(__file__).parent.glob('bench_*.py'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ewald.benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('suites', nargs='*', metavar='suite',
+                        help=f"suites to run (default: all of {', '.join(SUITES)})")
+    parser.add_argument('--quick', action='store_true', help="reduced parameter matrix")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help="minimum seconds per timing sample")
+    parser.add_argument('--output', type=Path, help="result JSON (default: benchmarks/results/)")
+    parser.add_argument('--compare', nargs=2, type=Path, metavar=('BASELINE', 'CURRENT'))
+    parser.add_argument('--threshold', type=float, default=1.10,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        return 1 if regressions else 0
+
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    suites = args.suites or SUITES
+    for suite in suites:
+        importlib.import_module(f"{__package__}.bench_{suite}")
+    run_suites(suites, quick=args.quick, repeat=args.repeat, min_time=args.min_time,
+               output=args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Minimal asv-style benchmark harness.
+
+Benchmarks are plain functions registered with `@benchmark(name, **params)`,
+where every keyword is a list of parameter values; the function runs once per
+combination of the parameter matrix. A benchmark may return a callable, in
+which case the outer call is setup and only the returned callable is timed.
+
+Results are written as JSON (one file per run, tagged with the git commit),
+and `compare` reports ratios between two result files so regressions in the
+interactive paths show up across commits:
+
+    python -m ewald.benchmarks                      # run everything
+    python -m ewald.benchmarks calculators --quick  # one suite, small matrix
+    python -m ewald.benchmarks --compare old.json new.json
+"""
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+_registry: Dict[str, List['Benchmark']] = {}
+
+
+class Benchmark:
+    def __init__(self, suite: str, name: str, func: Callable, params: Dict[str, list],
+                 quick: Optional[Dict[str, list]] = None):
+        self.suite = suite
+        self.name = name
+        self.func = func
+        self.params = params
+        self.quick = quick or {}
+
+    def matrix(self, quick: bool = False):
+        params = {k: self.quick.get(k, v) if quick else v for k, v in self.params.items()}
+        keys = list(params)
+        for values in itertools.product(*(params[k] for k in keys)):
+            yield dict(zip(keys, values))
+
+
+def benchmark(name: Optional[str] = None, quick: Optional[Dict[str, list]] = None, **params):
+    """
+    Register a benchmark in the calling module's suite.
+    params: parameter name -> list of values (full matrix)
+    quick: reduced value lists used with --quick
+    """
+    def wrap(func):
+        suite = func.__module__.rsplit('.', 1)[-1].replace('bench_', '')
+        _registry.setdefault(suite, []).append(Benchmark(suite, name or func.__name__, func, params, quick))
+        return func
+    return wrap
+
+
+def param_key(params: dict) -> str:
+    return ", ".join(f"{k}={v}" for k, v in params.items()) or "-"
+
+
+def time_callable(fn: Callable, repeat: int = 5, min_time: float = 0.05) -> Dict[str, float]:
+    """
+    timeit-style timing: pick a loop count so one sample takes at least
+    `min_time`, then take `repeat` samples. Times are seconds per call.
+    """
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def latency_stats(samples: List[float], frame_budget: float = 1 / 60) -> Dict[str, float]:
+    """
+    Summarize per-event latencies (seconds). An event that takes longer than
+    one frame budget drops ceil(latency / budget) - 1 frames.
+    """
+    lat = np.asarray(samples, dtype=float)
+    if lat.size == 0:
+        return {'events': 0}
+    p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+    dropped = np.maximum(np.ceil(lat / frame_budget) - 1, 0)
+    return {
+        'median': float(p50), 'p90': float(p90), 'p99': float(p99),
+        'max': float(lat.max()), 'mean': float(lat.mean()), 'events': int(lat.size),
+        'dropped_frames': int(dropped.sum()),
+        'janky_events': int((dropped > 0).sum()),
+        'frame_budget': frame_budget,
+    }
+
+
+def run_benchmark(bench: Benchmark, quick: bool = False, repeat: int = 5,
+                  min_time: float = 0.05, echo: bool = True) -> Dict[str, dict]:
+    results = {}
+    for params in bench.matrix(quick):
+        out = bench.func(**params)
+        if callable(out):
+            stats = time_callable(out, repeat, min_time)
+        elif isinstance(out, dict):
+            # the benchmark measured itself (e.g. latency percentiles)
+            stats = out
+        else:
+            stats = time_callable(lambda: bench.func(**params), repeat, min_time)
+        results[param_key(params)] = stats
+        if echo:
+            shown = stats.get('median')
+            shown = f"{shown * 1e3:10.3f} ms" if shown is not None else json.dumps(stats)[:60]
+            if 'p99' in stats:
+                shown += f"  p99 {stats['p99'] * 1e3:8.2f} ms  dropped {stats['dropped_frames']}"
+            if 'files_per_s' in stats:
+                shown += f"  {stats['files_per_s']:8.2f} files/s  {stats['mb_per_s']:8.2f} MB/s"
+            print(f"  {bench.name:<32} {param_key(params):<48} {shown}")
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).resolve().parent,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def machine_info() -> dict:
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()}
+
+
+def run_suites(suites: Optional[List[str]] = None, quick: bool = False, repeat: int = 5,
+               min_time: float = 0.05, output: Optional[Path] = None) -> Path:
+    """Run the registered suites and write one JSON result file. Returns its path."""
+    names = suites or sorted(_registry)
+    record = {'commit': git_commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'machine': machine_info(), 'quick': quick, 'results': {}}
+    for suite in names:
+        print(f"[{suite}]")
+        for bench in _registry.get(suite, []):
+            record['results'][f"{suite}.{bench.name}"] = run_benchmark(
+                bench, quick=quick, repeat=repeat, min_time=min_time)
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{record['commit']}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output = Path(output)
+    output.write_text(json.dumps(record, indent=2))
+    print(f"Results written to {output}")
+    return output
+
+
+def compare(baseline: Path, current: Path, threshold: float = 1.10, stat: str = 'median') -> List[tuple]:
+    """
+    Print current/baseline ratios of `stat` for benchmarks present in both
+    files. Returns the regressions (ratio > threshold).
+    """
+    base = json.loads(Path(baseline).read_text())
+    cur = json.loads(Path(current).read_text())
+    print(f"baseline {base['commit']} ({base['timestamp']})  ->  current {cur['commit']} ({cur['timestamp']})")
+    regressions = []
+    for name, cases in cur['results'].items():
+        for key, stats in cases.items():
+            old = base['results'].get(name, {}).get(key, {}).get(stat)
+            new = stats.get(stat)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            flag = "  REGRESSION" if ratio > threshold else ("  improved" if ratio < 1 / threshold else "")
+            print(f"  {name:<40} {key:<40} {old * 1e3:9.3f} -> {new * 1e3:9.3f} ms  x{ratio:5.2f}{flag}")
+            if ratio > threshold:
+                regressions.append((name, key, ratio))
+    return regressions
@@ -0,0 +1,89 @@
+"""
+Reciprocal-space calculator benchmarks: the interactive peak path.
+
+Matrix: hkl ranges 1-20, every crystal-system preset of the CellParamsEditor
+and batches of sample orientations.
+"""
+import numpy as np
+
+from ewald.analysis.reciprocal_calculator import ReciprocalCalculator
+from ewald.analysis.bragg_calculator import BraggCalculator
+from ewald.ui.right_pane.cell_params import LATTICE_PRESETS
+from ewald.analysis.lattice import rotate_lattice, orientation_matrices, rotate_basis
+
+from ._harness import benchmark
+
+SYSTEMS = [name for name, preset in LATTICE_PRESETS.items() if preset is not None]
+HKL = [1, 2, 5, 10, 20]
+BATCHES = [1, 10, 100, 1000]
+QUICK = dict(hkl=[1, 2, 5], system=['Cubic', 'Triclinic'], batch=[1, 100])
+
+
+def _orientations(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-90, 90, size=(n, 3))
+
+
+@benchmark(system=SYSTEMS, hkl=HKL, quick=QUICK)
+def find_peaks(system, hkl):
+    calc = ReciprocalCalculator(*LATTICE_PRESETS[system])
+    hkl_range = range(-hkl, hkl + 1)
+    return lambda: calc.find_peaks(hkl_range)
+
+
+@benchmark(system=SYSTEMS, batch=BATCHES, quick=QUICK)
+def calculate_q_chi(system, batch):
+    calc = ReciprocalCalculator(*LATTICE_PRESETS[system])
+    hkl = np.random.default_rng(1).integers(-10, 11, size=(batch, 3))
+
+    def run():
+        for h, k, l in hkl:
+            calc.calculate_q_chi(h, k, l)
+    return run
+
+
+@benchmark(system=SYSTEMS, hkl=HKL, quick=QUICK)
+def compute_peaks(system, hkl):
+    calc = BraggCalculator(*LATTICE_PRESETS[system])
+    return lambda: calc.compute_peaks((10.0, 20.0, 0.0), (hkl, hkl, hkl))
+
+
+@benchmark(system=['Cubic', 'Triclinic'], hkl=[2, 5], batch=BATCHES, quick=QUICK)
+def compute_peaks_orientation_batch(system, hkl, batch):
+    calc = BraggCalculator(*LATTICE_PRESETS[system])
+    orientations = _orientations(batch)
+
+    def run():
+        for o in orientations:
+            calc.compute_peaks(tuple(o), (hkl, hkl, hkl))
+    return run
+
+
+@benchmark(batch=BATCHES, quick=QUICK)
+def rotate_lattice_batch(batch):
+    calc = ReciprocalCalculator(*LATTICE_PRESETS['Triclinic'])
+    a, b, c = calc.a_vec, calc.b_vec, calc.c_vec
+    orientations = _orientations(batch)
+    axes = [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
+
+    def run():
+        for o in orientations:
+            v = (a, b, c)
+            for axis, angle in zip(axes, o):
+                v = rotate_lattice(*v, axis, angle)
+    return run
+
+
+@benchmark(batch=BATCHES, quick=QUICK)
+def rotate_lattice_vectorized(batch):
+    calc = ReciprocalCalculator(*LATTICE_PRESETS['Triclinic'])
+    M = np.vstack((calc.a_vec, calc.b_vec, calc.c_vec))
+    orientations = _orientations(batch)
+    return lambda: rotate_basis(M, orientation_matrices(orientations))
+
+
+@benchmark(system=['Cubic', 'Triclinic'], hkl=[2, 5], batch=BATCHES, quick=QUICK)
+def compute_peaks_batch(system, hkl, batch):
+    calc = BraggCalculator(*LATTICE_PRESETS[system])
+    orientations = _orientations(batch)
+    return lambda: calc.compute_peaks_batch(orientations, (hkl, hkl, hkl))
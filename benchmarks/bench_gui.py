@@ -0,0 +1,237 @@
+"""
+GUI responsiveness benchmarks: scripted interactions replayed against a real
+MainWindow on the offscreen Qt platform.
+
+Every scripted event is timed from dispatch until the Qt event queue is
+empty again, i.e. including the deferred canvas redraw, which is what the
+user feels. Results are latency percentiles per event plus dropped frames
+against a 60 Hz budget; `handlers` breaks the time down by the Qt-thread
+entry points (compute_peaks, displayReciprocal, UnitCellView.setOrientation,
+ROISelector.on_mouse_move).
+
+Scenarios: loading a dataset, dragging an orientation slider, drawing 100
+ROIs and hovering over them. Loading and dragging run against both center
+pane render backends; the ROI scenarios drive Matplotlib events directly and
+use the Matplotlib backend.
+"""
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import xarray as xr
+from PyQt6.QtWidgets import QApplication
+from matplotlib.backend_bases import MouseEvent
+
+from ewald.ui.main_window import MainWindow
+from ewald.ui.right_pane.cell_params import LATTICE_PRESETS
+
+from ._harness import benchmark, latency_stats
+
+QUICK = dict(size=[500], hkl=[2], n_rois=[20], events=[60])
+
+_app = None
+
+
+def _qt_app():
+    global _app
+    _app = QApplication.instance() or QApplication([])
+    return _app
+
+
+def synthetic_dataset(size, seed=0):
+    """
+    Reciprocal-space image with powder rings and Bragg spots on a
+    (q_z, q_xy) grid, shaped like SingleImage.recip_DS.
+    """
+    rng = np.random.default_rng(seed)
+    q_xy = np.linspace(-2.0, 2.0, size)
+    q_z = np.linspace(0.0, 2.0, size)
+    QXY, QZ = np.meshgrid(q_xy, q_z)
+    q = np.hypot(QXY, QZ)
+    img = rng.poisson(5.0, QXY.shape).astype(np.float32)
+    for q0 in (0.4, 0.8, 1.2, 1.6):
+        img += 200 * np.exp(-0.5 * ((q - q0) / 0.01) ** 2)
+    for x0, z0 in rng.uniform([-1.8, 0.1], [1.8, 1.9], size=(30, 2)):
+        img += 1000 * np.exp(-0.5 * (((QXY - x0) / 0.02) ** 2 + ((QZ - z0) / 0.02) ** 2))
+    da = xr.DataArray(img, dims=('q_z', 'q_xy'), coords={'q_z': q_z, 'q_xy': q_xy})
+    return xr.Dataset({'image': da})
+
+
+def synthetic_object(name, size, seed=0):
+    """Stand-in for a loaded SingleImage: what MainWindow.display_data_object reads."""
+    return SimpleNamespace(data_name=name, type='single', recip_DS=synthetic_dataset(size, seed))
+
+
+class Session:
+    """A shown MainWindow plus per-event and per-handler latency recorders."""
+
+    def __init__(self, backend='matplotlib'):
+        self.app = _qt_app()
+        self.win = MainWindow(render_backend=backend)
+        self.win.resize(1400, 900)
+        self.win.show()
+        self.latencies = []
+        self.handlers = {}
+        self._probe(self.win, 'compute_peaks')
+        self._probe(self.win.image_canvas, 'displayReciprocal')
+        self._probe(self.win.unit_cell_view, 'setOrientation', 'UnitCellView.setOrientation')
+        self.flush()
+
+    def _probe(self, obj, attr, label=None):
+        # handlers called through attribute lookup pick up the instance override
+        func = getattr(obj, attr)
+        samples = self.handlers.setdefault(label or attr, [])
+
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - t0)
+        setattr(obj, attr, timed)
+
+    def flush(self):
+        """Run the event loop until idle so pending draw_idle redraws happen."""
+        self.app.processEvents()
+        self.app.processEvents()
+
+    def event(self, action, *args):
+        """Dispatch one scripted event and record its latency."""
+        t0 = time.perf_counter()
+        action(*args)
+        self.flush()
+        self.latencies.append(time.perf_counter() - t0)
+
+    def mouse(self, name, xdata, ydata, button=1):
+        """Send a Matplotlib mouse event at data coordinates of the main axes."""
+        canvas = self.win.image_canvas.canvas
+        x, y = self.win.image_canvas.ax_main.transData.transform((xdata, ydata))
+        event = MouseEvent(name, canvas, x, y, button=button)
+        canvas.callbacks.process(name, event)
+        return event
+
+    def stats(self):
+        out = latency_stats(self.latencies)
+        out['handlers'] = {name: latency_stats(samples)
+                           for name, samples in self.handlers.items() if samples}
+        return out
+
+    def close(self):
+        self.win.close()
+        self.win.deleteLater()
+        self.flush()
+
+
+def _with_session(setup=None, backend='matplotlib'):
+    session = Session(backend)
+    if setup is not None:
+        setup(session)
+    session.latencies.clear()
+    for samples in session.handlers.values():
+        samples.clear()
+    return session
+
+
+def _show_structure(session, system, hkl):
+    win = session.win
+    win.on_peak_range_changed(hkl, hkl, hkl)
+    win.on_lattice_changed(*LATTICE_PRESETS[system])
+    session.flush()
+
+
+@benchmark(size=[500, 1000, 2000], events=[20], backend=['matplotlib', 'pyqtgraph'], quick=QUICK)
+def load_dataset(size, events, backend):
+    """Select alternating datasets in the tree: displayReciprocal plus projections."""
+    objects = [synthetic_object(f"synthetic_{i}", size, seed=i) for i in range(2)]
+    session = _with_session(backend=backend)
+    for i in range(events):
+        session.event(session.win.display_data_object, objects[i % 2])
+    stats = session.stats()
+    session.close()
+    return stats
+
+
+@benchmark(system=['Cubic', 'Triclinic'], hkl=[2, 5], size=[1000], events=[181],
+           backend=['matplotlib', 'pyqtgraph'], quick=dict(QUICK, system=['Cubic']))
+def drag_orientation(system, hkl, size, events, backend):
+    """Drag the omega slider one degree per event over a displayed image."""
+    def setup(session):
+        session.win.display_data_object(synthetic_object("synthetic", size))
+        _show_structure(session, system, hkl)
+
+    session = _with_session(setup, backend)
+    slider = session.win.cell_params.orient_sliders[0]
+    for value in np.linspace(-90, 90, events).round().astype(int):
+        session.event(slider.setValue, int(value))
+    stats = session.stats()
+    session.close()
+    return stats
+
+
+def _roi_grid(ax, n_rois):
+    side = int(np.ceil(np.sqrt(n_rois)))
+    (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+    dx, dy = (x1 - x0) / side, (y1 - y0) / side
+    boxes = []
+    for i in range(n_rois):
+        col, row = i % side, i // side
+        bx, by = x0 + (col + 0.2) * dx, y0 + (row + 0.2) * dy
+        boxes.append((bx, by, bx + 0.6 * dx, by + 0.6 * dy))
+    return boxes
+
+
+def _draw_rois(session, n_rois, steps=4):
+    """Press-drag-release each box with the ROI tool enabled."""
+    session.win.roi_manager.enable_selector(True)
+    for bx0, by0, bx1, by1 in _roi_grid(session.win.image_canvas.ax_main, n_rois):
+        session.event(session.mouse, 'button_press_event', bx0, by0)
+        for t in np.linspace(0, 1, steps + 1)[1:]:
+            session.event(session.mouse, 'motion_notify_event',
+                          bx0 + t * (bx1 - bx0), by0 + t * (by1 - by0))
+        session.event(session.mouse, 'button_release_event', bx1, by1)
+    session.win.roi_manager.enable_selector(False)
+
+
+@benchmark(n_rois=[100], size=[1000], quick=QUICK)
+def draw_rois(n_rois, size):
+    """Draw ROIs one after another; later boxes pay for every earlier one."""
+    def setup(session):
+        session.win.display_data_object(synthetic_object("synthetic", size))
+
+    session = _with_session(setup)
+    _draw_rois(session, n_rois)
+    stats = session.stats()
+    stats['rois'] = len(session.win.roi_manager.selector.rectangles)
+    session.close()
+    return stats
+
+
+@benchmark(n_rois=[0, 10, 100], size=[1000], events=[200], quick=QUICK)
+def hover(n_rois, size, events):
+    """Move the pointer across the image with n_rois ROIs present."""
+    def setup(session):
+        session.win.display_data_object(synthetic_object("synthetic", size))
+        _draw_rois(session, n_rois)
+
+    session = _with_session(setup)
+    selector = session.win.roi_manager.selector
+    samples = session.handlers.setdefault('ROISelector.on_mouse_move', [])
+    ax = session.win.image_canvas.ax_main
+    (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+    canvas = session.win.image_canvas.canvas
+    for t in np.linspace(0.01, 0.99, events):
+        # the selector's own motion handler was connected at construction,
+        # so it is timed directly and the redraw it schedules flushed after
+        x, y = ax.transData.transform((x0 + t * (x1 - x0), y0 + t * (y1 - y0)))
+        event = MouseEvent('motion_notify_event', canvas, x, y)
+        t0 = time.perf_counter()
+        selector.on_mouse_move(event)
+        samples.append(time.perf_counter() - t0)
+        session.flush()
+        session.latencies.append(time.perf_counter() - t0)
+    stats = session.stats()
+    session.close()
+    return stats
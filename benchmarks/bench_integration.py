@@ -0,0 +1,239 @@
+"""
+Integration throughput benchmarks on synthetic detector frames.
+
+Frames are generated with the example geometry (example/calib.poni): powder
+rings and textured arcs are placed at the q values that geometry maps them
+to, plus Poisson noise, and written as CMS-named TIFFs so the regular loader
+parses them. Sizes other than the native detector shape get a derived PONI
+(same distance and beam center, pixels rescaled to cover the same area) and
+an all-valid EDF mask.
+
+Reported per case: files/s and MB/s of TIFF input, for the load, integrate
+and assemble stages separately, for whole SingleImage objects, and for the
+series path serial (integrate_files) versus parallel (load_batch).
+"""
+import atexit
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+from PIL import Image
+
+from ewald.dataclass.single_image import SingleImage
+from ewald.dataclass.series_integration import IntegrationSettings, integrate_files, _q_keys
+from ewald.dataclass.batch_loader import load_batch
+
+from ._harness import benchmark
+
+EXAMPLE_DIR = Path(__file__).resolve().parents[1] / "example"
+EXAMPLE_PONI = EXAMPLE_DIR / "calib.poni"
+EXAMPLE_MASK = EXAMPLE_DIR / "mask.edf"
+
+# (rows, cols) and pixel size (m) of detectors that appear in PONI files
+DETECTORS = {
+    'Pilatus1M': ((1043, 981), 172e-6),
+    'Pilatus300k': ((619, 487), 172e-6),
+    'Pilatus2M': ((1679, 1475), 172e-6),
+}
+
+WORKERS = sorted({0, 1, 2, 4, os.cpu_count() or 1})
+QUICK = dict(scale=[0.5], n_files=[8], workers=[0, 2])
+
+_frame_sets = {}
+_tmp_root = None
+
+
+def read_poni(path):
+    """PONI file as {key: value string}."""
+    out = {}
+    for line in Path(path).read_text().splitlines():
+        if line.startswith('#') or ':' not in line:
+            continue
+        key, value = line.split(':', 1)
+        out[key.strip()] = value.strip()
+    return out
+
+
+def write_edf(path, data):
+    """Minimal uncompressed EDF writer (512-byte padded header), for masks."""
+    data = np.ascontiguousarray(data, dtype=np.uint8)
+    header = ("{\n"
+              "HEADER_ID = EH:000001:000000:000000 ;\n"
+              "ByteOrder = LowByteFirst ;\n"
+              "DataType = UnsignedByte ;\n"
+              f"Dim_1 = {data.shape[1]} ;\n"
+              f"Dim_2 = {data.shape[0]} ;\n"
+              f"Size = {data.nbytes} ;\n")
+    pad = -(len(header) + 2) % 512
+    header += " " * pad + "}\n"
+    with open(path, 'wb') as f:
+        f.write(header.encode('ascii'))
+        f.write(data.tobytes())
+
+
+def example_geometry(scale=1.0, directory=None):
+    """
+    Frame shape plus PONI and mask paths for the example geometry at `scale`
+    times the native detector size. Non-native sizes are written to `directory`.
+    """
+    poni = read_poni(EXAMPLE_PONI)
+    native, pixel = DETECTORS.get(poni.get('Detector'), DETECTORS['Pilatus1M'])
+    if scale == 1.0:
+        return native, pixel, EXAMPLE_PONI, EXAMPLE_MASK
+    shape = (max(1, round(native[0] * scale)), max(1, round(native[1] * scale)))
+    pixel1, pixel2 = pixel * native[0] / shape[0], pixel * native[1] / shape[1]
+    directory = Path(directory)
+    poni_path = directory / "calib.poni"
+    lines = [f"poni_version: 2",
+             "Detector: Detector",
+             f'Detector_config: {{"pixel1": {pixel1}, "pixel2": {pixel2}, '
+             f'"max_shape": [{shape[0]}, {shape[1]}]}}']
+    lines += [f"{k}: {poni[k]}" for k in ('Distance', 'Poni1', 'Poni2', 'Rot1', 'Rot2', 'Rot3', 'Wavelength')]
+    poni_path.write_text("\n".join(lines) + "\n")
+    mask_path = directory / "mask.edf"
+    write_edf(mask_path, np.zeros(shape, dtype=np.uint8))
+    return shape, (pixel1 + pixel2) / 2, poni_path, mask_path
+
+
+def q_map(shape, pixel, poni_path):
+    """|q| (1/Å) of every pixel, ignoring detector rotations."""
+    poni = read_poni(poni_path)
+    dist = float(poni['Distance'])
+    wavelength = float(poni['Wavelength']) * 1e10
+    y = (np.arange(shape[0]) + 0.5) * pixel - float(poni['Poni1'])
+    x = (np.arange(shape[1]) + 0.5) * pixel - float(poni['Poni2'])
+    r = np.hypot(*np.meshgrid(x, y))
+    two_theta = np.arctan2(r, dist)
+    chi = np.arctan2(*np.meshgrid(y, x, indexing='ij'))
+    return 4 * np.pi * np.sin(two_theta / 2) / wavelength, chi
+
+
+def synthetic_frame(q, chi, rng):
+    """Powder rings, textured arcs and Poisson background, as int32 counts."""
+    img = np.full(q.shape, 20.0)
+    for q0, width, amp in ((0.5, 0.006, 400), (1.0, 0.008, 800), (1.45, 0.01, 300), (2.0, 0.012, 500)):
+        ring = np.exp(-0.5 * ((q - q0) / width) ** 2)
+        texture = 1 + 2 * np.cos(2 * chi + rng.uniform(0, np.pi)) ** 8
+        img += amp * ring * texture
+    return rng.poisson(img).astype(np.int32)
+
+
+def frame_name(sample, index):
+    """CMS-style filename matching DEFAULT_MD_NAMING_SCHEME (15 fields)."""
+    return (f"{sample}_synthetic_unfilt_0p3M_5p0scfh_Si_30uL_{index:03d}_{10.0 * index:.1f}s_"
+            f"x0.015_th0.300_0.49s_{900000 + index}_{index:06d}_maxs.tiff")
+
+
+def generate_frames(directory, n_files, scale=1.0, n_samples=1, seed=0):
+    """
+    Write `n_files` synthetic TIFFs (spread over `n_samples` sample names, so
+    load_batch forms that many series) into `directory`.
+    Returns (files, poni_path, mask_path).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    shape, pixel, poni_path, mask_path = example_geometry(scale, directory)
+    q, chi = q_map(shape, pixel, poni_path)
+    rng = np.random.default_rng(seed)
+    files = []
+    for i in range(n_files):
+        path = directory / frame_name(f"synth{i % n_samples}", i)
+        Image.fromarray(synthetic_frame(q, chi, rng)).save(path)
+        files.append(path)
+    return files, poni_path, mask_path
+
+
+def _frames(scale, n_files, n_samples=1):
+    """Generated frame sets are reused across cases and removed at exit."""
+    global _tmp_root
+    key = (scale, n_files, n_samples)
+    if key not in _frame_sets:
+        if _tmp_root is None:
+            _tmp_root = tempfile.mkdtemp(prefix="ewald_bench_")
+            atexit.register(shutil.rmtree, _tmp_root, ignore_errors=True)
+        directory = Path(_tmp_root) / f"s{scale}_n{n_files}_g{n_samples}"
+        _frame_sets[key] = generate_frames(directory, n_files, scale, n_samples)
+    return _frame_sets[key]
+
+
+def throughput(seconds, n_files, n_bytes):
+    return {'seconds': seconds,
+            'files_per_s': n_files / seconds if seconds else float('inf'),
+            'mb_per_s': n_bytes / 1024**2 / seconds if seconds else float('inf')}
+
+
+def _result(seconds, files, **extra):
+    """Top-level stats: `median` is wall seconds per file, so compare() works."""
+    n_bytes = sum(Path(f).stat().st_size for f in files)
+    out = throughput(seconds, len(files), n_bytes)
+    out.update(median=seconds / len(files), files=len(files), mb=n_bytes / 1024**2, **extra)
+    return out
+
+
+@benchmark(scale=[0.5, 1.0, 2.0], n_files=[32], quick=QUICK)
+def stages(scale, n_files):
+    """Serial load / integrate / assemble breakdown with one shared integrator."""
+    files, poni, mask = _frames(scale, n_files)
+    settings = IntegrationSettings(mask_file=str(mask), poni_file=str(poni))
+    loader, integrator = settings.make_loader(), settings.make_integrator()
+    n_bytes = sum(f.stat().st_size for f in files)
+    spent = dict(load=0.0, integrate=0.0, assemble=0.0)
+    stack = None
+    for i, path in enumerate(files):
+        t0 = time.perf_counter()
+        raw = loader.loadSingleImage(str(path))
+        t1 = time.perf_counter()
+        integ = integrator.integrateSingleImage(raw)
+        t2 = time.perf_counter()
+        qxy_key, qz_key = _q_keys(integ)
+        integ = integ.transpose(qz_key, qxy_key)
+        if stack is None:
+            stack = np.empty((len(files),) + integ.shape, dtype=integ.dtype)
+            coords = {qz_key: integ[qz_key].values, qxy_key: integ[qxy_key].values}
+        stack[i] = integ.values
+        t3 = time.perf_counter()
+        spent['load'] += t1 - t0
+        spent['integrate'] += t2 - t1
+        spent['assemble'] += t3 - t2
+    t0 = time.perf_counter()
+    xr.DataArray(stack, dims=('frame', qz_key, qxy_key),
+                 coords=dict(coords, frame=np.arange(len(files)))).to_dataset(name='data')
+    spent['assemble'] += time.perf_counter() - t0
+    return _result(sum(spent.values()), files,
+                   stages={k: throughput(v, len(files), n_bytes) for k, v in spent.items()})
+
+
+@benchmark(scale=[0.5, 1.0, 2.0], n_files=[8], quick=QUICK)
+def single_image(scale, n_files):
+    """One SingleImage per file, as the load dialog builds them (new integrator each)."""
+    files, poni, mask = _frames(scale, n_files)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, path in enumerate(files):
+            SingleImage(data_name=f"bench_{i}", file_path=path, mask_file=mask, poni_file=poni)
+    return _result(time.perf_counter() - t0, files)
+
+
+@benchmark(scale=[0.5, 1.0], n_files=[64], workers=WORKERS, quick=QUICK)
+def series(scale, n_files, workers):
+    """
+    workers=0: integrate_files over every frame in this process.
+    workers=N: load_batch with N series integrated in N worker processes
+    (process start-up included, as in the load dialog).
+    """
+    n_samples = max(workers, 1)
+    files, poni, mask = _frames(scale, n_files, n_samples)
+    settings = IntegrationSettings(mask_file=str(mask), poni_file=str(poni))
+    t0 = time.perf_counter()
+    if workers == 0:
+        integrate_files(files, settings)
+    else:
+        load_batch(files, settings, group_by=['sample'], series_key='global_time',
+                   max_workers=workers)
+    return _result(time.perf_counter() - t0, files, workers=workers)
@@ -0,0 +1,148 @@
+"""
+Batch loading of many TIFFs into SeriesImage objects.
+
+`NamingScheme` compiles a filename field list (the same list the CMS loader
+uses) into one regular expression, so metadata for hundreds of files is parsed
+without touching pixel data. Files are grouped into series by the chosen
+fields, ordered along a series key such as time or temperature, and every
+group is integrated in its own worker process.
+"""
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .series_image import SeriesImage
+from .single_image import MetadataAttribute, DEFAULT_MD_NAMING_SCHEME
+from .series_integration import IntegrationSettings, integrate_files, numeric_value
+
+
+class NamingScheme:
+    """
+    Compiled parser for delimiter-separated filename metadata.
+
+    fields: ordered field names, e.g. ['sample', 'material', ..., 'detector']
+    delimiter: separator between fields in the file stem
+    """
+    def __init__(self, fields: Sequence[str] = DEFAULT_MD_NAMING_SCHEME, delimiter: str = '_'):
+        self.fields = [str(f) for f in fields]
+        self.delimiter = delimiter
+        # group names must be identifiers; map them back to the field names
+        self._groups = {f'f{i}': name for i, name in enumerate(self.fields)}
+        token = f'[^{re.escape(delimiter)}]+'
+        body = re.escape(delimiter).join(f'(?P<{g}>{token})' for g in self._groups)
+        self._regex = re.compile(f'^{body}$')
+
+    def parse(self, path) -> Optional[Dict[str, str]]:
+        """Return {field: token} for a filename, or None if it does not match."""
+        match = self._regex.match(Path(path).stem)
+        if match is None:
+            return None
+        return {self._groups[g]: v for g, v in match.groupdict().items()}
+
+    def parse_many(self, paths: Iterable) -> Dict[str, Dict[str, str]]:
+        """Parse many filenames; files that do not match the scheme are skipped."""
+        out = {}
+        for path in paths:
+            meta = self.parse(path)
+            if meta is not None:
+                out[str(path)] = meta
+        return out
+
+
+@dataclass
+class FileGroup:
+    """Files of one series, ordered along `dim_name`."""
+    name: str
+    dim_name: str
+    files: List[str]
+    coords: List[Any]
+    metadata: List[Dict[str, str]]
+    common: Dict[str, str]
+
+
+def group_files(parsed: Dict[str, Dict[str, str]], group_by: Sequence[str],
+                series_key: str) -> List[FileGroup]:
+    """
+    Group parsed files into series.
+    group_by: fields that identify one series (e.g. ['sample', 'material'])
+    series_key: field used as the series coordinate (e.g. 'global_time');
+                numeric tokens are converted ('2068.2s' -> 2068.2)
+    """
+    groups = defaultdict(list)
+    for path, meta in parsed.items():
+        key = tuple(meta.get(f, '') for f in group_by)
+        groups[key].append((path, meta))
+
+    out = []
+    for key, members in sorted(groups.items()):
+        def coord_of(meta):
+            value = numeric_value(meta.get(series_key))
+            return value if value is not None else meta.get(series_key)
+        members.sort(key=lambda pm: (coord_of(pm[1]) is None, coord_of(pm[1])))
+        metas = [m for _, m in members]
+        common = {k: v for k, v in metas[0].items() if all(m.get(k) == v for m in metas[1:])}
+        out.append(FileGroup(
+            name='_'.join(key) if key else 'series',
+            dim_name=series_key,
+            files=[p for p, _ in members],
+            coords=[coord_of(m) for m in metas],
+            metadata=metas,
+            common=common,
+        ))
+    return out
+
+
+def _integrate_group(group: FileGroup, settings: IntegrationSettings,
+                     checkpoint_dir: Optional[str] = None):
+    """Worker entry point; module level so it can be pickled."""
+    checkpoint = Path(checkpoint_dir) / group.name if checkpoint_dir else None
+    return integrate_files(group.files, settings, dim_name=group.dim_name,
+                           coord_values=group.coords, name=group.name, checkpoint=checkpoint)
+
+
+def build_series(group: FileGroup, data, settings: IntegrationSettings) -> SeriesImage:
+    frame_metadata = {
+        coord: [MetadataAttribute(k, v, numeric_value(v) is not None) for k, v in meta.items()]
+        for coord, meta in zip(group.coords, group.metadata)
+    }
+    return SeriesImage(
+        data=data,
+        dim_name=group.dim_name,
+        mask_file=settings.mask_file,
+        poni_file=settings.poni_file,
+        incidence_angle=settings.incident_angle,
+        polarization=settings.polarization,
+        solid_angle_on=settings.solid_angle,
+        frame_metadata=frame_metadata,
+        data_name=group.name,
+        metadata_attributes=dict(group.common),
+    )
+
+
+def load_batch(paths: Iterable, settings: IntegrationSettings, group_by: Sequence[str],
+               series_key: str, max_workers: Optional[int] = None,
+               executor=None, checkpoint_dir: Optional[str] = None) -> List[SeriesImage]:
+    """
+    Parse, group and integrate `paths` into SeriesImage objects, one worker
+    per group. Pass `executor` to reuse an existing concurrent.futures pool.
+    checkpoint_dir: keep a per-series checkpoint directory there (<series>/), so
+    rerunning an interrupted batch only integrates the missing frames
+    """
+    scheme = NamingScheme(settings.md_naming_scheme)
+    parsed = scheme.parse_many(paths)
+    groups = group_files(parsed, group_by, series_key)
+    if not groups:
+        return []
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_integrate_group, g, settings, checkpoint_dir) for g in groups]
+        return [build_series(g, fut.result(), settings) for g, fut in zip(groups, futures)]
+    finally:
+        if own_executor:
+            executor.shutdown()
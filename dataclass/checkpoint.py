@@ -0,0 +1,219 @@
+"""
+Crash-safe checkpoints for series integration.
+
+`SeriesCheckpoint` keeps a directory with one small HDF5 file per integrated
+frame (the HDF5Exporter appendable-series layout, entry 'checkpoint') and a
+JSON-lines manifest:
+
+  <path>/manifest.jsonl        header (settings fingerprint), then one line
+                               per completed file: index, file, norm
+  <path>/<index>.h5            that file's frame on the output grid, before
+                               corrections
+
+Each frame file is written under a temporary name, synced and renamed into
+place, and only then is its manifest line written and synced. A crash or OOM
+kill therefore never leaves a half-written frame behind a manifest entry,
+and cannot damage frames that were already complete. `resume` keeps the
+longest prefix of the manifest that matches the current file list and can be
+read back, drops any frame written past it, and hands the completed frames
+back so integration continues at the next file. Corrections are applied to
+the whole stack afterwards, so they are not checkpointed.
+"""
+import json
+import os
+import warnings
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+import xarray as xr
+
+from .export import HDF5Exporter, h5py
+
+ENTRY = 'checkpoint'
+MANIFEST = 'manifest.jsonl'
+
+
+def settings_fingerprint(settings, dim_name: str) -> str:
+    """Everything a stored frame depends on, as a stable string."""
+    return json.dumps([settings.to_dict(), dim_name], sort_keys=True, default=str)
+
+
+def _fsync(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class ResumedFrames:
+    """Frames recovered from a checkpoint, in file order."""
+    frames: np.ndarray
+    norms: np.ndarray
+    qxy_key: str
+    qz_key: str
+    q_xy: np.ndarray
+    q_z: np.ndarray
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class SeriesCheckpoint:
+    """
+    Per-frame store plus manifest for one integrate_files call.
+
+    path: checkpoint directory (created on first use)
+    fingerprint: see settings_fingerprint; a checkpoint written with a
+        different fingerprint is discarded
+    """
+    def __init__(self, path: Union[str, Path], fingerprint: str, dim_name: str):
+        if h5py is None:
+            raise ImportError("Checkpointing requires h5py (conda install h5py)")
+        self.path = Path(path)
+        self.manifest_path = self.path / MANIFEST
+        self.fingerprint = fingerprint
+        self.dim_name = dim_name
+        self._manifest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+
+    def frame_path(self, index: int) -> Path:
+        return self.path / f"{index:06d}.h5"
+
+    def _frame_files(self):
+        return [p for p in self.path.glob('*.h5') if p.stem.isdigit()]
+
+    def remove(self):
+        """Delete the frames, the manifest and the directory if that leaves it empty."""
+        self.close()
+        if not self.path.is_dir():
+            return
+        for p in self._frame_files() + list(self.path.glob('*.tmp')):
+            p.unlink(missing_ok=True)
+        self.manifest_path.unlink(missing_ok=True)
+        try:
+            self.path.rmdir()
+        except OSError:  # someone else's files in there
+            pass
+
+    def _read_manifest(self):
+        records = []
+        with open(self.manifest_path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:  # torn last line
+                    break
+        return records
+
+    def _write_line(self, record):
+        self._manifest.write(json.dumps(record, default=str) + '\n')
+        self._manifest.flush()
+        os.fsync(self._manifest.fileno())
+
+    def _start_fresh(self):
+        self.remove()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._manifest = open(self.manifest_path, 'w')
+        self._write_line({'fingerprint': self.fingerprint, 'dim_name': self.dim_name})
+
+    def _read_frame(self, index: int, qxy_key: str, qz_key: str):
+        with h5py.File(self.frame_path(index), 'r') as f:
+            grp = f[ENTRY]['recip']
+            return grp['data'][0], grp[qxy_key][()], grp[qz_key][()]
+
+    def resume(self, files: Sequence[str]) -> Optional[ResumedFrames]:
+        """
+        Open the checkpoint for appending. Returns the frames of the files
+        already completed (a prefix of `files`), or None to start at file 0.
+        """
+        files = [str(f) for f in files]
+        if not self.manifest_path.exists():
+            self._start_fresh()
+            return None
+        records = self._read_manifest()
+        if not records or records[0].get('fingerprint') != self.fingerprint:
+            warnings.warn(f"Checkpoint {self.path} was written with different settings; starting over")
+            self._start_fresh()
+            return None
+        done = []
+        for i, record in enumerate(records[1:]):
+            if record.get('index') != i or i >= len(files) or record.get('file') != files[i]:
+                break
+            done.append(record)
+
+        frames, q_xy, q_z = [], None, None
+        if done:
+            qxy_key, qz_key = done[0]['qxy_key'], done[0]['qz_key']
+        for i in range(len(done)):
+            try:
+                frame, q_xy_i, q_z_i = self._read_frame(i, qxy_key, qz_key)
+            except (OSError, KeyError, IndexError) as exc:
+                # only possible if the disk lost a synced file; keep it for inspection
+                bad = self.frame_path(i)
+                if bad.exists():
+                    os.replace(bad, bad.with_suffix('.corrupt'))
+                warnings.warn(f"Checkpoint frame {bad} is unreadable ({exc}); "
+                              f"resuming after {i} of {len(done)} completed files")
+                break
+            if i == 0:
+                q_xy, q_z = q_xy_i, q_z_i
+            frames.append(frame)
+        n = len(frames)
+        if n == 0:
+            self._start_fresh()
+            return None
+
+        done = done[:n]
+        # frames past the valid prefix are redone; their files are overwritten
+        for p in self._frame_files():
+            if int(p.stem) >= n:
+                p.unlink()
+        # rewrite the manifest so later lines continue the valid prefix
+        tmp = self.manifest_path.with_name(MANIFEST + '.tmp')
+        with open(tmp, 'w') as f:
+            for record in [records[0]] + done:
+                f.write(json.dumps(record, default=str) + '\n')
+        os.replace(tmp, self.manifest_path)
+        self._manifest = open(self.manifest_path, 'a')
+        return ResumedFrames(frames=np.stack(frames), norms=np.array([r['norm'] for r in done], dtype=float),
+                             qxy_key=qxy_key, qz_key=qz_key, q_xy=q_xy, q_z=q_z,
+                             attrs=done[0].get('attrs', {}))
+
+    def append(self, index: int, file: str, coord, frame: xr.DataArray, norm: float,
+               attrs: Optional[Dict[str, Any]] = None):
+        """
+        Store one (q_z, q_xy) frame with its coordinates, then record the file
+        as completed. `attrs` (the first frame's) are kept for the result.
+        """
+        qz_key, qxy_key = frame.dims
+        path = self.frame_path(index)
+        tmp = path.with_suffix('.tmp')
+        with HDF5Exporter(tmp, mode='w') as exporter:
+            exporter.append_frames(ENTRY, frame.expand_dims(self.dim_name), self.dim_name, [coord])
+        _fsync(tmp)
+        os.replace(tmp, path)
+        record = {'index': index, 'file': str(file), 'norm': float(norm)}
+        if index == 0:
+            record.update(qxy_key=qxy_key, qz_key=qz_key, attrs=dict(attrs or {}))
+        self._write_line(record)
+
+    def completed(self) -> int:
+        """Number of files recorded in the manifest."""
+        if not self.manifest_path.exists():
+            return 0
+        return max(len(self._read_manifest()) - 1, 0)
@@ -0,0 +1,175 @@
+"""
+DataObjectManager: keeps loaded data objects within a memory budget.
+
+Objects are tracked in least-recently-viewed order. When the arrays held in
+memory exceed the budget, the oldest objects are spilled: in-memory
+SingleImage/SeriesImage results are written to an HDF5 spill store and
+replaced by a `LazyDataObject`, and lazy handles simply drop their arrays.
+`get()` marks an object as viewed and the handle reloads transparently.
+
+Spill writes run on a background thread; an object keeps serving from memory
+until its write has finished and is swapped for its handle on the next call
+into the manager. A temporary spill folder is removed by `close()` (or when
+the manager is garbage collected or the interpreter exits).
+"""
+import shutil
+import tempfile
+import uuid
+import warnings
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Optional, Union
+
+from .export import HDF5Exporter, metadata_items
+from .project import LazyDataObject, _settings
+
+DEFAULT_BUDGET_BYTES = 2 * 1024**3
+
+# spill writes happen off the GUI thread, one at a time
+_spill_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ewald-spill")
+
+
+def data_object_nbytes(data_object) -> int:
+    """Bytes of array data a data object currently holds in memory."""
+    if isinstance(data_object, LazyDataObject):
+        return sum(ds.nbytes for ds in data_object._cache.values() if ds is not None)
+    total = 0
+    for attr in ('raw_DS', 'recip_DS', 'data'):
+        ds = getattr(data_object, attr, None)
+        if ds is not None and hasattr(ds, 'nbytes'):
+            total += int(ds.nbytes)
+    return total
+
+
+class DataObjectManager:
+    """
+    Mapping of data_name -> data object with a bounded in-memory footprint.
+
+    budget_bytes: memory allowed for loaded arrays before spilling
+    spill_dir: folder for the spill stores (a temporary folder, removed on
+        close, by default)
+    """
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES,
+                 spill_dir: Optional[Union[str, Path]] = None):
+        self.budget_bytes = int(budget_bytes)
+        self.spill_dir = Path(spill_dir) if spill_dir else Path(tempfile.mkdtemp(prefix="ewald_spill_"))
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._objects = OrderedDict()  # least recently viewed first
+        self._spilling = {}  # name -> (data object, Future of its LazyDataObject)
+        self._cleanup = (weakref.finalize(self, shutil.rmtree, str(self.spill_dir), True)
+                         if spill_dir is None else None)
+
+    def close(self):
+        """Finish pending spills and delete the temporary spill folder (if it is ours)."""
+        wait([future for _, future in self._spilling.values()])
+        self._spilling.clear()
+        if self._cleanup is not None:
+            self._cleanup()
+
+    # --- mapping interface used by MainWindow ---
+    def __contains__(self, name):
+        return name in self._objects
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __iter__(self):
+        return iter(self._objects)
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def __setitem__(self, name, data_object):
+        self.add(data_object, name)
+
+    def keys(self):
+        return self._objects.keys()
+
+    def values(self):
+        """Current objects or handles, without loading anything."""
+        return list(self._objects.values())
+
+    def items(self):
+        return list(self._objects.items())
+
+    # --- cache behaviour ---
+    def add(self, data_object, name: Optional[str] = None):
+        name = name or data_object.data_name
+        self._objects[name] = data_object
+        self._objects.move_to_end(name)
+        self.enforce_budget(keep=name)
+        return data_object
+
+    def get(self, name):
+        """Return the object for `name`, marking it most recently viewed."""
+        data_object = self._objects[name]
+        self._objects.move_to_end(name)
+        self.enforce_budget(keep=name)
+        return data_object
+
+    def remove(self, name):
+        return self._objects.pop(name, None)
+
+    def set_budget(self, budget_bytes: int):
+        self.budget_bytes = int(budget_bytes)
+        self.enforce_budget()
+
+    def memory_usage(self):
+        """Mapping of name -> bytes currently held in memory."""
+        self._collect_spills()
+        return {name: data_object_nbytes(obj) for name, obj in self._objects.items()}
+
+    def total_bytes(self) -> int:
+        return sum(self.memory_usage().values())
+
+    def enforce_budget(self, keep: Optional[str] = None):
+        """Spill least recently viewed objects until usage fits the budget."""
+        usage = self.memory_usage()
+        total = sum(usage.values())
+        for name in list(self._objects):
+            if total <= self.budget_bytes:
+                break
+            if name == keep or usage[name] == 0:
+                continue
+            self._spill(name)
+            total -= usage[name]
+
+    def _spill(self, name):
+        data_object = self._objects[name]
+        if isinstance(data_object, LazyDataObject):
+            data_object.unload()
+            return
+        if name in self._spilling:
+            return
+        # one store per spill, so handles never read a file that is being written
+        path = self.spill_dir / f"spill_{uuid.uuid4().hex}.h5"
+        self._spilling[name] = (data_object, _spill_thread.submit(_write_spill, path, name, data_object))
+
+    def _collect_spills(self):
+        """Swap objects whose spill write has finished for their handles (GUI thread)."""
+        for name, (data_object, future) in list(self._spilling.items()):
+            if not future.done():
+                continue
+            del self._spilling[name]
+            if future.exception() is not None:
+                # the object simply stays in memory
+                warnings.warn(f"Could not spill {name!r} to disk: {future.exception()}")
+            elif self._objects.get(name) is data_object:
+                self._objects[name] = future.result()
+
+
+def _write_spill(path: Path, name: str, data_object) -> LazyDataObject:
+    try:
+        # a scratch store: not worth the time gzip takes
+        with HDF5Exporter(path, compression=None, mode='w') as exporter:
+            entry = exporter.write_data_object(data_object, name)
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    return LazyDataObject(
+        data_name=name, type=getattr(data_object, 'type', 'single'),
+        store_path=path, entry=entry.lstrip('/'),
+        metadata_attributes=metadata_items(data_object),
+        settings=_settings(data_object), spilled=True)
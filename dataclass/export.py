@@ -0,0 +1,333 @@
+"""
+HDF5 export for SingleImage and SeriesImage results.
+
+Every data object becomes one NeXus-style group (NXentry) inside a single
+chunked, gzip-compressed file, replacing the per-coordinate .npy folders
+written by `save_processed_image`:
+
+  /<data_name>                 attrs: type, settings, metadata attributes
+      /raw, /recip             (NXdata) one dataset per DataArray + coordinates
+          <var>                attrs: dims, DataArray attrs
+          <coord>              1D coordinate arrays
+
+Series frames can be appended one at a time along the series dimension, and
+`export_async` runs any export on a single background writer thread.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import xarray as xr
+
+try:
+    import h5py
+except ImportError:  # optional dependency, only needed for export
+    h5py = None
+
+# SingleImage fields stored as entry attributes
+_SETTINGS_FIELDS = ['file_path', 'mask_file', 'poni_file', 'incident_angle', 'tilt_angle',
+                    'sample_orientation', 'split_pixels', 'output_space', 'polarization',
+                    'solid_angle', 'dim_name', 'incidence_angle', 'solid_angle_on']
+
+# one writer thread: h5py serialises file access anyway, and ordering is preserved
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ewald-export")
+
+
+def _attr_value(value: Any):
+    """Convert a Python/NumPy value into something h5py can store as an attribute."""
+    if value is None:
+        return "None"
+    if isinstance(value, (str, bool, int, float, np.generic)):
+        return value
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, (list, tuple, np.ndarray)):
+        arr = np.asarray(value)
+        return arr if arr.dtype.kind in "biuf" else str(list(value))
+    return str(value)
+
+
+def metadata_items(data_object) -> Dict[str, Any]:
+    """
+    Metadata attributes of a data object as a plain dict. Accepts both the
+    dict built by the load dialog and a list of MetadataAttribute.
+    """
+    meta = getattr(data_object, 'metadata_attributes', None) or {}
+    if isinstance(meta, dict):
+        return dict(meta)
+    return {m.name: m.value for m in meta}
+
+
+class HDF5Exporter:
+    """
+    Writes data objects into one HDF5 file.
+
+    path: output .h5/.nxs file
+    compression: h5py compression filter ('gzip', 'lzf' or None)
+    compression_opts: filter level for gzip (0-9)
+    """
+    def __init__(self, path: Union[str, Path], compression: Optional[str] = 'gzip',
+                 compression_opts: Optional[int] = 4, mode: str = 'a'):
+        if h5py is None:
+            raise ImportError("HDF5 export requires h5py (conda install h5py)")
+        self.path = Path(path)
+        self.compression = compression
+        self.compression_opts = compression_opts if compression == 'gzip' else None
+        self.file = h5py.File(self.path, mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def flush(self):
+        self.file.flush()
+
+    # --- entries ---
+    def _entry(self, data_object, name: Optional[str] = None):
+        name = name or data_object.data_name
+        entry = self.file.require_group(name)
+        entry.attrs['NX_class'] = 'NXentry'
+        entry.attrs['type'] = getattr(data_object, 'type', 'single')
+        for field_name in _SETTINGS_FIELDS:
+            if hasattr(data_object, field_name):
+                entry.attrs[field_name] = _attr_value(getattr(data_object, field_name))
+        meta = entry.require_group('metadata')
+        for key, value in metadata_items(data_object).items():
+            meta.attrs[key] = _attr_value(value)
+        return entry
+
+    def write_single_image(self, single_image, name: Optional[str] = None):
+        """Write raw_DS and recip_DS of a SingleImage under /<data_name>."""
+        entry = self._entry(single_image, name)
+        self.write_dataset(entry, 'raw', single_image.raw_DS)
+        self.write_dataset(entry, 'recip', single_image.recip_DS)
+        return entry.name
+
+    def write_series_image(self, series_image, name: Optional[str] = None):
+        """Write a SeriesImage stack, chunked one frame per chunk along `dim_name`."""
+        entry = self._entry(series_image, name)
+        self.write_dataset(entry, 'recip', series_image.data, frame_dim=series_image.dim_name)
+        frames = entry.require_group('frame_metadata')
+        for coord, attrs in series_image.frame_metadata.items():
+            grp = frames.require_group(str(coord))
+            for m in attrs:
+                grp.attrs[m.name] = _attr_value(m.value)
+        return entry.name
+
+    def write_data_object(self, data_object, name: Optional[str] = None):
+        if getattr(data_object, 'type', 'single') == 'series':
+            return self.write_series_image(data_object, name)
+        return self.write_single_image(data_object, name)
+
+    # --- datasets ---
+    def _chunks(self, shape, axis=None):
+        if not shape:
+            return None
+        if axis is None:
+            return True
+        chunks = list(shape)
+        chunks[axis] = 1
+        return tuple(max(c, 1) for c in chunks)
+
+    def write_dataset(self, parent, name: str, ds: Union[xr.Dataset, xr.DataArray],
+                      frame_dim: Optional[str] = None):
+        """
+        Write every DataArray of `ds` plus its coordinates into parent/name.
+        Existing contents of parent/name are replaced.
+        """
+        if isinstance(ds, xr.DataArray):
+            ds = ds.to_dataset(name=ds.name or 'data')
+        if name in parent:
+            del parent[name]
+        grp = parent.create_group(name)
+        grp.attrs['NX_class'] = 'NXdata'
+        for coord_name, coord in ds.coords.items():
+            if coord.ndim != 1:
+                continue
+            values = coord.values
+            if values.dtype.kind in 'OU':
+                values = values.astype('S')
+            maxshape = (None,) if coord_name == frame_dim else None
+            grp.create_dataset(coord_name, data=values, maxshape=maxshape)
+            grp[coord_name].attrs['dims'] = [coord.dims[0]]
+        for var_name, da in ds.data_vars.items():
+            axis = da.dims.index(frame_dim) if frame_dim in da.dims else None
+            maxshape = tuple(None if i == axis else n for i, n in enumerate(da.shape))
+            dset = grp.create_dataset(str(var_name), data=da.values,
+                                      chunks=self._chunks(da.shape, axis),
+                                      maxshape=maxshape if da.ndim else None,
+                                      compression=self.compression if da.ndim else None,
+                                      compression_opts=self.compression_opts if da.ndim else None)
+            dset.attrs['dims'] = list(da.dims)
+            for key, value in da.attrs.items():
+                dset.attrs[key] = _attr_value(value)
+        grp.attrs['signal'] = str(next(iter(ds.data_vars), ''))
+        return grp
+
+    def append_frame(self, entry_name: str, frame: xr.DataArray, dim_name: str,
+                     coord_value, var_name: str = 'data', group: str = 'recip'):
+        """
+        Append one 2D frame along `dim_name` to entry_name/group/var_name,
+        creating the resizable dataset and its coordinates on first use.
+        """
+        frames = frame.expand_dims(dim_name)
+        return self.append_frames(entry_name, frames, dim_name, [coord_value], var_name, group)
+
+    def append_frames(self, entry_name: str, frames: xr.DataArray, dim_name: str,
+                      coord_values, var_name: str = 'data', group: str = 'recip'):
+        """
+        Append a (dim_name, ...) block of frames to entry_name/group/var_name
+        in one resize. Returns the index of the first appended frame.
+        """
+        frames = frames.transpose(dim_name, ...)
+        coord_values = list(coord_values)
+        frame_dims, frame_shape = frames.dims[1:], frames.shape[1:]
+        grp = self.file.require_group(entry_name).require_group(group)
+        grp.attrs['NX_class'] = 'NXdata'
+        if var_name not in grp:
+            for coord_name in frame_dims:
+                if coord_name in frames.coords and coord_name not in grp:
+                    grp.create_dataset(coord_name, data=frames.coords[coord_name].values)
+                    grp[coord_name].attrs['dims'] = [coord_name]
+            dset = grp.create_dataset(var_name, shape=(0,) + frame_shape,
+                                      maxshape=(None,) + frame_shape,
+                                      dtype=frames.dtype, chunks=(1,) + frame_shape,
+                                      compression=self.compression,
+                                      compression_opts=self.compression_opts)
+            dset.attrs['dims'] = [dim_name] + list(frame_dims)
+            string_coords = any(isinstance(c, str) for c in coord_values)
+            grp.create_dataset(dim_name, shape=(0,), maxshape=(None,),
+                               dtype=h5py.string_dtype() if string_coords
+                               else np.asarray(coord_values).dtype)
+            grp[dim_name].attrs['dims'] = [dim_name]
+            grp.attrs['signal'] = var_name
+        dset, coord = grp[var_name], grp[dim_name]
+        n, k = dset.shape[0], frames.shape[0]
+        dset.resize(n + k, axis=0)
+        coord.resize(n + k, axis=0)
+        dset[n:n + k] = frames.values
+        coord[n:n + k] = coord_values
+        return n
+
+
+def load_dataset(path: Union[str, Path], entry_name: str, group: str = 'recip') -> xr.Dataset:
+    """Read entry_name/group written by HDF5Exporter back into an xarray Dataset."""
+    if h5py is None:
+        raise ImportError("Reading HDF5 stores requires h5py (conda install h5py)")
+    with h5py.File(path, 'r') as f:
+        grp = f[entry_name][group]
+        coords, data_vars = {}, {}
+        for key, dset in grp.items():
+            dims = [d.decode() if isinstance(d, bytes) else str(d) for d in dset.attrs.get('dims', [key])]
+            values = dset.asstr()[()] if h5py.check_string_dtype(dset.dtype) else dset[()]
+            if values.dtype.kind in 'SO':
+                values = values.astype(str)
+            if len(dims) == 1 and dims[0] == key:
+                coords[key] = values
+            else:
+                attrs = {k: v for k, v in dset.attrs.items() if k != 'dims'}
+                data_vars[key] = xr.DataArray(values, dims=dims, attrs=attrs)
+    return xr.Dataset(data_vars, coords=coords)
+
+
+def _read_coords(grp, dim_name: Optional[str] = None, start: Optional[int] = None,
+                 stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """1D coordinates of an NXdata group; `dim_name` is sliced to [start, stop)."""
+    coords = {}
+    for key, dset in grp.items():
+        dims = [d.decode() if isinstance(d, bytes) else str(d) for d in dset.attrs.get('dims', [key])]
+        if dims != [key]:
+            continue
+        values = dset.asstr() if h5py.check_string_dtype(dset.dtype) else dset
+        values = np.asarray(values[start:stop] if key == dim_name else values[()])
+        coords[key] = values.astype(str) if values.dtype.kind in 'SO' else values
+    return coords
+
+
+def load_coords(path: Union[str, Path], entry_name: str, group: str = 'recip') -> Dict[str, np.ndarray]:
+    """The 1D coordinates (q axes, series coordinate) of entry_name/group, without reading the signal."""
+    if h5py is None:
+        raise ImportError("Reading HDF5 stores requires h5py (conda install h5py)")
+    with h5py.File(path, 'r') as f:
+        return _read_coords(f[entry_name][group])
+
+
+def load_frames(path: Union[str, Path], entry_name: str, dim_name: str, start: int, stop: int,
+                group: str = 'recip', var_name: Optional[str] = None) -> xr.Dataset:
+    """
+    Frames [start, stop) of a stored series as a Dataset, equivalent to
+    load_dataset(...).isel({dim_name: slice(start, stop)}) but reading only
+    that slab of the signal.
+    """
+    if h5py is None:
+        raise ImportError("Reading HDF5 stores requires h5py (conda install h5py)")
+    with h5py.File(path, 'r') as f:
+        grp = f[entry_name][group]
+        dset = _signal_dataset(grp, var_name)
+        dims = [d.decode() if isinstance(d, bytes) else str(d) for d in dset.attrs['dims']]
+        index = tuple(slice(start, stop) if d == dim_name else slice(None) for d in dims)
+        attrs = {k: v for k, v in dset.attrs.items() if k != 'dims'}
+        da = xr.DataArray(dset[index], dims=dims, attrs=attrs)
+        coords = _read_coords(grp, dim_name, start, stop)
+        name = dset.name.rsplit('/', 1)[-1]
+    return xr.Dataset({name: da}, coords=coords)
+
+
+def _signal_dataset(grp, var_name: Optional[str] = None):
+    name = var_name or grp.attrs.get('signal') or next(
+        k for k, d in grp.items() if len(d.attrs.get('dims', [])) > 1)
+    return grp[name.decode() if isinstance(name, bytes) else name]
+
+
+def frame_count(path: Union[str, Path], entry_name: str, dim_name: str,
+                group: str = 'recip') -> int:
+    """Number of frames along `dim_name` in a stored series, without reading them."""
+    if h5py is None:
+        raise ImportError("Reading HDF5 stores requires h5py (conda install h5py)")
+    with h5py.File(path, 'r') as f:
+        return int(f[entry_name][group][dim_name].shape[0])
+
+
+def read_frames(path: Union[str, Path], entry_name: str, dim_name: str, start: int, stop: int,
+                group: str = 'recip', var_name: Optional[str] = None):
+    """
+    Read frames [start, stop) of a stored series as (frames, coords), with the
+    series dimension first. Only the requested slab is read from disk.
+    """
+    if h5py is None:
+        raise ImportError("Reading HDF5 stores requires h5py (conda install h5py)")
+    with h5py.File(path, 'r') as f:
+        grp = f[entry_name][group]
+        dset = _signal_dataset(grp, var_name)
+        dims = [d.decode() if isinstance(d, bytes) else str(d) for d in dset.attrs['dims']]
+        axis = dims.index(dim_name)
+        index = [slice(None)] * dset.ndim
+        index[axis] = slice(start, stop)
+        frames = np.moveaxis(dset[tuple(index)], axis, 0)
+        coord = grp[dim_name]
+        coords = (coord.asstr() if h5py.check_string_dtype(coord.dtype) else coord)[start:stop]
+        if coords.dtype.kind in 'SO':
+            coords = coords.astype(str)
+    return frames, coords
+
+
+def export_async(path: Union[str, Path], data_objects, **exporter_kwargs):
+    """
+    Export an iterable of data objects on the background writer thread.
+    Returns a concurrent.futures.Future resolving to the list of entry names.
+    """
+    data_objects = list(data_objects)
+
+    def _run():
+        with HDF5Exporter(path, **exporter_kwargs) as exporter:
+            return [exporter.write_data_object(obj) for obj in data_objects]
+
+    return _writer.submit(_run)
@@ -0,0 +1,159 @@
+"""
+Memory accounting for data objects, caches and plot layers.
+
+`MemoryAccountant` polls registered sources, each a callable returning
+{name: bytes} or {name: (bytes, {part: bytes})}, grouped by category
+('Data objects', 'Caches', 'Plot layers', ...). Byte counts cover the NumPy
+and xarray buffers the objects hold, which is what dominates the footprint
+of an image session; interpreter overhead is only visible in the process
+resident set size reported alongside.
+"""
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .project import LazyDataObject
+
+DEFAULT_ALERT_BYTES = 4 * 1024**3
+
+
+def format_bytes(n: int) -> str:
+    n = float(n)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def nbytes(obj, _seen=None) -> int:
+    """
+    Bytes of array buffers reachable from `obj`: arrays, xarray objects,
+    objects with an integer `nbytes` or an `nbytes()` method, and dicts,
+    lists and tuples of those. Each buffer is counted once.
+    """
+    seen = set() if _seen is None else _seen
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        base = obj if obj.base is None else obj.base
+        if base is not obj and id(base) in seen:
+            return 0
+        seen.add(id(base))
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(nbytes(v, seen) for v in obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sum(nbytes(v, seen) for v in obj)
+    size = getattr(obj, 'nbytes', None)
+    if callable(size):
+        return int(size())
+    if isinstance(size, (int, np.integer)):
+        return int(size)
+    return 0
+
+
+def data_object_breakdown(data_object) -> Dict[str, int]:
+    """
+    Bytes per dataset of a data object: raw_DS and recip_DS of a SingleImage,
+    data of a SeriesImage, loaded groups of a lazy handle.
+    """
+    if isinstance(data_object, LazyDataObject):
+        return {f"{group} (loaded)": nbytes(ds) for group, ds in data_object._cache.items()
+                if ds is not None}
+    parts = {}
+    for attr in ('raw_DS', 'recip_DS', 'data'):
+        ds = data_object.__dict__.get(attr) if hasattr(data_object, '__dict__') else None
+        if ds is not None:
+            parts[attr] = nbytes(ds)
+    return parts
+
+
+def artist_nbytes(artist) -> int:
+    """Bytes of the data arrays a Matplotlib artist keeps (image pixels, offsets, paths, lines)."""
+    if artist is None:
+        return 0
+    seen = set()
+    total = 0
+    for getter in ('get_array', 'get_offsets', 'get_xydata'):
+        fn = getattr(artist, getter, None)
+        if fn is not None:
+            try:
+                total += nbytes(np.asarray(fn()), seen)
+            except (TypeError, ValueError):
+                pass
+    if hasattr(artist, 'get_paths'):
+        total += sum(nbytes(p.vertices, seen) for p in artist.get_paths())
+    # resampled RGBA kept by AxesImage between draws
+    total += nbytes(getattr(artist, '_imcache', None), seen)
+    return total
+
+
+def process_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, if it can be determined."""
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class MemoryItem:
+    category: str
+    name: str
+    nbytes: int
+    detail: Dict[str, int] = field(default_factory=dict)
+
+
+class MemoryAccountant:
+    """
+    Collects byte counts from registered sources and compares their total
+    with an alert budget.
+
+    budget_bytes: total above which `over_budget` is True
+    """
+    def __init__(self, budget_bytes: int = DEFAULT_ALERT_BYTES):
+        self.budget_bytes = int(budget_bytes)
+        self._sources: 'OrderedDict[str, List[Callable]]' = OrderedDict()
+
+    def register(self, category: str, source: Callable[[], Dict[str, object]]):
+        """Add a source; it returns {name: bytes} or {name: (bytes, {part: bytes})}."""
+        self._sources.setdefault(category, []).append(source)
+
+    def set_budget(self, budget_bytes: int):
+        self.budget_bytes = int(budget_bytes)
+
+    def report(self) -> List[MemoryItem]:
+        items = []
+        for category, sources in self._sources.items():
+            for source in sources:
+                for name, value in source().items():
+                    if isinstance(value, tuple):
+                        size, detail = value
+                    else:
+                        size, detail = value, {}
+                    items.append(MemoryItem(category, str(name), int(size), dict(detail)))
+        return items
+
+    @staticmethod
+    def totals(items: List[MemoryItem]) -> Dict[str, int]:
+        out = OrderedDict()
+        for item in items:
+            out[item.category] = out.get(item.category, 0) + item.nbytes
+        return out
+
+    def check(self, items: Optional[List[MemoryItem]] = None) -> Tuple[int, bool]:
+        """(tracked total, over budget) for `items` or a fresh report."""
+        items = self.report() if items is None else items
+        total = sum(item.nbytes for item in items)
+        return total, total > self.budget_bytes
@@ -0,0 +1,247 @@
+"""
+Header-only metadata index for a directory of GIWAXS TIFFs.
+
+`MetadataIndex` walks a directory tree, reads each TIFF's first IFD (image
+size, bit depth, timestamp, description) and the filename fields of a naming
+scheme, and stores both in a local SQLite database. Pixels are never read and
+nothing is integrated. Rescans only re-read files whose mtime or size
+changed, and removed files are dropped from the index.
+
+Metadata is stored one row per (file, key) with both a text and a numeric
+value, so queries such as
+
+    index.query(sample='PbI2', incident_angle=(0.1, 0.3))
+
+are answered from SQLite indexes in milliseconds on 50k-file experiments.
+"""
+import os
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+from .batch_loader import NamingScheme
+from .series_integration import numeric_value
+from .single_image import DEFAULT_MD_NAMING_SCHEME
+
+TIFF_SUFFIXES = ('.tif', '.tiff')
+
+# baseline TIFF tags read from the first IFD
+_TIFF_TAGS = {
+    256: 'width',
+    257: 'height',
+    258: 'bits_per_sample',
+    259: 'compression',
+    270: 'description',
+    305: 'software',
+    306: 'datetime',
+    339: 'sample_format',
+}
+# TIFF field type -> (struct code, size in bytes)
+_TIFF_TYPES = {1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('I', 4), 6: ('b', 1),
+               8: ('h', 2), 9: ('i', 4), 11: ('f', 4), 12: ('d', 8), 16: ('Q', 8)}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    path      TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    key       TEXT NOT NULL,
+    value     TEXT,
+    value_num REAL,
+    PRIMARY KEY (path, key)
+);
+CREATE INDEX IF NOT EXISTS metadata_text ON metadata(key, value);
+CREATE INDEX IF NOT EXISTS metadata_num ON metadata(key, value_num);
+"""
+
+
+def read_tiff_header(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read the first IFD of a (Big)TIFF file without touching pixel data.
+    Returns a dict of the baseline tags in `_TIFF_TAGS` that are present.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(16)
+        if head[:2] == b'II':
+            endian = '<'
+        elif head[:2] == b'MM':
+            endian = '>'
+        else:
+            raise ValueError(f"{path} is not a TIFF file")
+        magic = struct.unpack(endian + 'H', head[2:4])[0]
+        if magic == 42:
+            big = False
+            ifd_offset = struct.unpack(endian + 'I', head[4:8])[0]
+        elif magic == 43:
+            big = True
+            ifd_offset = struct.unpack(endian + 'Q', head[8:16])[0]
+        else:
+            raise ValueError(f"{path} is not a TIFF file")
+
+        count_fmt, entry_size, value_size = ('Q', 20, 8) if big else ('H', 12, 4)
+        f.seek(ifd_offset)
+        n_entries = struct.unpack(endian + count_fmt, f.read(struct.calcsize(count_fmt)))[0]
+        entries = f.read(n_entries * entry_size)
+
+        header = {}
+        for i in range(n_entries):
+            entry = entries[i * entry_size:(i + 1) * entry_size]
+            tag, typ = struct.unpack(endian + 'HH', entry[:4])
+            if tag not in _TIFF_TAGS or typ not in _TIFF_TYPES:
+                continue
+            count = struct.unpack(endian + ('Q' if big else 'I'),
+                                  entry[4:4 + value_size])[0]
+            code, size = _TIFF_TYPES[typ]
+            raw = entry[4 + value_size:]
+            if count * size > value_size:
+                offset = struct.unpack(endian + ('Q' if big else 'I'), raw)[0]
+                pos = f.tell()
+                f.seek(offset)
+                raw = f.read(count * size)
+                f.seek(pos)
+            if typ == 2:
+                value = raw[:count].split(b'\0', 1)[0].decode('latin-1').strip()
+            else:
+                values = struct.unpack(f'{endian}{count}{code}', raw[:count * size])
+                value = values[0] if count == 1 else list(values)
+            header[_TIFF_TAGS[tag]] = value
+    return header
+
+
+class MetadataIndex:
+    """
+    SQLite index of TIFF header and filename metadata under a directory tree.
+
+    db_path: SQLite file (created if missing); ':memory:' for a throwaway index
+    naming_scheme: filename fields, as for the CMS loader
+    """
+    def __init__(self, db_path: Union[str, Path],
+                 naming_scheme: Sequence[str] = DEFAULT_MD_NAMING_SCHEME):
+        self.db_path = str(db_path)
+        self.scheme = NamingScheme(naming_scheme)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    # --- scanning ---
+    def file_metadata(self, path: Union[str, Path]) -> Dict[str, Any]:
+        """Header tags plus filename fields for one file; filename fields win on clashes."""
+        try:
+            meta = read_tiff_header(path)
+        except (OSError, ValueError, struct.error):
+            meta = {}
+        meta.update(self.scheme.parse(path) or {})
+        return meta
+
+    def scan(self, root: Union[str, Path], suffixes: Iterable[str] = TIFF_SUFFIXES) -> Dict[str, int]:
+        """
+        Index every TIFF under `root`. Files whose mtime and size match the
+        index are skipped; files no longer on disk are removed.
+        Returns counts of added, updated, unchanged and removed files.
+        """
+        root = Path(root).resolve()
+        suffixes = tuple(s.lower() for s in suffixes)
+        # exact prefix match: '_' and '%' in directory names are not wildcards here
+        prefix = f"{root}{os.sep}"
+        known = {
+            path: (mtime, size) for path, mtime, size in self.conn.execute(
+                "SELECT path, mtime, size FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix))
+        }
+        counts = dict(added=0, updated=0, unchanged=0, removed=0)
+        seen = set()
+        with self.conn:
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    if not name.lower().endswith(suffixes):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    seen.add(path)
+                    st = os.stat(path)
+                    if known.get(path) == (st.st_mtime, st.st_size):
+                        counts['unchanged'] += 1
+                        continue
+                    counts['updated' if path in known else 'added'] += 1
+                    self._store(path, st.st_mtime, st.st_size, self.file_metadata(path))
+            removed = [p for p in known if p not in seen]
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+            counts['removed'] = len(removed)
+        return counts
+
+    def _store(self, path: str, mtime: float, size: int, meta: Dict[str, Any]):
+        self.conn.execute("INSERT OR REPLACE INTO files(path, mtime, size) VALUES (?, ?, ?)",
+                          (path, mtime, size))
+        self.conn.execute("DELETE FROM metadata WHERE path = ?", (path,))
+        rows = []
+        for key, value in meta.items():
+            if isinstance(value, list):
+                value = ','.join(str(v) for v in value)
+            rows.append((path, key, str(value), numeric_value(value)))
+        self.conn.executemany(
+            "INSERT INTO metadata(path, key, value, value_num) VALUES (?, ?, ?, ?)", rows)
+
+    # --- queries ---
+    def query(self, **criteria) -> List[str]:
+        """
+        Paths matching every criterion, sorted.
+          key=value          exact text match
+          key=(low, high)    numeric range, inclusive; None leaves a side open
+          key=[v1, v2, ...]  any of the text values
+        """
+        sql = "SELECT path FROM files"
+        clauses, params = [], []
+        for key, cond in criteria.items():
+            if isinstance(cond, tuple):
+                low, high = cond
+                sub = "SELECT path FROM metadata WHERE key = ?"
+                params.append(key)
+                if low is not None:
+                    sub += " AND value_num >= ?"
+                    params.append(float(low))
+                if high is not None:
+                    sub += " AND value_num <= ?"
+                    params.append(float(high))
+            elif isinstance(cond, (list, set)):
+                cond = [str(c) for c in cond]
+                sub = f"SELECT path FROM metadata WHERE key = ? AND value IN ({','.join('?' * len(cond))})"
+                params.extend([key] + cond)
+            else:
+                sub = "SELECT path FROM metadata WHERE key = ? AND value = ?"
+                params.extend([key, str(cond)])
+            clauses.append(f"path IN ({sub})")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [row[0] for row in self.conn.execute(sql + " ORDER BY path", params)]
+
+    def metadata(self, path: Union[str, Path]) -> Dict[str, str]:
+        """All indexed metadata of one file."""
+        return dict(self.conn.execute(
+            "SELECT key, value FROM metadata WHERE path = ?", (str(path),)))
+
+    def values(self, key: str) -> List[str]:
+        """Distinct values of one metadata key, e.g. every sample name."""
+        return [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT value FROM metadata WHERE key = ? ORDER BY value", (key,))]
+
+    def keys(self) -> List[str]:
+        return [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT key FROM metadata ORDER BY key")]
@@ -0,0 +1,160 @@
+"""
+EWALD project (.ewld) files.
+
+A project is a small JSON document that references integrated data stored in
+an HDF5 file written by `HDF5Exporter`, together with the structures, ROIs and
+calculated peaks of a session. Opening a project creates `LazyDataObject`
+handles that carry only names and metadata; arrays are read from the store
+the first time `raw_DS`, `recip_DS` or `data` is accessed.
+"""
+import json
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import xarray as xr
+
+from .export import HDF5Exporter, load_dataset, metadata_items
+
+PROJECT_VERSION = 1
+
+
+@dataclass
+class LazyDataObject:
+    """
+    Stand-in for a SingleImage/SeriesImage whose arrays live in an HDF5 store.
+    Exposes the attributes FileTreeView and the canvases use (data_name, type,
+    metadata_attributes, raw_DS, recip_DS, data) and loads arrays on demand.
+    """
+    data_name: str
+    type: str
+    store_path: Path
+    entry: str
+    metadata_attributes: Dict[str, Any] = field(default_factory=dict)
+    settings: Dict[str, Any] = field(default_factory=dict)
+    # True when the store is a DataObjectManager spill file, not a saved export
+    spilled: bool = False
+    _cache: Dict[str, xr.Dataset] = field(default_factory=dict, repr=False)
+
+    def _load(self, group: str) -> Optional[xr.Dataset]:
+        if group not in self._cache:
+            self._cache[group] = load_dataset(self.store_path, self.entry, group)
+        return self._cache[group]
+
+    @property
+    def raw_DS(self) -> Optional[xr.Dataset]:
+        return self._load('raw') if self.type == 'single' else None
+
+    @property
+    def recip_DS(self) -> xr.Dataset:
+        return self._load('recip')
+
+    @property
+    def data(self) -> xr.Dataset:
+        """Series stack (SeriesImage.data equivalent)."""
+        return self._load('recip')
+
+    @property
+    def dim_name(self) -> Optional[str]:
+        return self.settings.get('dim_name')
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._cache)
+
+    def unload(self):
+        """Drop loaded arrays; they are re-read from the store on next access."""
+        self._cache.clear()
+
+
+@dataclass
+class EwaldProject:
+    """
+    Contents of a .ewld file.
+    data_objects: one dict per data object (name, type, store, entry, metadata, settings)
+    structures: rows of the structure tree plus orientation and contact plane
+    rois: box ROIs as dicts with x, y, width, height
+    peaks: calculated peaks per structure name as lists of (q_xy, q_z, h, k, l)
+    """
+    data_objects: List[Dict[str, Any]] = field(default_factory=list)
+    structures: List[Dict[str, Any]] = field(default_factory=list)
+    rois: List[Dict[str, float]] = field(default_factory=list)
+    peaks: Dict[str, List[List[float]]] = field(default_factory=dict)
+    version: int = PROJECT_VERSION
+
+    def lazy_data_objects(self, project_dir: Union[str, Path]) -> List[LazyDataObject]:
+        """Build lazy handles; relative store paths resolve against the project folder."""
+        handles = []
+        for rec in self.data_objects:
+            store = Path(rec['store'])
+            if not store.is_absolute():
+                store = Path(project_dir) / store
+            handles.append(LazyDataObject(
+                data_name=rec['name'], type=rec.get('type', 'single'),
+                store_path=store, entry=rec.get('entry', rec['name']),
+                metadata_attributes=dict(rec.get('metadata', {})),
+                settings=dict(rec.get('settings', {}))))
+        return handles
+
+
+def _settings(data_object) -> Dict[str, Any]:
+    out = {}
+    for key in ('file_path', 'mask_file', 'poni_file', 'incident_angle', 'tilt_angle',
+                'sample_orientation', 'split_pixels', 'output_space', 'polarization',
+                'solid_angle', 'dim_name'):
+        if hasattr(data_object, key):
+            value = getattr(data_object, key)
+            out[key] = str(value) if isinstance(value, Path) else value
+    if isinstance(data_object, LazyDataObject):
+        out.update(data_object.settings)
+    return out
+
+
+def save_project(path: Union[str, Path], data_objects, structures=(), rois=(), peaks=None,
+                 store_path: Optional[Union[str, Path]] = None) -> EwaldProject:
+    """
+    Write a .ewld project. Data objects that are not already backed by a store
+    are exported to `store_path` (default: <project>_data.h5 next to the project).
+    """
+    path = Path(path)
+    store_path = Path(store_path) if store_path else path.with_name(f"{path.stem}_data.h5")
+    records, pending = [], []
+    for obj in data_objects:
+        if isinstance(obj, LazyDataObject) and not obj.spilled:
+            store, entry = obj.store_path, obj.entry
+        else:
+            store, entry = store_path, obj.data_name
+            pending.append(obj)
+        try:
+            store = Path(store).relative_to(path.parent)
+        except ValueError:
+            pass
+        records.append({
+            'name': obj.data_name,
+            'type': getattr(obj, 'type', 'single'),
+            'store': str(store),
+            'entry': entry,
+            'metadata': {k: v if isinstance(v, (str, int, float, bool)) else str(v)
+                         for k, v in metadata_items(obj).items()},
+            'settings': _settings(obj),
+        })
+    if pending:
+        with HDF5Exporter(store_path) as exporter:
+            for obj in pending:
+                exporter.write_data_object(obj)
+
+    project = EwaldProject(data_objects=records, structures=list(structures),
+                           rois=list(rois), peaks=dict(peaks or {}))
+    with open(path, 'w') as f:
+        json.dump(asdict(project), f, indent=2)
+    return project
+
+
+def load_project(path: Union[str, Path]) -> EwaldProject:
+    """Read a .ewld file. No array data is touched."""
+    with open(path) as f:
+        raw = json.load(f)
+    version = raw.get('version', PROJECT_VERSION)
+    if version > PROJECT_VERSION:
+        raise ValueError(f"Project version {version} is newer than supported ({PROJECT_VERSION})")
+    return EwaldProject(**raw)
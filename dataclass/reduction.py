@@ -0,0 +1,52 @@
+"""
+Worker side of the batch reduction (`python -m ewald.reduce`).
+
+These are the functions the coordinator submits to its executor. They live
+in an importable module rather than in ewald.reduce, because under
+`python -m ewald.reduce` that module is `__main__` and remote queue or dask
+workers could not unpickle references to it.
+"""
+import os
+import time
+from pathlib import Path
+
+from .checkpoint import SeriesCheckpoint
+from .export import HDF5Exporter
+from .series_integration import integrate_files
+from .task_queue import Heartbeat, worker_name
+
+# entry name inside each per-chunk HDF5 file
+CHUNK_ENTRY = 'chunk'
+
+
+def _reduce_chunk(files, settings, dim_name, coords, name, checkpoint=None):
+    """Integrate one chunk and report where the time went."""
+    t0 = time.perf_counter()
+    resumed = SeriesCheckpoint(checkpoint, '', dim_name).completed() if checkpoint else 0
+    stages = {}
+    ds = integrate_files(files, settings, dim_name=dim_name, coord_values=coords, name=name,
+                         checkpoint=checkpoint, stages=stages)
+    stats = {'seconds': time.perf_counter() - t0, 'worker': worker_name(), 'resumed_frames': resumed,
+             'stages': stages}
+    return ds, stats
+
+
+def run_task(chunk_path, files, settings, dim_name, coords, heartbeat_seconds):
+    """
+    Worker entry point for one task: integrate a chunk into its own HDF5
+    file. Idempotent: a chunk file that already exists is not redone, and
+    the file only appears (atomic rename) once it is complete.
+    """
+    chunk_path = Path(chunk_path)
+    if chunk_path.exists():
+        return {'cached': True, 'worker': worker_name()}
+    # frames are checkpointed as they finish, so a retry picks up mid-chunk
+    checkpoint = chunk_path.with_suffix('.ckpt')
+    with Heartbeat(chunk_path.with_suffix('.lease'), heartbeat_seconds):
+        ds, stats = _reduce_chunk(files, settings, dim_name, coords, 'data', checkpoint)
+        tmp = chunk_path.with_name(f"{chunk_path.stem}.{os.getpid()}.tmp")
+        with HDF5Exporter(tmp, mode='w') as exporter:
+            exporter.append_frames(CHUNK_ENTRY, ds['data'], dim_name, coords)
+        os.replace(tmp, chunk_path)
+    SeriesCheckpoint(checkpoint, '', dim_name).remove()
+    return stats
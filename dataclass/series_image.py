@@ -4,7 +4,7 @@ from typing import Optional, Any, Dict, List
 import xarray as xr
 
 # import helper and MetadataAttribute from your single_image module
-from dataclass.single_image import MetadataAttribute, _validate_file_extension
+from .single_image import MetadataAttribute, _validate_file_extension
 
 @dataclass
 class SeriesImage:
@@ -20,6 +20,8 @@ class SeriesImage:
       polarization: polarization correction factor (0.0–1.0).
       solid_angle_on: whether solid-angle correction is enabled.
       frame_metadata: mapping from each coordinate along `dim_name` to its list of MetadataAttribute.
+      data_name: name shown in the data object tree.
+      metadata_attributes: fields shared by every frame (e.g. parsed from filenames).
     """
     data: xr.Dataset
     dim_name: str
@@ -29,6 +31,9 @@ class SeriesImage:
     polarization: float = 0.0
     solid_angle_on: bool = False
     frame_metadata: Dict[Any, List[MetadataAttribute]] = field(default_factory=dict)
+    data_name: str = "series"
+    metadata_attributes: Dict[str, Any] = field(default_factory=dict)
+    type: str = field(init=False, default="series")
 
     def __post_init__(self):
         # Ensure series dimension exists
@@ -41,6 +46,10 @@ class SeriesImage:
         if self.poni_file:
             _validate_file_extension(self.poni_file, ['.poni'])
 
+    def frame(self, index: int = 0) -> xr.Dataset:
+        """Return one frame of the stack by position along `dim_name`."""
+        return self.data.isel({self.dim_name: index})
+
     def get_frame_metadata(self, coord: Any) -> List[MetadataAttribute]:
         """Retrieve metadata for a specific frame coordinate."""
         return self.frame_metadata.get(coord, [])
@@ -0,0 +1,253 @@
+"""
+Series integration: integrate a list of GIWAXS frames with one shared
+loader/integrator configuration and stack them along a series dimension.
+
+This mirrors PyHyperScattering's `single_images_to_dataset`, but works from
+plain, picklable `IntegrationSettings` so it can run in worker processes, and
+every frame lands on one explicit `OutputGrid` written into a preallocated
+stack instead of being interpolated onto the first frame's coordinates.
+With a checkpoint path, frames are also written out as they complete, so an
+interrupted series resumes where it stopped instead of starting over.
+"""
+import time
+import warnings
+from contextlib import nullcontext
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import xarray as xr
+
+from .single_image import make_loader, make_integrator, DEFAULT_MD_NAMING_SCHEME
+from .corrections import CorrectionSettings, CorrectionPipeline, frame_norm, numeric_value
+from .checkpoint import SeriesCheckpoint, settings_fingerprint
+from ..analysis.perf import timed, timer
+
+
+@dataclass(frozen=True)
+class OutputGrid:
+    """
+    Fixed reciprocal-space output grid shared by every frame of a series.
+    Coordinates come from np.linspace on the stored bounds, so they are
+    bit-identical across frames, processes and sessions.
+    """
+    qxy_min: float
+    qxy_max: float
+    n_qxy: int
+    qz_min: float
+    qz_max: float
+    n_qz: int
+
+    @classmethod
+    def from_coords(cls, q_xy, q_z) -> 'OutputGrid':
+        q_xy, q_z = np.asarray(q_xy, dtype=float), np.asarray(q_z, dtype=float)
+        return cls(float(q_xy[0]), float(q_xy[-1]), len(q_xy),
+                   float(q_z[0]), float(q_z[-1]), len(q_z))
+
+    @property
+    def q_xy(self) -> np.ndarray:
+        return np.linspace(self.qxy_min, self.qxy_max, self.n_qxy)
+
+    @property
+    def q_z(self) -> np.ndarray:
+        return np.linspace(self.qz_min, self.qz_max, self.n_qz)
+
+    @property
+    def shape(self):
+        return (self.n_qz, self.n_qxy)
+
+    def configure(self, integrator):
+        """
+        Point the integrator's reciprocal output at this grid. Only the range
+        and point-count attributes the integrator actually defines are set.
+        """
+        values = {'ip_range': (self.qxy_min, self.qxy_max),
+                  'oop_range': (self.qz_min, self.qz_max),
+                  'npt_ip': self.n_qxy, 'npt_oop': self.n_qz}
+        for name, value in values.items():
+            if hasattr(integrator, name):
+                setattr(integrator, name, value)
+        return integrator
+
+    def matches(self, q_xy, q_z) -> bool:
+        """True if integrated coordinates already lie on this grid."""
+        q_xy, q_z = np.asarray(q_xy), np.asarray(q_z)
+        return (q_xy.shape == (self.n_qxy,) and q_z.shape == (self.n_qz,)
+                and np.allclose(q_xy, self.q_xy, rtol=0, atol=1e-9)
+                and np.allclose(q_z, self.q_z, rtol=0, atol=1e-9))
+
+
+@dataclass
+class IntegrationSettings:
+    """
+    Integrator options shared by every frame of a series (see SingleImage fields).
+    """
+    mask_file: Optional[str] = None
+    poni_file: Optional[str] = None
+    incident_angle: float = 0.3
+    tilt_angle: float = 0.0
+    sample_orientation: int = 4
+    split_pixels: bool = True
+    output_space: str = 'recip'
+    # None: no polarization correction (0.0 is the unpolarized correction)
+    polarization: Optional[float] = 0.95
+    solid_angle: bool = True
+    md_naming_scheme: List[str] = field(default_factory=lambda: list(DEFAULT_MD_NAMING_SCHEME))
+    # None: take the grid of the first integrated frame
+    output_grid: Optional[OutputGrid] = None
+    # None: only polarization and solid angle, from the fields above
+    corrections: Optional[CorrectionSettings] = None
+
+    def to_dict(self):
+        return asdict(self)
+
+    def make_loader(self):
+        return make_loader(self.md_naming_scheme)
+
+    def make_integrator(self):
+        integrator = make_integrator(self.mask_file, self.poni_file,
+                                     incident_angle=self.incident_angle,
+                                     tilt_angle=self.tilt_angle,
+                                     sample_orientation=self.sample_orientation,
+                                     split_pixels=self.split_pixels,
+                                     output_space=self.output_space)
+        if self.output_grid is not None:
+            self.output_grid.configure(integrator)
+        return integrator
+
+    def correction_settings(self) -> CorrectionSettings:
+        if self.corrections is not None:
+            return self.corrections
+        return CorrectionSettings(polarization=self.polarization, solid_angle=self.solid_angle)
+
+    def reference_key(self, grid: 'OutputGrid'):
+        """Settings that dark/background references depend on (for their cache)."""
+        return (self.mask_file, self.poni_file, self.incident_angle, self.tilt_angle,
+                self.sample_orientation, self.split_pixels, self.output_space, grid)
+
+
+def integrate_frame(loader, integrator, filepath, stages: Optional[Dict[str, float]] = None):
+    """
+    Load and integrate one frame. The incident angle is taken from the
+    filename metadata when present, as in `single_images_to_dataset`.
+    stages: when given, the load and integrate seconds are added to it
+        (under the timer names), independently of the global perf timers
+    Returns (raw DataArray, integrated DataArray).
+    """
+    t0 = time.perf_counter()
+    with timer('integration.load'):
+        DA = loader.loadSingleImage(filepath)
+    t1 = time.perf_counter()
+    if 'incident_angle' in DA.attrs:
+        angle = numeric_value(DA.attrs['incident_angle'])
+        if angle is not None:
+            integrator.incident_angle = angle
+    with timer('integration.integrate'):
+        integ_DA = integrator.integrateSingleImage(DA)
+    if stages is not None:
+        stages['integration.load'] = stages.get('integration.load', 0.0) + t1 - t0
+        stages['integration.integrate'] = (stages.get('integration.integrate', 0.0)
+                                           + time.perf_counter() - t1)
+    return DA, integ_DA
+
+
+def _q_keys(da: xr.DataArray):
+    qxy_key = next(d for d in da.dims if d.lower().replace('_', '') in ('qxy', 'qip'))
+    qz_key = next(d for d in da.dims if d.lower().replace('_', '') in ('qz', 'qoop'))
+    return qxy_key, qz_key
+
+
+@timed('integration.files')
+def integrate_files(files: Sequence[str], settings: IntegrationSettings,
+                    dim_name: str = 'frame', coord_values: Optional[Sequence] = None,
+                    name: str = 'data', checkpoint: Optional[Union[str, Path]] = None,
+                    stages: Optional[Dict[str, float]] = None) -> xr.Dataset:
+    """
+    Integrate `files` in order and stack the results along `dim_name`.
+    coord_values: series coordinate per file (defaults to 0..N-1).
+    checkpoint: directory; each frame is written there as soon as it is
+        integrated, and a rerun with the same files and settings resumes
+        after the last completed file (see dataclass.checkpoint)
+    stages: dict that receives the summed load/integrate seconds of this
+        call (see `integrate_frame`)
+    Returns a Dataset with one DataArray `name` of dims (dim_name, q_z, q_xy)
+    on `settings.output_grid` (or the first frame's grid when unset).
+    """
+    files = [str(f) for f in files]
+    if not files:
+        raise ValueError("No files to integrate")
+    coord_values = list(range(len(files))) if coord_values is None else list(coord_values)
+    loader = settings.make_loader()
+    integrator = settings.make_integrator()
+    store = (SeriesCheckpoint(checkpoint, settings_fingerprint(settings, dim_name), dim_name)
+             if checkpoint is not None else None)
+
+    with store or nullcontext():
+        resumed = store.resume(files) if store is not None else None
+        if resumed is not None:
+            first_raw = first = None
+            qxy_key, qz_key, attrs = resumed.qxy_key, resumed.qz_key, resumed.attrs
+            grid = settings.output_grid or OutputGrid.from_coords(resumed.q_xy, resumed.q_z)
+            dtype = resumed.frames.dtype
+        else:
+            first_raw, first = integrate_frame(loader, integrator, files[0], stages)
+            qxy_key, qz_key = _q_keys(first)
+            grid = settings.output_grid or OutputGrid.from_coords(first[qxy_key].values, first[qz_key].values)
+            attrs, dtype = dict(first.attrs), first.dtype
+        if settings.output_grid is None:
+            # later frames are integrated straight onto the first frame's grid
+            # instead of being interpolated onto it in on_grid
+            grid.configure(integrator)
+        target = {qz_key: grid.q_z, qxy_key: grid.q_xy}
+
+        corrections = settings.correction_settings()
+        stack = np.empty((len(files),) + grid.shape, dtype=float if corrections.enabled else dtype)
+        norms = np.ones(len(files))
+        start = 0
+        if resumed is not None:
+            start = len(resumed)
+            stack[:start], norms[:start] = resumed.frames, resumed.norms
+        warned = []
+
+        def on_grid(integ_DA):
+            integ_DA = integ_DA.transpose(qz_key, qxy_key)
+            if grid.matches(integ_DA[qxy_key].values, integ_DA[qz_key].values):
+                return integ_DA.values
+            # integrator ignored the grid settings: fall back to regridding
+            if not warned:
+                warnings.warn("Integrator output is not on the fixed output grid; interpolating frames")
+                warned.append(True)
+            return integ_DA.interp(target).values
+
+        for i in range(start, len(files)):
+            raw_DA, integ_DA = ((first_raw, first) if i == 0
+                                else integrate_frame(loader, integrator, files[i], stages))
+            stack[i] = on_grid(integ_DA)
+            norms[i] = frame_norm(raw_DA.attrs, corrections)
+            if store is not None:
+                store.append(i, files[i], coord_values[i],
+                             xr.DataArray(stack[i], dims=(qz_key, qxy_key), coords=target),
+                             norms[i], attrs)
+
+    if corrections.enabled:
+        ref_integrator = []
+
+        def integrate_reference(path):
+            # at the settings' incident angle, which is what reference_key
+            # records, not at the angle the last frame's filename left behind
+            if not ref_integrator:
+                ref_integrator.append(grid.configure(settings.make_integrator()))
+            raw_DA = loader.loadSingleImage(path)
+            return xr.DataArray(on_grid(ref_integrator[0].integrateSingleImage(raw_DA))), raw_DA.attrs
+
+        pipeline = CorrectionPipeline(corrections, integrate_reference, settings.poni_file,
+                                      cache_key=settings.reference_key(grid))
+        stack = pipeline.apply(stack, grid.q_xy, grid.q_z, norms)
+
+    out = xr.DataArray(stack, dims=(dim_name, qz_key, qxy_key),
+                       coords={dim_name: coord_values, qz_key: grid.q_z, qxy_key: grid.q_xy},
+                       attrs=attrs, name=name)
+    if corrections.enabled:
+        out.attrs['corrections'] = repr(corrections.to_dict())
+    return out.to_dataset()
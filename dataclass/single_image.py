@@ -5,6 +5,9 @@ import importlib.util
 import warnings
 
 import PyHyperScattering as phs
+
+from .corrections import CorrectionSettings, CorrectionPipeline, frame_norm
+from ..analysis.perf import timer
 # from pyhyper import PFFIGeneralIntegrator
 
 # (optional) mute PyHyperScattering-wide UserWarnings
@@ -28,6 +31,41 @@ PFFIGeneralIntegrator = local_pffig.PFFIGeneralIntegrator
 # # Test it
 # print(PFFIGeneralIntegrator)
 
+# Default CMS GIWAXS filename fields, used when no naming scheme is given
+DEFAULT_MD_NAMING_SCHEME = ['sample', 'material', 'filter',
+                 'concentration', 'flowrate', 'substrate',
+                 'solution_volume', 'runNumber', 'global_time',
+                 'xpos', 'incident_angle', 'exposure_time',
+                 'scan_id', 'scan_number', 'detector']
+
+def make_loader(md_naming_scheme: Optional[List[str]] = None):
+    """
+    Build the PyHyperScattering CMS GIWAXS loader for a filename naming scheme.
+    """
+    return phs.load.CMSGIWAXSLoader(md_naming_scheme=list(md_naming_scheme or DEFAULT_MD_NAMING_SCHEME))
+
+def make_integrator(mask_file, poni_file, incident_angle=0.3, tilt_angle=0.0,
+                    sample_orientation=4, split_pixels=True, output_space='recip'):
+    """
+    Build the PFFIGeneralIntegrator used for SingleImage and series integration.
+    """
+    # Determine mask method based on extension
+    maskmethod = Path(mask_file).suffix.lower().lstrip('.') if mask_file else 'edf'
+    return PFFIGeneralIntegrator(
+        geomethod='ponifile',
+        ponifile=Path(poni_file),
+        maskmethod=maskmethod,
+        maskpath=Path(mask_file),
+        sample_orientation=int(sample_orientation),
+        tilt_angle=tilt_angle,
+        split_pixels=split_pixels,
+        incident_angle=incident_angle,
+        output_space=output_space,
+        # polarization and solid angle are applied afterwards by CorrectionPipeline;
+        # pyFAI's own solid-angle correction (on by default) would divide twice
+        correctSolidAngle=False
+    )
+
 def _validate_file_extension(path: Union[str, Path], allowed: List[str]) -> Path:
     """
     Ensure the file has one of the allowed extensions.
@@ -69,9 +107,12 @@ class SingleImage:
     - sample_orientation: sample orientation (1-8) for detector rotation
     - split_pixels: whether to split (rebin) pixels (True/False)
     - output_space: output space for integration ('recip', 'polar', or 'both')
-    - polarization: polarization correction factor (0.0–1.0)
+    - polarization: polarization correction factor (0.0–1.0), None for no correction
     - solid_angle: whether solid-angle correction is enabled
     - metadata_attributes: user-defined metadata fields
+    - md_naming_scheme: filename fields for the loader (defaults to the CMS scheme)
+    - corrections: dark/background/normalization settings; when None only
+      polarization and solid angle (the fields above) are applied
     """
     data_name: str
     file_path: Path
@@ -82,9 +123,11 @@ class SingleImage:
     sample_orientation: int = 4  # 1-8, default to 4
     split_pixels: bool = True
     output_space: str = 'recip'  # 'recip', 'polar', or 'both'
-    polarization: float = 0.95  ## For synchrotron data, set to 0.95 typically.
+    polarization: Optional[float] = 0.95  ## For synchrotron data, set to 0.95 typically.
     solid_angle: bool = True
     metadata_attributes: List[MetadataAttribute] = field(default_factory=list)
+    md_naming_scheme: Optional[List[str]] = None
+    corrections: Optional[CorrectionSettings] = None
     type: str = field(init=False, default="single")
 
     def __post_init__(self):
@@ -95,21 +138,9 @@ class SingleImage:
         if self.poni_file:
             self.poni_file = _validate_file_extension(self.poni_file, ['.poni'])
 
-        # Initialize PyHyperScattering loader
-        metadata_list = [m.name for m in self.metadata_attributes]
-        # Ensure required metadata fields are included
-        for required in ['data_name','incident_angle', 'tilt_angle', 'sample_orientation']:
-            if required not in metadata_list:
-                metadata_list.append(required)
-
-        # *** temporary override for testing
-        metadata_list = ['sample', 'material', 'filter', 
-                 'concentration', 'flowrate', 'substrate', 
-                 'solution_volume', 'runNumber', 'global_time', 
-                 'xpos', 'incident_angle', 'exposure_time', 
-                 'scan_id', 'scan_number', 'detector']
-        
-        self.loader = phs.load.CMSGIWAXSLoader(md_naming_scheme=metadata_list)
+        # Initialize PyHyperScattering loader. The loader parses filenames, so
+        # the naming scheme (not the user metadata) decides the fields.
+        self.loader = make_loader(self.md_naming_scheme)
 
         # Determine mask method based on extension
         maskmethod = self.mask_file.suffix.lower().lstrip('.') if self.mask_file else 'edf'
@@ -126,26 +157,15 @@ class SingleImage:
         print (f"Solid angle: {self.solid_angle}")
         print (f"Metadata attributes: {self.metadata_attributes}")
 
-        maskfile = Path(self.mask_file)
-        ponifile = Path(self.poni_file)
-        # maskfile = Path(self.mask_file) if self.mask_file is not None else None
-        # ponifile = Path(self.poni_file) if self.poni_file is not None else None
-
         ## Adding a popup dialog for integration and dataset generation time.
         # Initialize PyHyperScattering Wrapper for PyFAI FiberIntegrator object
-        self.integrator = PFFIGeneralIntegrator(
-            geomethod='ponifile',
-            ponifile=ponifile,
-            maskmethod=maskmethod,
-            maskpath=maskfile,
-            sample_orientation=int(self.sample_orientation),
+        self.integrator = make_integrator(
+            self.mask_file, self.poni_file,
+            incident_angle=self.incident_angle,
             tilt_angle=self.tilt_angle,
+            sample_orientation=self.sample_orientation,
             split_pixels=self.split_pixels,
-            incident_angle=self.incident_angle,
             output_space=self.output_space
-            # Note: polarization and solid_angle_on are not used in the current implementation
-            # polarization=self.polarization,
-            # solid_angle_on=self.solid_angle_on
         )
 
         self.fileset = [self.file_path]
@@ -154,13 +174,54 @@ class SingleImage:
                                             self.loader, 
                                             self.integrator)
         
-        raw_DS, recip_DS = self.util.single_images_to_dataset()
+        with timer('integration.single_image'):
+            raw_DS, recip_DS = self.util.single_images_to_dataset()
+        with timer('integration.corrections'):
+            recip_DS = self.apply_corrections(raw_DS, recip_DS)
 
         self.recip_DS = recip_DS
         self.raw_DS = raw_DS
 
         print(recip_DS)
 
+    def apply_corrections(self, raw_DS, recip_DS):
+        """
+        Apply dark/background subtraction, normalization, polarization and
+        solid angle to the reciprocal-space result (the integrator itself
+        does not receive polarization or solid angle).
+        """
+        settings = self.corrections or CorrectionSettings(
+            polarization=self.polarization, solid_angle=self.solid_angle)
+        if not settings.enabled:
+            return recip_DS
+        name = list(recip_DS.data_vars)[0]
+        da = recip_DS[name]
+        dims = {d.lower().replace('_', ''): d for d in da.dims}
+        qxy_key, qz_key = dims.get('qxy'), dims.get('qz')
+        if qxy_key is None or qz_key is None:
+            warnings.warn("Corrections need a (q_z, q_xy) result; skipped for this output space")
+            return recip_DS
+
+        def integrate_reference(path):
+            DA = self.loader.loadSingleImage(path)
+            ref = self.integrator.integrateSingleImage(DA).transpose(qz_key, qxy_key)
+            ref = ref.interp({qz_key: da[qz_key].values, qxy_key: da[qxy_key].values})
+            return ref, DA.attrs
+
+        # references are interpolated onto this image's grid, and the integrator
+        # may have taken its incident angle from the filename metadata
+        from .series_integration import OutputGrid
+        grid = OutputGrid.from_coords(da[qxy_key].values, da[qz_key].values)
+        angle = getattr(self.integrator, 'incident_angle', self.incident_angle)
+        raw_attrs = raw_DS[list(raw_DS.data_vars)[0]].attrs
+        pipeline = CorrectionPipeline(
+            settings, integrate_reference, self.poni_file,
+            cache_key=(str(self.mask_file), str(self.poni_file), angle, self.tilt_angle,
+                       self.sample_orientation, self.split_pixels, self.output_space, grid))
+        recip_DS[name] = pipeline.apply_dataarray(da, qxy_key, qz_key,
+                                                  norms=[frame_norm(raw_attrs, settings)])
+        return recip_DS
+
     def add_metadata(self, name: str, value: Union[str, float, int], is_value: bool):
         """
         Add a new metadata attribute to this image.
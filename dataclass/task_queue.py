@@ -0,0 +1,466 @@
+"""
+Resumable task records and pluggable executors for batch reduction.
+
+`TaskStore` keeps one SQLite row per chunk of files. Task ids are content
+hashes of the chunk and its integration settings, so adding the same plan
+twice is a no-op and a restarted run only resubmits chunks that are not done.
+Only the coordinator writes the table; workers report liveness by touching a
+lease file (`Heartbeat`) next to the chunk they are writing, which also works
+on the shared filesystems SQLite locking does not. A chunk whose lease goes
+stale (crashed node) is resubmitted, up to `max_attempts` times; a task
+without a lease file has not been picked up by a worker yet and is left
+waiting in the executor's queue.
+
+Executors only need `submit(fn, *args)` returning a future with `done()` and
+`result()`:
+  - any concurrent.futures executor (process or thread pool)
+  - a dask.distributed Client (optional dependency)
+  - `QueueExecutor`, a multiprocessing manager queue that workers on this or
+    other hosts join with `run_queue_worker(address, authkey)`, e.g.
+    `python -m ewald.dataclass.task_queue HOST:PORT --authkey KEY`
+
+The manager unpickles whatever an authenticated client sends, so the authkey
+is what keeps other machines from running code on the coordinator and the
+workers. There is no built-in key: a queue on a loopback address gets a
+random one, and any other address needs an explicit key (--authkey or
+$EWALD_AUTHKEY).
+"""
+import argparse
+import hashlib
+import ipaddress
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+EXECUTOR_KINDS = ('process', 'thread', 'dask', 'queue')
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_AUTHKEY = os.environ['EWALD_AUTHKEY'].encode() if os.environ.get('EWALD_AUTHKEY') else None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id     TEXT PRIMARY KEY,
+    series      TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    start       INTEGER NOT NULL,
+    stop        INTEGER NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    result      TEXT,
+    error       TEXT,
+    updated     REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status);
+"""
+
+
+def task_id(series: str, files: Sequence[str], coords: Sequence, fingerprint: str = '') -> str:
+    """Content hash of one chunk: same files, coordinates and settings -> same id."""
+    payload = json.dumps([series, [str(f) for f in files], [str(c) for c in coords], fingerprint])
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class TaskRecord:
+    task_id: str
+    series: str
+    position: int
+    start: int
+    stop: int
+    status: str = PENDING
+    attempts: int = 0
+    lease_until: Optional[float] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class TaskStore:
+    """
+    SQLite table of chunk tasks, written by the coordinator.
+
+    db_path: SQLite file (created if missing)
+    lease_seconds: how long a started task may go without a heartbeat
+    max_attempts: submissions allowed before a task is marked failed
+    """
+    _COLUMNS = "task_id, series, position, start, stop, status, attempts, lease_until, result, error"
+
+    def __init__(self, db_path: Union[str, Path], lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = 3):
+        self.db_path = str(db_path)
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = int(max_attempts)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    @staticmethod
+    def _record(row) -> TaskRecord:
+        *head, result, error = row
+        return TaskRecord(*head, result=json.loads(result) if result else {}, error=error)
+
+    def add(self, records: Sequence[TaskRecord]) -> int:
+        """Insert tasks that are not known yet. Returns how many were new."""
+        before = len(self)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (task_id, series, position, start, stop, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(r.task_id, r.series, r.position, r.start, r.stop, time.time()) for r in records])
+        return len(self) - before
+
+    def get(self, tid: str) -> Optional[TaskRecord]:
+        row = self.conn.execute(f"SELECT {self._COLUMNS} FROM tasks WHERE task_id = ?", (tid,)).fetchone()
+        return self._record(row) if row else None
+
+    def tasks(self, status: Optional[str] = None, ids: Optional[Sequence[str]] = None) -> List[TaskRecord]:
+        """Tasks in plan order (series, position), optionally filtered by status and id."""
+        records = [self._record(r) for r in self.conn.execute(
+            f"SELECT {self._COLUMNS} FROM tasks ORDER BY series, position")]
+        wanted = None if ids is None else set(ids)
+        return [r for r in records
+                if (status is None or r.status == status) and (wanted is None or r.task_id in wanted)]
+
+    def counts(self, ids: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        out = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for record in self.tasks(ids=ids):
+            out[record.status] += 1
+        return out
+
+    def start(self, tid: str) -> bool:
+        """
+        Mark a task submitted and set its first lease check. Returns False
+        (and marks the task failed) when its attempts are used up.
+        """
+        now = time.time()
+        with self.conn:
+            attempts = self.conn.execute(
+                "SELECT attempts FROM tasks WHERE task_id = ?", (tid,)).fetchone()[0]
+            if attempts >= self.max_attempts:
+                self.conn.execute("UPDATE tasks SET status = ?, updated = ? WHERE task_id = ?",
+                                  (FAILED, now, tid))
+                return False
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, attempts = attempts + 1, lease_until = ?, updated = ? "
+                "WHERE task_id = ?", (RUNNING, now + self.lease_seconds, now, tid))
+        return True
+
+    def renew(self, tid: str, last_seen: float):
+        """Extend a lease from the time a worker was last seen alive."""
+        with self.conn:
+            self.conn.execute("UPDATE tasks SET lease_until = ? WHERE task_id = ? AND status = ?",
+                              (last_seen + self.lease_seconds, tid, RUNNING))
+
+    def complete(self, tid: str, result: Optional[Dict[str, Any]] = None):
+        with self.conn:
+            self.conn.execute("UPDATE tasks SET status = ?, result = ?, error = NULL, lease_until = NULL, "
+                              "updated = ? WHERE task_id = ?",
+                              (DONE, json.dumps(result or {}, default=str), time.time(), tid))
+
+    def fail(self, tid: str, error: str):
+        """Record an error; the task goes back to pending until its attempts are used up."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, "
+                "lease_until = NULL, updated = ? WHERE task_id = ?",
+                (self.max_attempts, FAILED, PENDING, error, time.time(), tid))
+
+    def release_running(self):
+        """
+        Return running tasks to pending; used when a new coordinator takes
+        over. The interrupted attempt is not counted against the task.
+        """
+        with self.conn:
+            self.conn.execute("UPDATE tasks SET status = ?, lease_until = NULL, "
+                              "attempts = MAX(attempts - 1, 0) WHERE status = ?",
+                              (PENDING, RUNNING))
+
+    def reopen(self, tids: Sequence[str]):
+        """Send tasks back to pending with fresh attempts (e.g. their output went missing)."""
+        with self.conn:
+            self.conn.executemany("UPDATE tasks SET status = ?, attempts = 0, result = NULL "
+                                  "WHERE task_id = ?", [(PENDING, tid) for tid in tids])
+
+    def retry_failed(self):
+        """Give failed tasks a fresh set of attempts."""
+        with self.conn:
+            self.conn.execute("UPDATE tasks SET status = ?, attempts = 0 WHERE status = ?",
+                              (PENDING, FAILED))
+
+
+class Heartbeat:
+    """
+    Touch `path` every `interval` seconds while the work inside the `with`
+    block runs; the coordinator reads its mtime to tell live tasks from lost ones.
+    """
+    def __init__(self, path: Union[str, Path], interval: float):
+        self.path = Path(path)
+        self.interval = max(float(interval), 0.1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _touch(self):
+        self.path.write_text(worker_name())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._touch()
+
+    def __enter__(self):
+        self._touch()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.path.unlink(missing_ok=True)
+
+
+def last_seen(path: Union[str, Path]) -> Optional[float]:
+    """mtime of a heartbeat file, or None when no worker has touched it."""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+# --- multiprocessing manager queue ---
+
+class _QueueClient(BaseManager):
+    pass
+
+
+_QueueClient.register('get_jobs')
+_QueueClient.register('get_results')
+
+
+def parse_address(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def is_loopback(host: str) -> bool:
+    """True if `host` resolves to a loopback address ('' binds every interface)."""
+    if not host:
+        return False
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def run_queue_worker(address, authkey: bytes, max_jobs: Optional[int] = None):
+    """
+    Serve jobs from a QueueExecutor at `address` until it shuts down (or
+    `max_jobs` were run). Start one per core on each node.
+    """
+    if isinstance(address, str):
+        address = parse_address(address)
+    manager = _QueueClient(address=tuple(address), authkey=authkey)
+    manager.connect()
+    jobs, results = manager.get_jobs(), manager.get_results()
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        try:
+            # poll, so a worker notices the server going away between jobs
+            job = jobs.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        except (EOFError, ConnectionError, OSError):
+            break
+        if job is None:
+            try:
+                jobs.put(None)  # pass the shutdown on to the next worker
+            except (EOFError, ConnectionError, OSError):
+                pass
+            break
+        # the call is unpickled here, not by the queue proxy, so a job that
+        # cannot be loaded on this host (e.g. a function of the coordinator's
+        # __main__) is reported as failed instead of killing the worker
+        job_id, call = job
+        try:
+            fn, args, kwargs = pickle.loads(call)
+            payload = (True, fn(*args, **kwargs))
+        except BaseException as err:
+            payload = (False, err)
+        try:
+            results.put((job_id, *payload))
+        except (EOFError, ConnectionError, OSError):
+            break
+        except Exception as err:  # result or exception could not be pickled
+            results.put((job_id, False, RuntimeError(f"{type(err).__name__}: {err}")))
+        done += 1
+
+
+class QueueExecutor(Executor):
+    """
+    concurrent.futures Executor whose jobs go through a manager-served queue.
+
+    address: (host, port) to listen on; port 0 picks a free port
+    authkey: shared secret workers connect with; required unless the host is
+        a loopback address, where None generates a random key
+    local_workers: worker processes to start on this host
+    """
+    def __init__(self, address=('localhost', 0), authkey: Optional[bytes] = DEFAULT_AUTHKEY,
+                 local_workers: int = 0):
+        if not authkey:
+            if not is_loopback(address[0]):
+                raise ValueError(f"Refusing to serve the task queue on {address[0] or 'all interfaces'} "
+                                 f"without a secret: pass --authkey or set $EWALD_AUTHKEY")
+            authkey = secrets.token_hex(16).encode()
+        self._jobs, self._results = queue.Queue(), queue.Queue()
+        manager_cls = type('_QueueServer', (BaseManager,), {})
+        manager_cls.register('get_jobs', callable=lambda: self._jobs)
+        manager_cls.register('get_results', callable=lambda: self._results)
+        self._server = manager_cls(address=tuple(address), authkey=authkey).get_server()
+        self.address = self._server.address
+        self.authkey = authkey
+        self._futures: Dict[int, Future] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        self._workers = [
+            multiprocessing.Process(target=run_queue_worker, args=(self.address, authkey), daemon=True)
+            for _ in range(local_workers)]
+        for p in self._workers:
+            p.start()
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            job_id, ok, payload = item
+            with self._lock:
+                fut = self._futures.pop(job_id, None)
+            if fut is None or not fut.set_running_or_notify_cancel():
+                continue
+            if ok:
+                fut.set_result(payload)
+            else:
+                fut.set_exception(payload)
+
+    def submit(self, fn, /, *args, **kwargs):
+        fut = Future()
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._futures[job_id] = fut
+        try:
+            call = pickle.dumps((fn, args, kwargs))
+        except Exception as err:
+            with self._lock:
+                self._futures.pop(job_id, None)
+            fut.set_exception(err)
+            return fut
+        self._jobs.put((job_id, call))
+        return fut
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        if cancel_futures:
+            with self._lock:
+                for fut in self._futures.values():
+                    fut.cancel()
+        self._jobs.put(None)
+        if wait:
+            for p in self._workers:
+                p.join()
+        self._results.put(None)
+        self._server.stop_event.set()
+
+
+def make_executor(kind: str = 'process', workers: Optional[int] = None,
+                  address: Optional[str] = None, authkey: Optional[bytes] = DEFAULT_AUTHKEY):
+    """
+    Build an executor by name (EXECUTOR_KINDS).
+    dask: `address` is the scheduler (None starts a local cluster).
+    queue: `address` is host:port to listen on; `workers` local workers are started.
+    """
+    if kind == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers=workers)
+    if kind == 'dask':
+        try:
+            from dask.distributed import Client
+        except ImportError as err:
+            raise ImportError("The dask executor requires dask.distributed "
+                              "(conda install dask distributed)") from err
+        return Client(address) if address else Client(n_workers=workers)
+    if kind == 'queue':
+        return QueueExecutor(parse_address(address) if address else ('localhost', 0),
+                             authkey=authkey,
+                             local_workers=os.cpu_count() if workers is None else workers)
+    raise ValueError(f"Unknown executor {kind!r}; expected one of {EXECUTOR_KINDS}")
+
+
+def submit(executor, fn, *args):
+    """Submit to a concurrent.futures executor or dask client (never reusing dask results)."""
+    if type(executor).__module__.startswith('distributed'):
+        return executor.submit(fn, *args, pure=False)
+    return executor.submit(fn, *args)
+
+
+def shutdown_executor(executor):
+    """Shut down a concurrent.futures executor, or disconnect a dask client (the cluster keeps running)."""
+    if type(executor).__module__.startswith('distributed'):
+        executor.close()
+    else:
+        executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ewald.dataclass.task_queue",
+        description="Join a QueueExecutor as a worker and run its jobs until it shuts down.")
+    parser.add_argument('address', help="HOST:PORT of the coordinator queue")
+    parser.add_argument('--authkey', default=os.environ.get('EWALD_AUTHKEY'),
+                        help="shared secret of the coordinator (default: $EWALD_AUTHKEY)")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="worker processes on this host")
+    args = parser.parse_args(argv)
+    if not args.authkey:
+        parser.error("--authkey or $EWALD_AUTHKEY is required")
+    procs = [multiprocessing.Process(target=run_queue_worker,
+                                     args=(parse_address(args.address), args.authkey.encode()))
+             for _ in range(max(1, args.workers))]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
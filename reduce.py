@@ -0,0 +1,448 @@
+"""
+Headless batch reduction: integrate GIWAXS TIFFs into an HDF5 store.
+
+    python -m ewald.reduce "raw/*.tiff" --poni calib.poni --mask mask.edf \\
+        --series-key global_time --group-by sample --workers 16 -o reduced.h5
+
+Files are split into chunks that are integrated in parallel onto one shared
+OutputGrid, then appended in order to one chunked, compressed HDF5 entry per
+series (the HDF5Exporter layout, so results open as lazy data objects in the
+GUI). Without --series-key all files form one series along 'file'. A JSON
+run report with per-chunk timing is written next to the output.
+
+Chunks run on a pluggable executor (--executor process|thread|dask|queue)
+and are tracked as resumable task records in <output>.work/: rerunning the
+same command after a crash only integrates the chunks that did not finish,
+and chunks of a lost worker are retried. Within a chunk, frames are
+checkpointed as they complete, so a retry resumes mid-chunk. Across nodes, the work directory
+must be on a shared filesystem:
+
+    export EWALD_AUTHKEY=$(openssl rand -hex 16)    # shared secret, same on every node
+    python -m ewald.reduce ... --executor queue --queue-address 0.0.0.0:50000 -j 0
+    python -m ewald.dataclass.task_queue coordinator:50000 -j 32    # on each node
+
+A queue on a non-loopback address is refused without a secret.
+
+Only the dataclass/analysis layers are imported: no Qt, no interactive
+Matplotlib backend and no ipywidgets, so this runs on compute nodes.
+"""
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import argparse
+import dataclasses
+import glob
+import json
+import platform
+import shutil
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence
+
+from .dataclass.batch_loader import NamingScheme, FileGroup, group_files
+from .dataclass.corrections import CorrectionSettings, NORMALIZATION_MODES
+from .dataclass.export import HDF5Exporter, _attr_value, load_dataset
+from .dataclass.reduction import CHUNK_ENTRY, run_task
+from .dataclass.series_integration import IntegrationSettings, OutputGrid, integrate_frame, _q_keys
+from .dataclass.single_image import DEFAULT_MD_NAMING_SCHEME
+from .dataclass.task_queue import (
+    DEFAULT_AUTHKEY, DEFAULT_LEASE_SECONDS, DONE, EXECUTOR_KINDS, PENDING, RUNNING,
+    QueueExecutor, TaskRecord, TaskStore, last_seen, make_executor,
+    shutdown_executor, submit, task_id
+)
+
+DEFAULT_CHUNK_SIZE = 64
+
+
+def expand_inputs(patterns: Sequence[str]) -> List[str]:
+    """Expand globs (recursive '**' allowed) into a sorted list of unique files."""
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches and Path(pattern).is_file():
+            matches = [pattern]
+        files.update(str(Path(m)) for m in matches if Path(m).is_file())
+    return sorted(files)
+
+
+def plan_series(files: Sequence[str], settings: IntegrationSettings,
+                series_key: Optional[str] = None, group_by: Sequence[str] = (),
+                name: str = 'reduction') -> List[FileGroup]:
+    """
+    Group files into series. With a series key, files are parsed with the
+    naming scheme and grouped as in load_batch; otherwise all files form one
+    series `name` along 'file', ordered by path.
+    """
+    scheme = NamingScheme(settings.md_naming_scheme)
+    if series_key:
+        return group_files(scheme.parse_many(files), group_by, series_key)
+    metadata = [scheme.parse(f) or {} for f in files]
+    return [FileGroup(name=name, dim_name='file', files=list(files),
+                      coords=[Path(f).stem for f in files], metadata=metadata, common={})]
+
+
+def resolve_grid(settings: IntegrationSettings, first_file: str) -> IntegrationSettings:
+    """
+    Fix the output grid before fanning out, so chunks integrated in
+    different processes land on identical coordinates.
+    """
+    if settings.output_grid is not None:
+        return settings
+    _, integ_DA = integrate_frame(settings.make_loader(), settings.make_integrator(), first_file)
+    qxy_key, qz_key = _q_keys(integ_DA)
+    grid = OutputGrid.from_coords(integ_DA[qxy_key].values, integ_DA[qz_key].values)
+    return dataclasses.replace(settings, output_grid=grid)
+
+
+def split_chunks(groups: Sequence[FileGroup], chunk_size: int):
+    """(group index, start, stop) file ranges of at most chunk_size files."""
+    chunk_size = max(1, int(chunk_size))
+    return [(g, start, min(start + chunk_size, len(group.files)))
+            for g, group in enumerate(groups)
+            for start in range(0, len(group.files), chunk_size)]
+
+
+def plan_tasks(groups: Sequence[FileGroup], settings: IntegrationSettings,
+               chunk_size: int) -> List[TaskRecord]:
+    """One TaskRecord per chunk; ids hash the chunk files and the settings."""
+    fingerprint = json.dumps(settings.to_dict(), sort_keys=True, default=str)
+    tasks, position = [], {}
+    for g, start, stop in split_chunks(groups, chunk_size):
+        group = groups[g]
+        tid = task_id(group.name, group.files[start:stop], group.coords[start:stop], fingerprint)
+        tasks.append(TaskRecord(tid, group.name, position.setdefault(g, 0), start, stop))
+        position[g] += 1
+    return tasks
+
+
+def run_tasks(store: TaskStore, tasks: Sequence[TaskRecord], groups: Sequence[FileGroup],
+              settings: IntegrationSettings, chunk_dir: Path, executor,
+              poll_seconds: float = 0.5, start_seconds: Optional[float] = None, echo=print):
+    """
+    Submit every task that is not done and wait until each one is done or
+    failed. Errors and stale heartbeats send a task back to pending for
+    another attempt; completed chunk files are never recomputed. A task
+    whose worker has not touched its lease file yet is still queued in the
+    executor, so its lease only runs out once a heartbeat has been seen.
+    start_seconds bounds that wait: a task without a first heartbeat is
+    failed once no task has shown progress (a heartbeat or a result) for
+    that long since its submission (default: twice the lease).
+    """
+    by_series = {g.name: g for g in groups}
+    ids = [t.task_id for t in tasks]
+    heartbeat = max(store.lease_seconds / 4.0, 0.5)
+    start_seconds = 2.0 * store.lease_seconds if start_seconds is None else start_seconds
+    inflight, submitted = {}, {}
+    progress = time.time()
+    total = len(ids)
+
+    def label(record):
+        return f"{record.series}[{record.start}:{record.stop}]"
+
+    while True:
+        for record in store.tasks(PENDING, ids):
+            if record.task_id in inflight or not store.start(record.task_id):
+                continue
+            group = by_series[record.series]
+            # a lease left by a lost earlier attempt would expire the queued retry
+            (chunk_dir / f"{record.task_id}.lease").unlink(missing_ok=True)
+            submitted[record.task_id] = time.time()
+            inflight[record.task_id] = submit(
+                executor, run_task, chunk_dir / f"{record.task_id}.h5",
+                group.files[record.start:record.stop], settings, group.dim_name,
+                group.coords[record.start:record.stop], heartbeat)
+        if not inflight:
+            break
+        time.sleep(poll_seconds)
+        now = time.time()
+        seen_any = [last_seen(chunk_dir / f"{tid}.lease") for tid in inflight]
+        progress = max([progress] + [t for t in seen_any if t is not None])
+        for record in store.tasks(RUNNING, ids):
+            fut = inflight.get(record.task_id)
+            if fut is None:
+                continue
+            if fut.done():
+                del inflight[record.task_id]
+                progress = now
+                try:
+                    stats = fut.result()
+                except Exception as err:
+                    store.fail(record.task_id, f"{type(err).__name__}: {err}")
+                    echo(f"  {label(record)} attempt {record.attempts} failed: {err}")
+                    continue
+                store.complete(record.task_id, stats)
+                counts = store.counts(ids)
+                echo(f"  [{counts[DONE]}/{total}] {label(record)}"
+                     + (" (already done)" if stats.get('cached') else ""))
+            elif record.lease_until is not None and record.lease_until < now:
+                seen = last_seen(chunk_dir / f"{record.task_id}.lease")
+                if seen is None:
+                    if now - max(submitted[record.task_id], progress) < start_seconds:
+                        # no heartbeat yet: queued behind other chunks, not lost
+                        store.renew(record.task_id, now)
+                        continue
+                    # nothing ran for a long time: the job never reached a worker
+                    del inflight[record.task_id]
+                    store.fail(record.task_id, "never started")
+                    echo(f"  {label(record)} attempt {record.attempts} was never picked up")
+                    continue
+                if seen + store.lease_seconds >= now:
+                    store.renew(record.task_id, seen)
+                    continue
+                # lost worker: resubmit; a late finish of the old attempt is harmless
+                del inflight[record.task_id]
+                store.fail(record.task_id, "heartbeat lost")
+                echo(f"  {label(record)} attempt {record.attempts} lost its worker")
+    return store.counts(ids)
+
+
+def _series_entry(group: FileGroup, settings: IntegrationSettings):
+    """Attribute carrier for HDF5Exporter._entry (SeriesImage fields + settings)."""
+    return SimpleNamespace(type='series', data_name=group.name, dim_name=group.dim_name,
+                           mask_file=settings.mask_file, poni_file=settings.poni_file,
+                           incident_angle=settings.incident_angle,
+                           tilt_angle=settings.tilt_angle,
+                           sample_orientation=settings.sample_orientation,
+                           split_pixels=settings.split_pixels,
+                           output_space=settings.output_space,
+                           polarization=settings.polarization,
+                           solid_angle=settings.solid_angle,
+                           metadata_attributes=dict(group.common))
+
+
+def _write_frame_metadata(exporter, group: FileGroup):
+    frames = exporter.file[group.name].require_group('frame_metadata')
+    for coord, meta, path in zip(group.coords, group.metadata, group.files):
+        grp = frames.require_group(str(coord))
+        grp.attrs['file_path'] = path
+        for key, value in meta.items():
+            grp.attrs[key] = _attr_value(value)
+
+
+def _assemble(output: Path, groups: Sequence[FileGroup], settings: IntegrationSettings,
+              store: TaskStore, tasks: Sequence[TaskRecord], chunk_dir: Path):
+    """Write the finished chunks, in order, into one entry per series of `output`."""
+    done = {t.task_id for t in store.tasks(DONE, [t.task_id for t in tasks])}
+    by_series = {g.name: g for g in groups}
+    with HDF5Exporter(output, mode='w') as exporter:
+        for group in groups:
+            exporter._entry(_series_entry(group, settings), group.name)
+            _write_frame_metadata(exporter, group)
+        for record in tasks:
+            if record.task_id not in done:
+                continue
+            group = by_series[record.series]
+            chunk = load_dataset(chunk_dir / f"{record.task_id}.h5", CHUNK_ENTRY)
+            exporter.append_frames(group.name, chunk['data'], group.dim_name,
+                                   group.coords[record.start:record.stop])
+            exporter.flush()
+
+
+def reduce(files: Sequence[str], settings: IntegrationSettings, output,
+           series_key: Optional[str] = None, group_by: Sequence[str] = (),
+           name: str = 'reduction', workers: Optional[int] = None,
+           chunk_size: int = DEFAULT_CHUNK_SIZE, report_path=None,
+           executor='process', address: Optional[str] = None, authkey: Optional[bytes] = DEFAULT_AUTHKEY,
+           workdir=None, max_attempts: int = 3, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+           start_seconds: Optional[float] = None, keep_workdir: bool = False, echo=print) -> Dict:
+    """
+    Integrate `files` into `output` (HDF5) and write a JSON run report.
+    Returns the report dict.
+
+    executor: EXECUTOR_KINDS name or an executor instance ('dask'/'queue'
+        use `address`, see dataclass.task_queue)
+    workdir: task database and per-chunk files (default <output>.work); a
+        rerun with the same inputs and settings only does the missing chunks.
+        Removed after a fully successful run unless keep_workdir.
+    start_seconds: how long a submitted chunk may wait for its first
+        heartbeat while nothing else progresses (see run_tasks)
+    """
+    t_start = time.perf_counter()
+    output = Path(output)
+    report_path = Path(report_path) if report_path else output.with_suffix('.report.json')
+    workdir = Path(workdir) if workdir else output.with_suffix('.work')
+    chunk_dir = workdir / 'chunks'
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    files = [str(f) for f in files]
+    if not files:
+        raise ValueError("No input files")
+    groups = plan_series(files, settings, series_key, group_by, name)
+    if not groups:
+        raise ValueError("No input file matches the naming scheme")
+    settings = resolve_grid(settings, groups[0].files[0])
+    tasks = plan_tasks(groups, settings, chunk_size)
+    n_files = sum(len(g.files) for g in groups)
+    n_bytes = sum(os.path.getsize(f) for g in groups for f in g.files)
+
+    report = {
+        'command': sys.argv, 'output': str(output), 'host': platform.node(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': settings.to_dict(), 'workers': workers,
+        'executor': executor if isinstance(executor, str) else type(executor).__name__,
+        'workdir': str(workdir), 'chunk_size': chunk_size, 'files': n_files, 'bytes': n_bytes,
+        'series': {g.name: len(g.files) for g in groups}, 'chunks': [], 'failed': [],
+    }
+    with TaskStore(workdir / 'tasks.sqlite', lease_seconds, max_attempts) as store:
+        store.add(tasks)
+        # a previous coordinator died: its submissions are gone with it
+        store.release_running()
+        store.retry_failed()
+        store.reopen([t.task_id for t in store.tasks(DONE, [t.task_id for t in tasks])
+                      if not (chunk_dir / f"{t.task_id}.h5").exists()])
+        resumed = store.counts([t.task_id for t in tasks])[DONE]
+        echo(f"{n_files} files, {len(groups)} series, {len(tasks)} chunks"
+             + (f" ({resumed} already done)" if resumed else "") + f" -> {output}")
+
+        pool = make_executor(executor, workers, address, authkey) if isinstance(executor, str) else executor
+        if isinstance(pool, QueueExecutor):
+            echo(f"  queue workers: python -m ewald.dataclass.task_queue "
+                 f"{pool.address[0]}:{pool.address[1]} --authkey ...")
+        try:
+            counts = run_tasks(store, tasks, groups, settings, chunk_dir, pool,
+                               start_seconds=start_seconds, echo=echo)
+        finally:
+            if isinstance(executor, str):
+                shutdown_executor(pool)
+        _assemble(output, groups, settings, store, tasks, chunk_dir)
+
+        for record in store.tasks(ids=[t.task_id for t in tasks]):
+            entry = {'series': record.series, 'start': record.start, 'stop': record.stop,
+                     'task_id': record.task_id, 'attempts': record.attempts}
+            if record.status == DONE:
+                report['chunks'].append({**entry, **record.result})
+            else:
+                report['failed'].append({**entry, 'error': record.error})
+                echo(f"  {record.series}[{record.start}:{record.stop}] failed: {record.error}")
+
+    if not report['failed'] and not keep_workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    wall = time.perf_counter() - t_start
+    done_files = sum(c['stop'] - c['start'] for c in report['chunks'])
+    report.update(wall_seconds=wall, files_per_s=done_files / wall if wall else None,
+                  mb_per_s=n_bytes / 1024**2 / wall if wall else None,
+                  finished=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    report_path.write_text(json.dumps(report, indent=2, default=str))
+    echo(f"{done_files}/{n_files} files in {wall:.1f} s ({report['files_per_s']:.2f} files/s); "
+         f"report: {report_path}" + (f"; rerun to retry, work kept in {workdir}" if report['failed'] else ""))
+    return report
+
+
+def settings_from_args(args) -> IntegrationSettings:
+    corrections = None
+    if args.dark or args.background or args.normalize:
+        corrections = CorrectionSettings(
+            dark_file=args.dark, background_file=args.background,
+            background_scale=args.background_scale, normalize=args.normalize,
+            monitor_key=args.monitor_key,
+            polarization=None if args.no_polarization else args.polarization,
+            solid_angle=not args.no_solid_angle)
+    grid = None
+    if args.grid:
+        qxy_min, qxy_max, n_qxy, qz_min, qz_max, n_qz = (float(v) for v in args.grid.split(','))
+        grid = OutputGrid(qxy_min, qxy_max, int(n_qxy), qz_min, qz_max, int(n_qz))
+    scheme = ([f.strip() for f in args.naming_scheme.split(',') if f.strip()]
+              if args.naming_scheme else list(DEFAULT_MD_NAMING_SCHEME))
+    return IntegrationSettings(
+        mask_file=args.mask, poni_file=args.poni,
+        incident_angle=args.incident_angle, tilt_angle=args.tilt_angle,
+        sample_orientation=args.sample_orientation, split_pixels=not args.no_split_pixels,
+        output_space=args.output_space,
+        polarization=None if args.no_polarization else args.polarization,
+        solid_angle=not args.no_solid_angle,
+        md_naming_scheme=scheme, output_grid=grid, corrections=corrections)
+
+
+class _HelpFormatter(argparse.ArgumentDefaultsHelpFormatter):
+    """Show defaults, except None: those options say in their help what happens."""
+
+    def _get_help_string(self, action):
+        if action.default is None:
+            return action.help
+        return super()._get_help_string(action)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m ewald.reduce", description=__doc__.split('\n\n')[0],
+        formatter_class=_HelpFormatter)
+    parser.add_argument('inputs', nargs='+', help="TIFF files or glob patterns (quote them)")
+    parser.add_argument('-o', '--output', required=True, help="output HDF5 file")
+    parser.add_argument('--report', help="run report JSON (default: <output>.report.json)")
+
+    geo = parser.add_argument_group("integrator (SingleImage fields)")
+    geo.add_argument('--poni', required=True, help=".poni geometry file")
+    geo.add_argument('--mask', required=True, help=".edf or .json mask file")
+    geo.add_argument('--incident-angle', type=float, default=0.3,
+                     help="degrees; overridden per file by filename metadata")
+    geo.add_argument('--tilt-angle', type=float, default=0.0)
+    geo.add_argument('--sample-orientation', type=int, default=4, choices=range(1, 9))
+    geo.add_argument('--no-split-pixels', action='store_true')
+    geo.add_argument('--output-space', default='recip', choices=['recip', 'polar', 'both'])
+    geo.add_argument('--polarization', type=float, default=0.95)
+    geo.add_argument('--no-polarization', action='store_true')
+    geo.add_argument('--no-solid-angle', action='store_true')
+    geo.add_argument('--grid', help="fixed output grid: qxy_min,qxy_max,n_qxy,qz_min,qz_max,n_qz "
+                                    "(default: grid of the first frame)")
+
+    corr = parser.add_argument_group("corrections")
+    corr.add_argument('--dark', help="dark frame TIFF")
+    corr.add_argument('--background', help="background TIFF")
+    corr.add_argument('--background-scale', type=float, default=1.0)
+    corr.add_argument('--normalize', choices=[m for m in NORMALIZATION_MODES if m])
+    corr.add_argument('--monitor-key', default='monitor')
+
+    series = parser.add_argument_group("series")
+    series.add_argument('--naming-scheme', help="comma-separated filename fields "
+                                                "(default: CMS GIWAXS scheme)")
+    series.add_argument('--series-key', help="filename field used as series coordinate")
+    series.add_argument('--group-by', default='', help="comma-separated fields identifying a series")
+    series.add_argument('--name', default='reduction', help="series name without --series-key")
+
+    run = parser.add_argument_group("execution")
+    run.add_argument('-j', '--workers', type=int, default=None,
+                     help="local worker processes (default: CPU count)")
+    run.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="files per task")
+    run.add_argument('--executor', default='process', choices=EXECUTOR_KINDS)
+    run.add_argument('--scheduler', help="dask scheduler address (default: local cluster)")
+    run.add_argument('--queue-address', default='localhost:0',
+                     help="HOST:PORT the queue executor listens on")
+    # no argparse default: the help output would print the secret
+    run.add_argument('--authkey', default=None,
+                     help="queue executor secret (default: $EWALD_AUTHKEY; required unless "
+                          "the queue address is loopback)")
+    run.add_argument('--workdir', help="task records and chunk files (default: <output>.work)")
+    run.add_argument('--max-attempts', type=int, default=3, help="tries per chunk")
+    run.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                     help="seconds without a worker heartbeat before a chunk is retried")
+    run.add_argument('--start-timeout', type=float, default=None,
+                     help="seconds a chunk may wait for its first heartbeat while no other "
+                          "chunk progresses (default: twice --lease)")
+    run.add_argument('--keep-workdir', action='store_true',
+                     help="keep chunk files after a successful run")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    authkey = args.authkey or os.environ.get('EWALD_AUTHKEY')
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No input files match", file=sys.stderr)
+        return 2
+    group_by = [f.strip() for f in args.group_by.split(',') if f.strip()]
+    report = reduce(files, settings_from_args(args), args.output,
+                    series_key=args.series_key, group_by=group_by, name=args.name,
+                    workers=args.workers, chunk_size=args.chunk_size, report_path=args.report,
+                    executor=args.executor,
+                    address=args.scheduler if args.executor == 'dask' else args.queue_address,
+                    authkey=authkey.encode() if authkey else None, workdir=args.workdir,
+                    max_attempts=args.max_attempts, lease_seconds=args.lease,
+                    start_seconds=args.start_timeout,
+                    keep_workdir=args.keep_workdir)
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
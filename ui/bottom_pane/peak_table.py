@@ -52,10 +52,13 @@ class ExperimentalPeakModel(QAbstractTableModel):
 
 
 class CalculatedPeakModel(QAbstractTableModel):
+    PEAK_HEADERS = ["#","q_xy","q_z","h","k","l"]
+    RING_HEADERS = ["#","|q|","Mult.","h","k","l"]
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._headers = ["#","q_xy","q_z","h","k","l"]
-        self._data = []  # list of tuples: (qxy, qz, h, k, l)
+        self._headers = list(self.PEAK_HEADERS)
+        self._data = []  # list of tuples: (qxy, qz, h, k, l) or (q, mult, h, k, l)
 
     def rowCount(self, parent=QModelIndex()):
         return len(self._data)
@@ -84,9 +87,19 @@ class CalculatedPeakModel(QAbstractTableModel):
         peaks: iterable of (qxy, qz, h, k, l)
         """
         self.beginResetModel()
+        self._headers = list(self.PEAK_HEADERS)
         self._data = list(peaks)
         self.endResetModel()
 
+    def add_rings(self, rings):
+        """
+        rings: iterable of (q, multiplicity, h, k, l)
+        """
+        self.beginResetModel()
+        self._headers = list(self.RING_HEADERS)
+        self._data = list(rings)
+        self.endResetModel()
+
     def clear(self):
         self.beginResetModel()
         self._data.clear()
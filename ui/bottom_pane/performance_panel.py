@@ -0,0 +1,141 @@
+# File: ewald/ui/bottom_pane/performance_panel.py
+"""
+PerformancePanel: live view of the hot-path timers collected by analysis.perf.
+
+One row per timer (calls, last, p50/p90/p99, max, total) and a log-scale
+histogram of the rolling window of the selected timer. The table refreshes
+once a second while the panel is visible and recording is on.
+"""
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QSplitter
+)
+from PyQt6.QtCore import Qt, QTimer
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import numpy as np
+
+from ...analysis import perf
+
+COLUMNS = ["Timer", "Calls", "Last (ms)", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Max (ms)", "Total (s)"]
+
+
+class PerformancePanel(QWidget):
+    def __init__(self, parent=None, interval_ms=1000):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self.record_check = QCheckBox("Record timings")
+        self.record_check.setChecked(perf.enabled())
+        self.record_check.toggled.connect(self._on_record_toggled)
+        self.reset_button = QPushButton("Reset")
+        self.reset_button.clicked.connect(self.reset)
+        self.trace_button = QPushButton("Trace File...")
+        self.trace_button.clicked.connect(self._choose_trace_file)
+        self.trace_label = QLabel()
+        controls.addWidget(self.record_check)
+        controls.addWidget(self.reset_button)
+        controls.addWidget(self.trace_button)
+        controls.addWidget(self.trace_label, 1)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.itemSelectionChanged.connect(self._update_histogram)
+
+        self.fig = Figure(figsize=(3, 2), tight_layout=True)
+        self.canvas = FigureCanvas(self.fig)
+        self.ax = self.fig.add_subplot(111)
+
+        split = QSplitter(Qt.Orientation.Horizontal)
+        split.addWidget(self.table)
+        split.addWidget(self.canvas)
+        split.setStretchFactor(0, 3)
+        split.setStretchFactor(1, 1)
+        layout.addWidget(split)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._on_tick)
+        self._timer.start()
+        self._update_trace_label()
+
+    def _on_record_toggled(self, checked):
+        if checked:
+            perf.enable()
+        else:
+            perf.disable()
+        self._update_trace_label()
+
+    def _choose_trace_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Timing Trace", "ewald_trace.jsonl",
+                                              "JSON Lines (*.jsonl)")
+        if not path:
+            return
+        perf.enable(path)
+        self.record_check.setChecked(True)
+        self._update_trace_label()
+
+    def _update_trace_label(self):
+        path = perf.trace_path()
+        self.trace_label.setText(f"Tracing to {path}" if path else "")
+
+    def reset(self):
+        perf.reset()
+        self.table.setRowCount(0)
+        self.ax.cla()
+        self.canvas.draw_idle()
+
+    def _on_tick(self):
+        if self.isVisible() and perf.enabled():
+            self.refresh()
+
+    def _selected_name(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.table.item(rows[0].row(), 0).text()
+
+    def refresh(self):
+        """Rebuild the table from the current snapshot, keeping the selection."""
+        stats = perf.snapshot()
+        selected = self._selected_name()
+        # slowest paths first
+        names = sorted(stats, key=lambda n: stats[n]['p90'], reverse=True)
+        self.table.blockSignals(True)
+        self.table.setRowCount(len(names))
+        for row, name in enumerate(names):
+            s = stats[name]
+            values = [name, str(s['count'])] + [
+                f"{s[k] * 1e3:.2f}" for k in ('last', 'p50', 'p90', 'p99', 'max')
+            ] + [f"{s['total']:.2f}"]
+            for col, text in enumerate(values):
+                item = self.table.item(row, col)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if col > 0:
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                    self.table.setItem(row, col, item)
+                item.setText(text)
+            if name == selected:
+                self.table.selectRow(row)
+        self.table.blockSignals(False)
+        self._update_histogram()
+
+    def _update_histogram(self):
+        name = self._selected_name()
+        self.ax.cla()
+        if name is not None:
+            counts, edges = perf.histogram(name)
+            self.ax.bar(edges[:-1] * 1e3, counts, width=np.diff(edges) * 1e3,
+                        align='edge', color='steelblue')
+            self.ax.set_xscale('log')
+            self.ax.set_xlabel('ms')
+            self.ax.set_title(name, fontsize=8)
+        self.canvas.draw_idle()
@@ -5,22 +5,161 @@ The main frame has default q_xy vs q_z axes; subplots:
  - q_z vs Intensity
  - q_r vs Intensity
  - q_xy vs q_z (small)
+
+The center pane has two interchangeable rendering backends with the same
+public methods (see ImageCanvasBase): this Matplotlib canvas and the
+pyqtgraph canvas in pg_image_view. `create_image_canvas` picks one, by
+default from $EWALD_RENDER_BACKEND. Publication export always renders
+through Matplotlib, whichever backend is on screen.
 """
+import os
+
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar, FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
+from matplotlib.collections import LineCollection
+import numpy as np
 import xarray as xr
 
 from ...dataclass.single_image import SingleImage
+from ...analysis.perf import timed, timer
+from ...dataclass.memory import artist_nbytes
+from .roi_selector import ROISelector
+
+RENDER_BACKENDS = ('matplotlib', 'pyqtgraph')
+Q_XY_LABEL = r'$q_{xy}\,\mathrm{(\AA^{-1})}$'
+Q_Z_LABEL = r'$q_{z}\,\mathrm{(\AA^{-1})}$'
+
+def resolve_q_axes(recip_ds):
+    """
+    Pick the image DataArray from a reciprocal-space Dataset and find its
+    q_xy and q_z coordinate names. Returns (da, qxy_key, qz_key); a Dataset
+    holding only coordinates is returned as is.
+    """
+    # choose DataArray
+    da = recip_ds if not isinstance(recip_ds, xr.Dataset) or not recip_ds.data_vars \
+        else recip_ds[list(recip_ds.data_vars)[0]]
+    # alias lookup
+    aliases = {
+        'qxy': {'qxy','q_xy','qip','QXY','Qip'},
+        'qz':  {'qz','q_z','qoop','QZ','Qoop'}
+    }
+    coords_map = {name.lower(): name for name in da.coords}
+    # find qxy and qz keys robustly
+    for key, alias_set in aliases.items():
+        match = next((a for a in alias_set if a.lower() in coords_map), None)
+        if not match:
+            raise KeyError(f"No {key} axis found among coords {list(coords_map)}")
+        # resolve to actual coord name
+        aliases[key] = coords_map[match.lower()]
+    return da, aliases['qxy'], aliases['qz']
+
+
+def default_render_backend():
+    """Backend named by $EWALD_RENDER_BACKEND, else 'matplotlib'."""
+    return os.environ.get('EWALD_RENDER_BACKEND', 'matplotlib').strip().lower()
+
+
+def create_image_canvas(backend=None, parent=None):
+    """
+    Build the center-pane canvas for `backend` ('matplotlib' or 'pyqtgraph';
+    default: default_render_backend()).
+    """
+    backend = (backend or default_render_backend()).lower()
+    if backend == 'matplotlib':
+        return ImageCanvas(parent)
+    if backend == 'pyqtgraph':
+        try:
+            from .pg_image_view import PGImageCanvas
+        except ImportError as err:
+            raise ImportError("The pyqtgraph render backend requires pyqtgraph "
+                              "(conda install pyqtgraph)") from err
+        return PGImageCanvas(parent)
+    raise ValueError(f"Unknown render backend {backend!r}; expected one of {RENDER_BACKENDS}")
+
+
+class ImageCanvasBase:
+    """
+    Backend-independent part of the center-pane canvases.
+
+    Both backends keep the layer state in the same form, with Matplotlib
+    style keywords as the canonical style:
+      _overlays        name -> {'qxy', 'qz', 'style', ...}
+      _ring_overlays   name -> {'segments', 'style', ...}
+      _sim_layer       {'data', 'extent', 'style', ...} or None
+    and implement displayImage, updateImageData, update1D, viewLimits and
+    _main_image_state, so display and export are written once here.
+    """
+    backend = None
+
+    @timed('render.display_reciprocal')
+    def displayReciprocal(self, recip_ds: xr.Dataset, cmap='viridis'):
+        """
+        Display a reciprocal‐space xarray Dataset on the main 2D axes,
+        plus its q_xy and q_z 1D projections on the subplots.
+        """
+        da, qxy_key, qz_key = resolve_q_axes(recip_ds)
+        data = da.values
+        q_xy = da.coords[qxy_key].values
+        q_z  = da.coords[qz_key].values
+        extent = [float(q_xy.min()), float(q_xy.max()), float(q_z.min()), float(q_z.max())]
+        # display
+        self.displayImage(data, extent=extent, cmap=cmap)
+        with timer('render.projections'):
+            I_qxy = da.sum(dim=qz_key).values
+            I_qz  = da.sum(dim=qxy_key).values
+            self.update1D('qxy', q_xy, I_qxy)
+            self.update1D('qz',  q_z,  I_qz)
+
+    def displaySingleImage(self, img: SingleImage, **kwargs):
+        self.displayReciprocal(img.recip_DS, **kwargs)
+
+    @timed('render.export')
+    def exportFigure(self, path, dpi=300, figsize=(6.0, 4.5)):
+        """
+        Render the main image with its simulated layer, peak and ring
+        overlays and current view limits into a Matplotlib figure and save it
+        to `path` (format from the extension).
+        """
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        ax.set_xlabel(Q_XY_LABEL)
+        ax.set_ylabel(Q_Z_LABEL)
+        state = self._main_image_state()
+        if state is not None:
+            data, extent, cmap, (vmin, vmax) = state
+            image = ax.imshow(data, origin='lower', extent=extent, aspect='auto',
+                              cmap=cmap, vmin=vmin, vmax=vmax)
+            fig.colorbar(image, ax=ax, label='Intensity')
+        layer = self._sim_layer
+        if layer is not None:
+            ax.imshow(layer['data'], origin='lower', extent=layer['extent'], aspect='auto',
+                      vmin=0, vmax=float(np.nanmax(layer['data'])) or 1.0, zorder=1.5,
+                      **layer['style'])
+        for name, overlay in self._overlays.items():
+            ax.scatter(overlay['qxy'], overlay['qz'], label=name, **overlay['style'])
+        for name, overlay in self._ring_overlays.items():
+            ax.add_collection(LineCollection(overlay['segments'], label=name, **overlay['style']))
+        xlim, ylim = self.viewLimits()
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+
+
+class ImageCanvas(QWidget, ImageCanvasBase):
+    backend = 'matplotlib'
 
-class ImageCanvas(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
 
         # --- Figure, Canvas, and Toolbar ---
         self.fig = Figure(facecolor='darkgray')
         self.canvas = FigureCanvas(self.fig)
+        # full figure redraws (including deferred draw_idle ones) show up as render.draw
+        self.canvas.draw = timed('render.draw')(self.canvas.draw)
         self.toolbar = NavigationToolbar(self.canvas, self)
 
         # --- Axis selector ---
@@ -45,6 +184,18 @@ class ImageCanvas(QWidget):
         self.ax_qr      = self.fig.add_subplot(gs[1, 2])
         self.ax_small2d = self.fig.add_subplot(gs[1, 3])
 
+        # --- Named peak overlays (one scatter artist per structure) ---
+        self._overlays = {}  # name -> {'qxy', 'qz', 'style', 'artist'}
+        # --- Named powder-ring overlays (one LineCollection per structure) ---
+        self._ring_overlays = {}  # name -> {'segments', 'style', 'artist'}
+        # --- Translucent simulated-pattern layer ---
+        self._sim_layer = None  # {'data', 'extent', 'style', 'artist'}
+        # --- Main image artist, updated in place for series playback ---
+        self._image = None
+        self._image_data = None  # full-resolution pixels behind the (possibly binned) image
+        self._blit_background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
         # --- Initial setup ---
         self._setup_main()
         self._setup_subplots()
@@ -52,8 +203,8 @@ class ImageCanvas(QWidget):
     def _setup_main(self):
         ax = self.ax_main
         ax.set_facecolor('darkgray')
-        ax.set_xlabel(r'$q_{xy}\,\mathrm{(\AA^{-1})}$')
-        ax.set_ylabel(r'$q_{z}\,\mathrm{(\AA^{-1})}$')
+        ax.set_xlabel(Q_XY_LABEL)
+        ax.set_ylabel(Q_Z_LABEL)
         ax.set_xlim(0, 3)
         ax.set_ylim(0, 3)
 
@@ -81,27 +232,249 @@ class ImageCanvas(QWidget):
         """Clear all axes to initial state."""
         self.ax_main.cla()
         self._setup_main()
+        self._restore_overlays()
         for ax in (self.ax_qxy, self.ax_qz, self.ax_qr, self.ax_small2d):
             ax.cla()
         self._setup_subplots()
         self.canvas.draw()
 
+    @timed('render.display_image')
     def displayImage(self, data, extent=None, cmap='viridis'):
         """Display data on the main axis and reset limits."""
         self.ax_main.cla()
         self._setup_main()
         if extent is None:
             extent = [0, data.shape[1] * (3.0/data.shape[1]), 0, data.shape[0] * (3.0/data.shape[0])]
-        self.ax_main.imshow(data, origin='lower', extent=extent, aspect='auto', cmap=cmap)
+        self._image = self.ax_main.imshow(data, origin='lower', extent=extent, aspect='auto', cmap=cmap)
+        self._image_data = data
+        self._blit_background = None
         self.ax_main.set_xlim(extent[0], extent[1])
         self.ax_main.set_ylim(extent[2], extent[3])
+        self._restore_overlays()
+        self.canvas.draw()
+
+    def _on_draw(self, event):
+        # background for blitting: everything except the animated main image
+        if self._image is not None and self._image.get_animated():
+            self._blit_background = self.canvas.copy_from_bbox(self.ax_main.bbox)
+            self._draw_animated()
+
+    def beginFrameUpdates(self):
+        """
+        Switch the main image to blitted updates: the image is excluded from
+        full redraws and updateImageData repaints only the main axes.
+        """
+        if self._image is None or self._image.get_animated():
+            return
+        self._image.set_animated(True)
         self.canvas.draw()
 
+    def endFrameUpdates(self):
+        """Return the main image to normal drawing."""
+        if self._image is None:
+            return
+        self._image.set_animated(False)
+        self._image.set_data(self._image_data)
+        self._blit_background = None
+        self.canvas.draw_idle()
+
+    @timed('render.update_image')
+    def updateImageData(self, data):
+        """
+        Replace the pixels of the main image in place (same extent, colour
+        limits and overlays). Falls back to displayImage for a new shape.
+        During frame updates, frames larger than the screen are binned to
+        about one pixel per screen pixel first, so Matplotlib's resampling
+        and colour mapping do not run at full resolution on every frame.
+        """
+        if self._image is None or np.shape(self._image_data) != np.shape(data):
+            self.displayImage(data)
+            return
+        self._image_data = data
+        animated = self._image.get_animated()
+        self._image.set_data(self._bin_to_screen(data) if animated else data)
+        if animated and self._blit_background is not None:
+            self._blit_image()
+        else:
+            self.canvas.draw_idle()
+
+    def _bin_to_screen(self, data):
+        """Block-average `data` so no more than ~1 pixel of the visible part lands on a screen pixel."""
+        ax, (x0, x1, y0, y1) = self.ax_main, self._image.get_extent()
+        bbox = ax.get_window_extent()
+        # visible fraction of the image along each axis (zooming in lowers the factor)
+        fx = abs(np.diff(ax.get_xlim())[0] / (x1 - x0)) if x1 != x0 else 1.0
+        fy = abs(np.diff(ax.get_ylim())[0] / (y1 - y0)) if y1 != y0 else 1.0
+        by = max(1, int(data.shape[0] * min(fy, 1.0) // max(bbox.height, 1)))
+        bx = max(1, int(data.shape[1] * min(fx, 1.0) // max(bbox.width, 1)))
+        if bx == 1 and by == 1:
+            return data
+        # pad with edge values so the binned image keeps the full extent
+        h, w = -(-data.shape[0] // by) * by, -(-data.shape[1] // bx) * bx
+        padded = np.pad(data, ((0, h - data.shape[0]), (0, w - data.shape[1])), mode='edge')
+        return padded.reshape(h // by, by, w // bx, bx).mean(axis=(1, 3))
+
+    def _draw_animated(self):
+        ax = self.ax_main
+        ax.draw_artist(self._image)
+        # simulated layer and overlays sit above the image, so repaint them on top
+        above = [a for a in ax.images if a is not self._image] + list(ax.collections)
+        for artist in sorted(above, key=lambda a: a.get_zorder()):
+            ax.draw_artist(artist)
+
+    @timed('render.blit')
+    def _blit_image(self):
+        if self._blit_background is None:
+            return
+        self.canvas.restore_region(self._blit_background)
+        self._draw_animated()
+        self.canvas.blit(self.ax_main.bbox)
+
     def overlayPeaks(self, qxy, qz, **kwargs):
         """Overlay Bragg peaks on the main axis."""
         self.ax_main.scatter(qxy, qz, **kwargs)
         self.canvas.draw()
 
+    def setPeakOverlay(self, name, qxy, qz, redraw=True, **style):
+        """
+        Create or update the named peak overlay on the main axis.
+        Existing overlays are updated in place with `set_offsets`, so other
+        overlays are left untouched.
+        """
+        qxy = np.asarray(qxy, dtype=float)
+        qz = np.asarray(qz, dtype=float)
+        overlay = self._overlays.get(name)
+        if overlay is None or (style and style != overlay['style']):
+            if overlay is not None:
+                overlay['artist'].remove()
+            overlay = {'style': style, 'artist': None}
+            self._overlays[name] = overlay
+        overlay['qxy'], overlay['qz'] = qxy, qz
+        if overlay['artist'] is None:
+            overlay['artist'] = self.ax_main.scatter(qxy, qz, label=name, **overlay['style'])
+        else:
+            overlay['artist'].set_offsets(np.column_stack((qxy, qz)))
+        if redraw:
+            self.canvas.draw_idle()
+
+    def removePeakOverlay(self, name, redraw=True):
+        """Remove the named peak overlay, if present."""
+        overlay = self._overlays.pop(name, None)
+        if overlay is None:
+            return
+        overlay['artist'].remove()
+        if redraw:
+            self.canvas.draw_idle()
+
+    def peakOverlayNames(self):
+        return list(self._overlays)
+
+    def setRingOverlay(self, name, q, chi_range=(0.0, 90.0), npts=91, redraw=True, **style):
+        """
+        Draw Debye-Scherrer rings of radius `q` analytically on the q_xy/q_z plane.
+        chi is measured from q_z; a chi_range narrower than (0, 90) draws fiber arcs.
+        All rings of one structure share a single LineCollection.
+        """
+        chi = np.deg2rad(np.linspace(chi_range[0], chi_range[1], npts))
+        q = np.asarray(q, dtype=float)[:, None]
+        segments = np.stack((q * np.sin(chi), q * np.cos(chi)), axis=-1)
+        overlay = self._ring_overlays.get(name)
+        if overlay is None or (style and style != overlay['style']):
+            if overlay is not None:
+                overlay['artist'].remove()
+            overlay = {'style': style, 'artist': None}
+            self._ring_overlays[name] = overlay
+        overlay['segments'] = segments
+        if overlay['artist'] is None:
+            overlay['artist'] = self.ax_main.add_collection(
+                LineCollection(segments, label=name, **overlay['style']))
+        else:
+            overlay['artist'].set_segments(segments)
+        if redraw:
+            self.canvas.draw_idle()
+
+    def removeRingOverlay(self, name, redraw=True):
+        """Remove the named ring overlay, if present."""
+        overlay = self._ring_overlays.pop(name, None)
+        if overlay is None:
+            return
+        overlay['artist'].remove()
+        if redraw:
+            self.canvas.draw_idle()
+
+    def ringOverlayNames(self):
+        return list(self._ring_overlays)
+
+    def setSimulatedLayer(self, data, extent, alpha=0.5, cmap='magma', redraw=True):
+        """
+        Show a simulated intensity map as a translucent layer above the image.
+        Repeated calls reuse the same AxesImage via `set_data`.
+        """
+        layer = self._sim_layer
+        if layer is None or layer['extent'] != list(extent):
+            if layer is not None:
+                layer['artist'].remove()
+            layer = {'extent': list(extent), 'style': dict(alpha=alpha, cmap=cmap), 'artist': None}
+            self._sim_layer = layer
+        layer['data'] = data
+        if layer['artist'] is None:
+            layer['artist'] = self._add_sim_artist(layer)
+        else:
+            layer['artist'].set_data(data)
+            layer['artist'].set_clim(0, float(np.nanmax(data)) or 1.0)
+        if redraw:
+            self.canvas.draw_idle()
+
+    def removeSimulatedLayer(self, redraw=True):
+        if self._sim_layer is None:
+            return
+        self._sim_layer['artist'].remove()
+        self._sim_layer = None
+        if redraw:
+            self.canvas.draw_idle()
+
+    def _add_sim_artist(self, layer):
+        xlim, ylim = self.ax_main.get_xlim(), self.ax_main.get_ylim()
+        artist = self.ax_main.imshow(
+            layer['data'], origin='lower', extent=layer['extent'], aspect='auto',
+            vmin=0, vmax=float(np.nanmax(layer['data'])) or 1.0, zorder=1.5, **layer['style'])
+        # imshow resets the view; keep the user's limits
+        self.ax_main.set_xlim(xlim)
+        self.ax_main.set_ylim(ylim)
+        return artist
+
+    def memoryLayers(self):
+        """Bytes per artist layer of the figure, plus the render buffers."""
+        layers = {}
+        if self._image is not None:
+            layers['Main image'] = artist_nbytes(self._image)
+        if self._sim_layer is not None:
+            layers['Simulated pattern'] = artist_nbytes(self._sim_layer['artist'])
+        for name, overlay in self._overlays.items():
+            layers[f'Peaks: {name}'] = artist_nbytes(overlay['artist'])
+        for name, overlay in self._ring_overlays.items():
+            layers[f'Rings: {name}'] = artist_nbytes(overlay['artist'])
+        layers['Projections'] = sum(
+            artist_nbytes(a) for ax in (self.ax_qxy, self.ax_qz, self.ax_qr, self.ax_small2d)
+            for a in ax.lines + ax.images + ax.collections)
+        renderer = getattr(self.canvas, 'renderer', None)
+        buffers = memoryview(renderer.buffer_rgba()).nbytes if renderer is not None else 0
+        if self._blit_background is not None:
+            buffers += memoryview(self._blit_background).nbytes
+        layers['Render buffers'] = buffers
+        return layers
+
+    def _restore_overlays(self):
+        """Re-attach overlay artists after the main axis was cleared."""
+        if self._sim_layer is not None:
+            self._sim_layer['artist'] = self._add_sim_artist(self._sim_layer)
+        for name, overlay in self._overlays.items():
+            overlay['artist'] = self.ax_main.scatter(
+                overlay['qxy'], overlay['qz'], label=name, **overlay['style'])
+        for name, overlay in self._ring_overlays.items():
+            overlay['artist'] = self.ax_main.add_collection(
+                LineCollection(overlay['segments'], label=name, **overlay['style']))
+
     def update1D(self, axis, x, y, **kwargs):
         """Update one of the 1D subplots: 'qxy','qz','qr'."""
         mapping = {'qxy': self.ax_qxy, 'qz': self.ax_qz, 'qr': self.ax_qr}
@@ -134,38 +507,47 @@ class ImageCanvas(QWidget):
             self.ax_main.set_ylabel('pixel y')
         self.canvas.draw()
 
-    def displayReciprocal(self, recip_ds: xr.Dataset, cmap='viridis'):
-        """
-        Display a reciprocal‐space xarray Dataset on the main 2D axes,
-        plus its q_xy and q_z 1D projections on the subplots.
-        """
-        # choose DataArray
-        da = recip_ds if not isinstance(recip_ds, xr.Dataset) else recip_ds[list(recip_ds.data_vars)[0]]
-        # alias lookup
-        aliases = {
-            'qxy': {'qxy','q_xy','qip','QXY','Qip'},
-            'qz':  {'qz','q_z','qoop','QZ','Qoop'}
-        }
-        coords_map = {name.lower(): name for name in da.coords}
-        # find qxy and qz keys robustly
-        for key, alias_set in aliases.items():
-            match = next((a for a in alias_set if a.lower() in coords_map), None)
-            if not match:
-                raise KeyError(f"No {key} axis found among coords {list(coords_map)}")
-            # resolve to actual coord name
-            aliases[key] = coords_map[match.lower()]
-        qxy_key = aliases['qxy']
-        qz_key  = aliases['qz']
-        data = da.values
-        q_xy = da.coords[qxy_key].values
-        q_z  = da.coords[qz_key].values
-        extent = [float(q_xy.min()), float(q_xy.max()), float(q_z.min()), float(q_z.max())]
-        # display
-        self.displayImage(data, extent=extent, cmap=cmap)
-        I_qxy = da.sum(dim=qz_key).values
-        I_qz  = da.sum(dim=qxy_key).values
-        self.update1D('qxy', q_xy, I_qxy)
-        self.update1D('qz',  q_z,  I_qz)
+    # --- backend interface shared with PGImageCanvas ---
+    def setBackgroundColor(self, color):
+        self.fig.set_facecolor(color)
+        self.canvas.draw_idle()
 
-    def displaySingleImage(self, img: SingleImage, **kwargs):
-        self.displayReciprocal(img.recip_DS, **kwargs)
+    def viewLimits(self):
+        """((x0, x1), (y0, y1)) of the main axes."""
+        return tuple(self.ax_main.get_xlim()), tuple(self.ax_main.get_ylim())
+
+    def setViewLimits(self, xlim=None, ylim=None):
+        if xlim is not None:
+            self.ax_main.set_xlim(*xlim)
+        if ylim is not None:
+            self.ax_main.set_ylim(*ylim)
+
+    def requestRedraw(self):
+        """Schedule a redraw after a batch of redraw=False updates."""
+        self.canvas.draw_idle()
+
+    def levels(self):
+        """(vmin, vmax) of the main image, or None before an image is shown."""
+        return None if self._image is None else tuple(self._image.get_clim())
+
+    def setLevels(self, vmin, vmax):
+        if self._image is None:
+            return
+        self._image.set_clim(vmin, vmax)
+        self.canvas.draw_idle()
+
+    def setColormap(self, cmap):
+        if self._image is None:
+            return
+        self._image.set_cmap(cmap)
+        self.canvas.draw_idle()
+
+    def createROISelector(self, window):
+        """Box-ROI tool on the main axes; `window` gets update_roi_table() calls."""
+        return ROISelector(self.ax_main, window=window)
+
+    def _main_image_state(self):
+        if self._image is None:
+            return None
+        return (self._image_data, list(self._image.get_extent()),
+                self._image.get_cmap().name, tuple(self._image.get_clim()))
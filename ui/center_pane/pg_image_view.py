@@ -0,0 +1,501 @@
+"""
+PGImageCanvas: pyqtgraph rendering backend for the center pane.
+
+Same layout and public methods as the Matplotlib ImageCanvas (main q_xy/q_z
+image above q_xy, q_z, q_r and small 2D subplots), drawn with Qt's raster
+engine instead of Agg: the main image is an ImageItem whose colour mapping
+is a lookup table applied on level or colormap changes, peak overlays are
+ScatterPlotItems, ring overlays one connected PlotCurveItem per structure
+and ROIs are RectROIs. Only the items that change are repainted, so series
+playback, level drags and overlay updates never redraw the whole figure.
+
+Overlay styles are given as Matplotlib keywords (as for ImageCanvas) and
+translated here, so exportFigure can still render a Matplotlib figure for
+publication.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pyqtgraph as pg
+from matplotlib.colors import to_rgba
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QGraphicsRectItem
+
+from ...analysis.perf import timed
+from .image_view import ImageCanvasBase
+
+# Matplotlib marker -> pyqtgraph symbol
+MARKERS = {'o': 'o', 's': 's', '^': 't1', 'v': 't', '<': 't3', '>': 't2', 'D': 'd', 'd': 'd',
+           '+': '+', 'x': 'x', '*': 'star', 'p': 'p', 'h': 'h', 'H': 'h'}
+AXIS_PEN = 'k'
+VIEW_BACKGROUND = 'darkgray'
+
+
+@lru_cache(maxsize=32)
+def colormap(name, stops=16):
+    """
+    Matplotlib colormap resampled to `stops` evenly spaced colours, so the
+    HistogramLUT gradient stays editable; its lookup table interpolates between them.
+    """
+    cmap = pg.colormap.getFromMatplotlib(name)
+    pos = np.linspace(0.0, 1.0, stops)
+    return pg.ColorMap(pos, cmap.map(pos, mode='byte'))
+
+
+@lru_cache(maxsize=32)
+def lookup_table(name, n=256):
+    return pg.colormap.getFromMatplotlib(name).getLookupTable(nPts=n)
+
+
+def _color(value):
+    """QColor for a Matplotlib colour spec; None for 'none'."""
+    if value is None or (isinstance(value, str) and value.lower() == 'none'):
+        return None
+    if not isinstance(value, str) and np.ndim(value) == 2:
+        value = value[0]
+    return pg.mkColor(tuple(int(round(255 * v)) for v in to_rgba(value)))
+
+
+def _first(value):
+    return value[0] if np.ndim(value) else value
+
+
+def scatter_style(style):
+    """ScatterPlotItem keywords for Matplotlib scatter keywords (s, marker, edge/facecolors)."""
+    edge = style.get('edgecolors', style.get('edgecolor', style.get('c', style.get('color', 'w'))))
+    face = style.get('facecolors', style.get('facecolor', style.get('c', style.get('color', 'none'))))
+    width = float(_first(style.get('linewidths', style.get('linewidth', 1.0))))
+    edge_color, face_color = _color(edge), _color(face)
+    return dict(size=float(np.sqrt(style.get('s', 36.0))),
+                symbol=MARKERS.get(style.get('marker', 'o'), 'o'),
+                pen=pg.mkPen(None) if edge_color is None else pg.mkPen(edge_color, width=width),
+                brush=pg.mkBrush(None) if face_color is None else pg.mkBrush(face_color))
+
+
+def line_pen(style):
+    """Pen for Matplotlib line/LineCollection keywords (colors, linewidths)."""
+    color = _color(style.get('colors', style.get('color', 'w'))) or pg.mkColor('w')
+    width = float(_first(style.get('linewidths', style.get('linewidth', 1.0))))
+    return pg.mkPen(color, width=width)
+
+
+def _ring_path(segments):
+    """Flatten (n_rings, npts, 2) segments into one x/y path with breaks between rings."""
+    n, npts = segments.shape[:2]
+    connect = np.ones(n * npts, dtype=bool)
+    connect[npts - 1::npts] = False
+    return segments[..., 0].ravel(), segments[..., 1].ravel(), connect
+
+
+def _image_item_nbytes(item):
+    """Data array of an ImageItem, excluding its rendered buffers."""
+    image = item.image
+    return int(image.nbytes) if image is not None else 0
+
+
+def _image_item_buffers(item):
+    """Mapped ARGB buffers an ImageItem keeps between paints."""
+    display = getattr(item, '_displayBuffer', None)
+    if display is None:
+        return int(item.qimage.sizeInBytes()) if item.qimage is not None else 0
+    processing = getattr(item, '_processingBuffer', None)
+    extra = processing.nbytes if processing is not None and processing is not display else 0
+    return int(display.nbytes + extra)
+
+
+class _DrawViewBox(pg.ViewBox):
+    """ViewBox that hands left-button drags to `draw_callback(QRectF)` while one is set."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.draw_callback = None
+        self._rubber_band = None
+
+    def mouseDragEvent(self, ev, axis=None):
+        if self.draw_callback is None or ev.button() != Qt.MouseButton.LeftButton:
+            super().mouseDragEvent(ev, axis)
+            return
+        ev.accept()
+        rect = QRectF(self.mapSceneToView(ev.buttonDownScenePos()),
+                      self.mapSceneToView(ev.scenePos())).normalized()
+        if self._rubber_band is None:
+            self._rubber_band = QGraphicsRectItem()
+            self._rubber_band.setPen(pg.mkPen('k', width=1, style=Qt.PenStyle.DashLine))
+            self.addItem(self._rubber_band, ignoreBounds=True)
+        self._rubber_band.setRect(rect)
+        if ev.isFinish():
+            self.removeItem(self._rubber_band)
+            self._rubber_band = None
+            # same minimum as the Matplotlib selector: 5 screen pixels each way
+            span = ev.scenePos() - ev.buttonDownScenePos()
+            if abs(span.x()) >= 5 and abs(span.y()) >= 5:
+                self.draw_callback(rect)
+
+
+class PGROISelector:
+    """
+    pyqtgraph counterpart of ROISelector: drag on the main view to draw a box
+    while enabled; boxes are RectROIs that can be moved and resized, and are
+    removed from their right-click menu.
+    """
+    def __init__(self, plot, window):
+        self.plot = plot
+        self.view = plot.getViewBox()
+        self.window = window
+        self.rectangles = []  # one RectROI per box
+
+    def enable_selector(self, enabled: bool):
+        self.view.draw_callback = self._on_draw if enabled else None
+
+    def _on_draw(self, rect):
+        self.add_rectangle(rect.x(), rect.y(), rect.width(), rect.height())
+
+    def add_rectangle(self, x_min, y_min, width, height):
+        roi = pg.RectROI((x_min, y_min), (width, height), removable=True,
+                         pen=pg.mkPen('k', width=1.5))
+        roi.setZValue(20)
+        roi.sigRemoveRequested.connect(self._remove)
+        roi.sigRegionChangeFinished.connect(lambda _roi: self._changed())
+        self.plot.addItem(roi)
+        self.rectangles.append(roi)
+        self._changed()
+
+    def _remove(self, roi):
+        self.plot.removeItem(roi)
+        self.rectangles.remove(roi)
+        self._changed()
+
+    def boxes(self):
+        """Every ROI as a dict of x, y, width, height (data coordinates)."""
+        boxes = []
+        for roi in self.rectangles:
+            (x0, y0), (w, h) = roi.pos(), roi.size()
+            boxes.append({'x': float(x0), 'y': float(y0), 'width': float(w), 'height': float(h)})
+        return boxes
+
+    def clear(self):
+        for roi in self.rectangles:
+            self.plot.removeItem(roi)
+        self.rectangles.clear()
+
+    def _changed(self):
+        if hasattr(self.window, 'update_roi_table'):
+            self.window.update_roi_table()
+
+
+class PGImageCanvas(QWidget, ImageCanvasBase):
+    backend = 'pyqtgraph'
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # --- Graphics layout: main plot + histogram/LUT, four subplots below ---
+        self.layout_widget = pg.GraphicsLayoutWidget()
+        self.layout_widget.setBackground(VIEW_BACKGROUND)
+        glw = self.layout_widget
+
+        # --- Axis selector ---
+        self.ax_selector = QComboBox()
+        self.ax_selector.addItems(['q_xy vs q_z', 'pixel coords'])
+        self.ax_selector.currentTextChanged.connect(self.on_axis_change)
+
+        topbar = QHBoxLayout()
+        topbar.addStretch(1)
+        topbar.addWidget(self.ax_selector)
+
+        main_layout = QVBoxLayout(self)
+        main_layout.addLayout(topbar)
+        main_layout.addWidget(glw)
+
+        # --- Main plot ---
+        self.plot_main = pg.PlotItem(viewBox=_DrawViewBox())
+        glw.addItem(self.plot_main, row=0, col=0, colspan=4)
+        self._image = pg.ImageItem(axisOrder='row-major')
+        self._image.setZValue(0)
+        self.plot_main.addItem(self._image)
+        self.hist = pg.HistogramLUTItem(image=self._image)
+        self.hist.gradient.showTicks(False)
+        glw.addItem(self.hist, row=0, col=4)
+        self._cmap = None
+        self._extent = None
+
+        # --- Subplots ---
+        self.plot_qxy = glw.addPlot(row=1, col=0)
+        self.plot_qz = glw.addPlot(row=1, col=1)
+        self.plot_qr = glw.addPlot(row=1, col=2)
+        self.plot_small2d = glw.addPlot(row=1, col=3)
+        self._curves = {key: plot.plot(pen=pg.mkPen('#1f77b4'))
+                        for key, plot in (('qxy', self.plot_qxy), ('qz', self.plot_qz),
+                                          ('qr', self.plot_qr))}
+        self._small_image = pg.ImageItem(axisOrder='row-major')
+        self.plot_small2d.addItem(self._small_image)
+        grid = glw.ci.layout
+        grid.setRowStretchFactor(0, 4)
+        grid.setRowStretchFactor(1, 1)
+
+        # --- Named overlays, same state as ImageCanvas plus the pyqtgraph item ---
+        self._overlays = {}  # name -> {'qxy', 'qz', 'style', 'artist'}
+        self._ring_overlays = {}  # name -> {'segments', 'style', 'artist'}
+        self._sim_layer = None  # {'data', 'extent', 'style', 'artist'}
+
+        self._setup_main()
+        self._setup_subplots()
+
+    # --- axes ---
+    def _style_plot(self, plot, xlabel, ylabel, background):
+        plot.getViewBox().setBackgroundColor(background)
+        for name, label in (('bottom', xlabel), ('left', ylabel)):
+            axis = plot.getAxis(name)
+            axis.setPen(AXIS_PEN)
+            axis.setTextPen(AXIS_PEN)
+            plot.setLabel(name, label)
+
+    def _setup_main(self):
+        self._style_plot(self.plot_main, 'q<sub>xy</sub> (Å<sup>-1</sup>)',
+                         'q<sub>z</sub> (Å<sup>-1</sup>)', VIEW_BACKGROUND)
+        self.plot_main.getViewBox().disableAutoRange()
+        self.setViewLimits((0, 3), (0, 3))
+
+    def _setup_subplots(self):
+        for plot, xlabel in ((self.plot_qxy, 'q<sub>xy</sub> (Å<sup>-1</sup>)'),
+                             (self.plot_qz, 'q<sub>z</sub> (Å<sup>-1</sup>)'),
+                             (self.plot_qr, 'q<sub>r</sub> (Å<sup>-1</sup>)')):
+            self._style_plot(plot, xlabel, 'Intensity', 'w')
+        self._style_plot(self.plot_small2d, 'q<sub>xy</sub> (Å<sup>-1</sup>)',
+                         'q<sub>z</sub> (Å<sup>-1</sup>)', VIEW_BACKGROUND)
+        self.plot_small2d.setRange(xRange=(0, 3), yRange=(0, 3), padding=0)
+
+    def setBackgroundColor(self, color):
+        self.layout_widget.setBackground(color)
+
+    def viewLimits(self):
+        """((x0, x1), (y0, y1)) of the main view."""
+        (x0, x1), (y0, y1) = self.plot_main.getViewBox().viewRange()
+        return (x0, x1), (y0, y1)
+
+    def setViewLimits(self, xlim=None, ylim=None):
+        view = self.plot_main.getViewBox()
+        if xlim is not None:
+            view.setXRange(*xlim, padding=0)
+        if ylim is not None:
+            view.setYRange(*ylim, padding=0)
+
+    def requestRedraw(self):
+        """Items schedule their own repaints; nothing is deferred."""
+
+    def clear(self):
+        """Clear the image and subplots to the initial state; overlays are kept."""
+        self._image.clear()
+        self._extent = None
+        self._setup_main()
+        for curve in self._curves.values():
+            curve.setData([], [])
+        self._small_image.clear()
+        self._setup_subplots()
+
+    # --- main image ---
+    @staticmethod
+    def _auto_levels(data):
+        # imshow's default limits: finite min/max
+        finite = data[np.isfinite(data)]
+        if not finite.size:
+            return 0.0, 1.0
+        lo, hi = float(finite.min()), float(finite.max())
+        return lo, hi if hi > lo else lo + 1.0
+
+    @timed('render.display_image')
+    def displayImage(self, data, extent=None, cmap='viridis'):
+        """Display data on the main view, reset levels and limits."""
+        data = np.asarray(data)
+        if extent is None:
+            extent = [0, 3.0, 0, 3.0]
+        lo, hi = self._auto_levels(data)
+        self._image.setImage(data, autoLevels=False, levels=(lo, hi))
+        self._image.setRect(QRectF(extent[0], extent[2], extent[1] - extent[0], extent[3] - extent[2]))
+        self._extent = list(extent)
+        if cmap != self._cmap:
+            self.setColormap(cmap)
+        self.hist.setLevels(lo, hi)
+        self.setViewLimits(extent[:2], extent[2:])
+
+    def beginFrameUpdates(self):
+        """ImageItem updates repaint only the image; no mode switch is needed."""
+
+    def endFrameUpdates(self):
+        pass
+
+    @timed('render.update_image')
+    def updateImageData(self, data):
+        """
+        Replace the pixels of the main image in place (same extent, levels
+        and overlays). Falls back to displayImage for a new shape.
+        """
+        if self._image.image is None or self._image.image.shape != data.shape:
+            self.displayImage(data)
+            return
+        self._image.setImage(data, autoLevels=False)
+
+    def levels(self):
+        """(vmin, vmax) of the main image, or None before an image is shown."""
+        return None if self._image.image is None else tuple(float(v) for v in self.hist.getLevels())
+
+    def setLevels(self, vmin, vmax):
+        """Change the colour limits; only the lookup is redone, not the figure."""
+        self.hist.setLevels(vmin, vmax)
+
+    def setColormap(self, cmap):
+        self._cmap = cmap
+        self.hist.gradient.setColorMap(colormap(cmap))
+
+    def _main_image_state(self):
+        if self._image.image is None:
+            return None
+        return self._image.image, list(self._extent), self._cmap, tuple(float(v) for v in self.hist.getLevels())
+
+    # --- peak overlays ---
+    def overlayPeaks(self, qxy, qz, **kwargs):
+        """Overlay Bragg peaks on the main view."""
+        item = pg.ScatterPlotItem(np.asarray(qxy, dtype=float), np.asarray(qz, dtype=float),
+                                  **scatter_style(kwargs))
+        item.setZValue(10)
+        self.plot_main.addItem(item)
+
+    def setPeakOverlay(self, name, qxy, qz, redraw=True, **style):
+        """
+        Create or update the named peak overlay on the main view. Existing
+        overlays keep their ScatterPlotItem and only get new positions.
+        """
+        qxy = np.asarray(qxy, dtype=float)
+        qz = np.asarray(qz, dtype=float)
+        overlay = self._overlays.get(name)
+        if overlay is None or (style and style != overlay['style']):
+            if overlay is not None:
+                self.plot_main.removeItem(overlay['artist'])
+            item = pg.ScatterPlotItem(name=name, **scatter_style(style))
+            item.setZValue(10)
+            self.plot_main.addItem(item)
+            overlay = {'style': style, 'artist': item}
+            self._overlays[name] = overlay
+        overlay['qxy'], overlay['qz'] = qxy, qz
+        overlay['artist'].setData(qxy, qz)
+
+    def removePeakOverlay(self, name, redraw=True):
+        """Remove the named peak overlay, if present."""
+        overlay = self._overlays.pop(name, None)
+        if overlay is not None:
+            self.plot_main.removeItem(overlay['artist'])
+
+    def peakOverlayNames(self):
+        return list(self._overlays)
+
+    # --- ring overlays ---
+    def setRingOverlay(self, name, q, chi_range=(0.0, 90.0), npts=91, redraw=True, **style):
+        """
+        Draw Debye-Scherrer rings of radius `q` analytically on the q_xy/q_z plane.
+        chi is measured from q_z; a chi_range narrower than (0, 90) draws fiber arcs.
+        All rings of one structure share a single PlotCurveItem.
+        """
+        chi = np.deg2rad(np.linspace(chi_range[0], chi_range[1], npts))
+        q = np.asarray(q, dtype=float)[:, None]
+        segments = np.stack((q * np.sin(chi), q * np.cos(chi)), axis=-1)
+        overlay = self._ring_overlays.get(name)
+        if overlay is None or (style and style != overlay['style']):
+            if overlay is not None:
+                self.plot_main.removeItem(overlay['artist'])
+            item = pg.PlotCurveItem(pen=line_pen(style), name=name)
+            item.setZValue(9)
+            self.plot_main.addItem(item)
+            overlay = {'style': style, 'artist': item}
+            self._ring_overlays[name] = overlay
+        overlay['segments'] = segments
+        x, y, connect = _ring_path(segments)
+        overlay['artist'].setData(x=x, y=y, connect=connect)
+
+    def removeRingOverlay(self, name, redraw=True):
+        """Remove the named ring overlay, if present."""
+        overlay = self._ring_overlays.pop(name, None)
+        if overlay is not None:
+            self.plot_main.removeItem(overlay['artist'])
+
+    def ringOverlayNames(self):
+        return list(self._ring_overlays)
+
+    # --- simulated layer ---
+    def setSimulatedLayer(self, data, extent, alpha=0.5, cmap='magma', redraw=True):
+        """
+        Show a simulated intensity map as a translucent layer above the image.
+        Repeated calls reuse the same ImageItem.
+        """
+        layer = self._sim_layer
+        if layer is None or layer['extent'] != list(extent) \
+                or layer['style'] != dict(alpha=alpha, cmap=cmap):
+            if layer is not None:
+                self.plot_main.removeItem(layer['artist'])
+            item = pg.ImageItem(axisOrder='row-major')
+            item.setZValue(5)
+            item.setOpacity(alpha)
+            item.setLookupTable(lookup_table(cmap))
+            item.setRect(QRectF(extent[0], extent[2], extent[1] - extent[0], extent[3] - extent[2]))
+            self.plot_main.addItem(item)
+            layer = {'extent': list(extent), 'style': dict(alpha=alpha, cmap=cmap), 'artist': item}
+            self._sim_layer = layer
+        layer['data'] = data
+        layer['artist'].setImage(data, autoLevels=False, levels=(0, float(np.nanmax(data)) or 1.0))
+
+    def removeSimulatedLayer(self, redraw=True):
+        if self._sim_layer is None:
+            return
+        self.plot_main.removeItem(self._sim_layer['artist'])
+        self._sim_layer = None
+
+    # --- ROIs ---
+    def createROISelector(self, window):
+        """Box-ROI tool on the main view; `window` gets update_roi_table() calls."""
+        return PGROISelector(self.plot_main, window=window)
+
+    # --- subplots ---
+    def update1D(self, axis, x, y, **kwargs):
+        """Update one of the 1D subplots: 'qxy','qz','qr'."""
+        curve = self._curves.get(axis)
+        if curve is None:
+            return
+        if 'color' in kwargs or 'linewidth' in kwargs:
+            curve.setPen(line_pen(kwargs))
+        curve.setData(np.asarray(x), np.asarray(y))
+
+    def update2Dsmall(self, data, extent=None, cmap='viridis'):
+        """Display data on the small 2D subplot."""
+        if extent is None:
+            extent = [0, 3.0, 0, 3.0]
+        self._small_image.setLookupTable(lookup_table(cmap))
+        self._small_image.setImage(np.asarray(data), autoLevels=True)
+        self._small_image.setRect(QRectF(extent[0], extent[2], extent[1] - extent[0], extent[3] - extent[2]))
+        self.plot_small2d.setRange(xRange=extent[:2], yRange=extent[2:], padding=0)
+
+    def on_axis_change(self, text: str):
+        """Switch main-plot labels."""
+        if text == 'q_xy vs q_z':
+            self.plot_main.setLabel('bottom', 'q_xy')
+            self.plot_main.setLabel('left', 'q_z')
+        else:
+            self.plot_main.setLabel('bottom', 'pixel x')
+            self.plot_main.setLabel('left', 'pixel y')
+
+    def memoryLayers(self):
+        """Bytes per item layer of the view, plus the rendered image buffers."""
+        layers = {}
+        if self._image.image is not None:
+            layers['Main image'] = _image_item_nbytes(self._image)
+        if self._sim_layer is not None:
+            layers['Simulated pattern'] = _image_item_nbytes(self._sim_layer['artist'])
+        for name, overlay in self._overlays.items():
+            layers[f'Peaks: {name}'] = int(overlay['artist'].data.nbytes)
+        for name, overlay in self._ring_overlays.items():
+            layers[f'Rings: {name}'] = int(overlay['segments'].nbytes)
+        layers['Projections'] = _image_item_nbytes(self._small_image) + sum(
+            int(np.asarray(a).nbytes) for curve in self._curves.values()
+            for a in curve.getData() if a is not None)
+        images = [self._image, self._small_image]
+        if self._sim_layer is not None:
+            images.append(self._sim_layer['artist'])
+        layers['Render buffers'] = sum(_image_item_buffers(item) for item in images)
+        return layers
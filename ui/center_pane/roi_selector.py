@@ -45,7 +45,13 @@ class ROISelector:
         # Compute rectangle bounds
         x_min, y_min = min(x1, x2), min(y1, y2)
         width, height = abs(x2 - x1), abs(y2 - y1)
+        self.add_rectangle(x_min, y_min, width, height)
 
+    def add_rectangle(self, x_min, y_min, width, height):
+        """
+        Create a persistent ROI patch plus a small delete box, e.g. when
+        restoring ROIs from a project file.
+        """
         # Main ROI patch
         main_rect = Rectangle((x_min, y_min), width, height,
                               edgecolor='black', facecolor='none', linewidth=1.5)
@@ -78,6 +84,25 @@ class ROISelector:
         if hasattr(self.window, 'update_roi_table'):
             self.window.update_roi_table()
 
+    def boxes(self):
+        """Every ROI as a dict of x, y, width, height (data coordinates)."""
+        boxes = []
+        for rect_dict in self.rectangles:
+            main_rect = rect_dict['main']
+            x0, y0 = main_rect.get_xy()
+            boxes.append({'x': float(x0), 'y': float(y0),
+                          'width': float(main_rect.get_width()),
+                          'height': float(main_rect.get_height())})
+        return boxes
+
+    def clear(self):
+        """Remove every ROI patch and its close-box from the axes."""
+        for rect_dict in self.rectangles:
+            for key in ('main', 'close_box', 'close_x1', 'close_x2'):
+                rect_dict[key].remove()
+        self.rectangles.clear()
+        self.ax.figure.canvas.draw_idle()
+
     def on_click(self, event):
         """
         Detect clicks on any ROI's close-box to delete that ROI.
@@ -0,0 +1,268 @@
+# File: ewald/ui/center_pane/series_scrubber.py
+
+"""
+Series playback for SeriesImage stacks.
+
+`SeriesScrubber` is a slider/play bar under the ImageCanvas. Frames are read
+from the stack into an LRU `FrameCache` (one HDF5 slab per frame for lazy
+handles, which are never loaded whole); a worker thread prefetches the
+frames around the current position (ahead in the scrub direction first) so
+the GUI thread only copies cached arrays into the image artist, which the
+canvas repaints by blitting the main axes (Matplotlib backend) or by
+repainting the ImageItem alone (pyqtgraph backend).
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QSlider, QLabel, QPushButton, QSpinBox
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+from .image_view import resolve_q_axes
+from ...analysis.series_reduction import series_coords, series_frames, series_length
+
+
+class FrameCache:
+    """Thread-safe LRU cache of frame index -> 2D array."""
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, index):
+        with self._lock:
+            return index in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, index):
+        with self._lock:
+            frame = self._frames.get(index)
+            if frame is not None:
+                self._frames.move_to_end(index)
+            return frame
+
+    def put(self, index, frame):
+        with self._lock:
+            self._frames[index] = frame
+            self._frames.move_to_end(index)
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(int(getattr(f, 'nbytes', 0)) for f in self._frames.values())
+
+
+class SeriesScrubber(QWidget):
+    """
+    Slider, play button and frame-rate control for a SeriesImage.
+
+    Emits `frameChanged(index)` for every displayed frame and
+    `frameSettled(index)` once scrubbing pauses, when the 1D projections of
+    the ImageCanvas are refreshed.
+    """
+    frameChanged = pyqtSignal(int)
+    frameSettled = pyqtSignal(int)
+
+    def __init__(self, canvas, cache_size: int = 64, prefetch: int = 8, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.cache = FrameCache(cache_size)
+        self.prefetch = prefetch
+        self.series = None
+        self._n = 0
+        self._coords = {}
+        self._frame_dims = ()
+        self._keys = None
+        self._index = 0
+        self._direction = 1
+        self._pending = None
+        self._generation = 0
+        # held while the series changes, so a prefetch cannot cache a stale frame
+        self._series_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ewald-prefetch")
+        self._frame_times = []
+
+        self.play_btn = QPushButton("▶")
+        self.play_btn.setCheckable(True)
+        self.play_btn.setFixedWidth(32)
+        self.play_btn.toggled.connect(self._on_play_toggled)
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.setRange(0, 0)
+        self.slider.valueChanged.connect(self.setFrame)
+        self.fps_spin = QSpinBox()
+        self.fps_spin.setRange(1, 60)
+        self.fps_spin.setValue(20)
+        self.fps_spin.setSuffix(" fps")
+        self.fps_spin.valueChanged.connect(self._on_fps_changed)
+        self.label = QLabel("")
+        self.label.setMinimumWidth(160)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(4, 0, 4, 0)
+        layout.addWidget(self.play_btn)
+        layout.addWidget(self.slider, 1)
+        layout.addWidget(self.label)
+        layout.addWidget(self.fps_spin)
+
+        # coalesce slider moves: render only the latest requested frame
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._render_pending)
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(250)
+        self._settle_timer.timeout.connect(lambda: self.frameSettled.emit(self._index))
+        self._play_timer = QTimer(self)
+        self._play_timer.timeout.connect(self._advance)
+        self._on_fps_changed(self.fps_spin.value())
+        self.frameSettled.connect(self._update_projections)
+
+    # --- series ---
+    def setSeries(self, series):
+        """Bind a SeriesImage (or lazy series handle); frame 0 must already be displayed."""
+        self.play_btn.setChecked(False)
+        with self._series_lock:
+            self._generation += 1
+            self.cache.clear()
+        self.series = series
+        # same variable and axis names displayReciprocal picks for frame 0
+        first, qxy_key, qz_key = resolve_q_axes(series_frames(series, 0, 1))
+        first = first.isel({series.dim_name: 0})
+        self._frame_dims = first.dims
+        self._keys = (qxy_key, qz_key)
+        self._coords = series_coords(series)
+        self._n = series_length(series)
+        self.cache.put(0, np.ascontiguousarray(first.values, dtype=np.float32))
+        self._index = 0
+        self.slider.blockSignals(True)
+        self.slider.setRange(0, self._n - 1)
+        self.slider.setValue(0)
+        self.slider.blockSignals(False)
+        self._update_label()
+        self.canvas.beginFrameUpdates()
+        self._schedule_prefetch(0)
+
+    def clearSeries(self):
+        self.play_btn.setChecked(False)
+        with self._series_lock:
+            self._generation += 1
+            self.cache.clear()
+        if self.series is not None:
+            self.canvas.endFrameUpdates()
+        self.series = None
+        self._n = 0
+        self._coords = {}
+
+    def n_frames(self):
+        return self._n
+
+    def _read_frame(self, index, series=None, frame_dims=None, generation=None):
+        """
+        Frame `index` from the cache or the series. The prefetch thread passes
+        the series, frame dims and generation it was scheduled for; the frame
+        is not cached if the series changed while it was being read.
+        """
+        if series is None:
+            series, frame_dims, generation = self.series, self._frame_dims, self._generation
+        frame = self.cache.get(index)
+        if frame is None:
+            da, _, _ = resolve_q_axes(series_frames(series, index, index + 1))
+            frame = np.ascontiguousarray(
+                da.isel({series.dim_name: 0}).transpose(*frame_dims).values, dtype=np.float32)
+            with self._series_lock:
+                if generation == self._generation:
+                    self.cache.put(index, frame)
+        return frame
+
+    def _schedule_prefetch(self, index):
+        n, generation, direction = self.n_frames(), self._generation, self._direction
+        series, frame_dims = self.series, self._frame_dims
+        # frames ahead in the scrub direction first, then a few behind
+        order = [index + direction * k for k in range(1, self.prefetch + 1)]
+        order += [index - direction * k for k in range(1, self.prefetch // 2 + 1)]
+        wanted = [i for i in order if 0 <= i < n and i not in self.cache]
+        if not wanted:
+            return
+
+        def _run():
+            for i in wanted:
+                if generation != self._generation:
+                    return
+                self._read_frame(i, series, frame_dims, generation)
+
+        self._pool.submit(_run)
+
+    # --- playback ---
+    def setFrame(self, index):
+        if self.series is None:
+            return
+        index = int(np.clip(index, 0, self.n_frames() - 1))
+        if index != self._index:
+            self._direction = 1 if index > self._index else -1
+        self._pending = index
+        if not self._render_timer.isActive():
+            self._render_timer.start(0)
+
+    def _render_pending(self):
+        if self._pending is None or self.series is None:
+            return
+        index, self._pending = self._pending, None
+        self._index = index
+        self.canvas.updateImageData(self._read_frame(index))
+        self._frame_times.append(time.perf_counter())
+        del self._frame_times[:-30]
+        if self.slider.value() != index:
+            self.slider.blockSignals(True)
+            self.slider.setValue(index)
+            self.slider.blockSignals(False)
+        self._update_label()
+        self._schedule_prefetch(index)
+        self.frameChanged.emit(index)
+        self._settle_timer.start()
+
+    def _advance(self):
+        n = self.n_frames()
+        if n:
+            self.setFrame((self._index + 1) % n)
+
+    def _on_play_toggled(self, playing):
+        self.play_btn.setText("❚❚" if playing else "▶")
+        if playing:
+            self._direction = 1
+            self._play_timer.start()
+        else:
+            self._play_timer.stop()
+
+    def _on_fps_changed(self, fps):
+        self._play_timer.setInterval(max(1, int(1000 / fps)))
+
+    def measured_fps(self):
+        """Display rate over the last frames rendered."""
+        t = self._frame_times
+        return (len(t) - 1) / (t[-1] - t[0]) if len(t) > 1 and t[-1] > t[0] else 0.0
+
+    def _update_label(self):
+        if self.series is None:
+            self.label.setText("")
+            return
+        dim = self.series.dim_name
+        value = self._coords[dim][self._index] if dim in self._coords else self._index
+        self.label.setText(f"{dim} = {value}  ({self._index + 1}/{self.n_frames()})")
+
+    def _update_projections(self, index):
+        if self.series is None:
+            return
+        frame = self._read_frame(index)
+        qxy_key, qz_key = self._keys
+        qz_axis, qxy_axis = self._frame_dims.index(qz_key), self._frame_dims.index(qxy_key)
+        self.canvas.update1D('qxy', self._coords[qxy_key], frame.sum(axis=qz_axis, dtype=np.float64))
+        self.canvas.update1D('qz', self._coords[qz_key], frame.sum(axis=qxy_axis, dtype=np.float64))
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PyQt6.QtWidgets import (
+    QFormLayout, QLineEdit, QComboBox, QSpinBox, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import pyqtSignal
+from .load_single_image_dialog import LoadSingleImageDialog
+from ...dataclass.single_image import DEFAULT_MD_NAMING_SCHEME
+from ...dataclass.series_integration import IntegrationSettings
+from ...dataclass.batch_loader import NamingScheme, group_files, load_batch
+
+# series integration runs off the GUI thread; workers are processes inside load_batch
+_loader_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ewald-batch")
+
+
+class LoadSeriesImageDialog(LoadSingleImageDialog):
+    """
+    Dialog for loading a folder of GIWAXS TIFFs as one or more image series.
+    Metadata is parsed from filenames with the naming scheme, files are
+    grouped into series by the chosen fields and ordered by the series key.
+    Emits `series_loaded(list)` with the SeriesImage objects when done.
+    """
+    series_loaded = pyqtSignal(object)
+    series_failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Load Series Images")
+        self.future = None
+
+    def _init_ui(self):
+        super()._init_ui()
+        form = self.form
+        # each series is named after its group, not a single data object name
+        form.removeRow(self.data_object_name_edit)
+
+        row = self._file_row()
+        form.itemAt(row, QFormLayout.ItemRole.LabelRole).widget().setText("Image Folder:")
+
+        self.pattern_edit = QLineEdit("*.tif*")
+        form.insertRow(row + 1, "File Pattern:", self.pattern_edit)
+
+        self.scheme_edit = QLineEdit(", ".join(DEFAULT_MD_NAMING_SCHEME))
+        self.scheme_edit.setToolTip("Filename fields in order, separated by ','")
+        self.scheme_edit.editingFinished.connect(self._reload_fields)
+        form.insertRow(row + 2, "Naming Scheme:", self.scheme_edit)
+
+        self.group_by_edit = QLineEdit("sample")
+        self.group_by_edit.setToolTip("Fields that identify one series, separated by ','")
+        form.insertRow(row + 3, "Group By:", self.group_by_edit)
+
+        self.series_key_combo = QComboBox()
+        form.insertRow(row + 4, "Series Key:", self.series_key_combo)
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 64)
+        self.workers_spin.setValue(4)
+        form.insertRow(row + 5, "Worker Processes:", self.workers_spin)
+
+        self._reload_fields()
+        self.series_key_combo.setCurrentText("global_time")
+
+    def _file_row(self):
+        for row in range(self.form.rowCount()):
+            item = self.form.itemAt(row, QFormLayout.ItemRole.FieldRole)
+            if item is not None and item.layout() is not None \
+                    and item.layout().indexOf(self.file_path_edit) >= 0:
+                return row
+        return 0
+
+    def _reload_fields(self):
+        current = self.series_key_combo.currentText()
+        self.series_key_combo.clear()
+        self.series_key_combo.addItems(self.naming_scheme())
+        if current:
+            self.series_key_combo.setCurrentText(current)
+
+    def _browse_file(self):
+        path = QFileDialog.getExistingDirectory(self, "Select Image Folder", "")
+        if path:
+            self.file_path_edit.setText(path)
+
+    def naming_scheme(self):
+        return [f.strip() for f in self.scheme_edit.text().split(',') if f.strip()]
+
+    def group_by(self):
+        return [f.strip() for f in self.group_by_edit.text().split(',') if f.strip()]
+
+    def files(self):
+        folder = Path(self.file_path_edit.text().strip())
+        if not folder.is_dir():
+            return []
+        return sorted(str(p) for p in folder.glob(self.pattern_edit.text().strip() or "*.tif*"))
+
+    def settings(self):
+        output_space = {"Reciprocal Space": "recip",
+                        "Polar (Azimuthal)": "polar"}.get(self.output_space_combo.currentText(), "both")
+        return IntegrationSettings(
+            mask_file=self.getSelectedMask(),
+            poni_file=self.getSelectedPoni(),
+            incident_angle=float(self.incidence_spin.value()),
+            tilt_angle=float(self.tilt_spin.value()),
+            sample_orientation=int(self.sample_orientation_combo.currentText()),
+            split_pixels=self.split_pixels_chk.isChecked(),
+            output_space=output_space,
+            polarization=self.getPolarization(),
+            solid_angle=self.solid_angle_chk.isChecked(),
+            md_naming_scheme=self.naming_scheme(),
+            corrections=self.getCorrections(),
+        )
+
+    def _on_accept(self):
+        files = self.files()
+        scheme = NamingScheme(self.naming_scheme())
+        groups = group_files(scheme.parse_many(files), self.group_by(),
+                             self.series_key_combo.currentText())
+        if not groups:
+            QMessageBox.warning(self, "No Series Found",
+                                "No files in the folder match the naming scheme.")
+            return
+        extra = {key: value for key, value, _ in self.get_metadata()}
+        settings = self.settings()
+        self.future = _loader_thread.submit(
+            load_batch, files, settings, self.group_by(),
+            self.series_key_combo.currentText(), self.workers_spin.value())
+
+        def _done(fut):
+            # runs on the loader thread; signals are queued onto the GUI thread
+            if fut.exception() is not None:
+                self.series_failed.emit(str(fut.exception()))
+                return
+            series = fut.result()
+            for s in series:
+                s.metadata_attributes.update(extra)
+            self.series_loaded.emit(series)
+
+        self.future.add_done_callback(_done)
+        self.accept()
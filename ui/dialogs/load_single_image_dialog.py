@@ -1,3 +1,5 @@
+from typing import Optional
+
 from PyQt6.QtWidgets import (
     QDialog, QFormLayout, QLineEdit, QPushButton, QComboBox,
     QDoubleSpinBox, QCheckBox, QDialogButtonBox, QVBoxLayout,
@@ -6,6 +8,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from PyQt6.QtCore import pyqtSignal
 from ...dataclass.single_image import SingleImage
+from ...dataclass.corrections import CorrectionSettings
 
 class LoadSingleImageDialog(QDialog):
     """
@@ -27,8 +30,8 @@ class LoadSingleImageDialog(QDialog):
     def _init_ui(self):
         # Main vertical layout
         layout = QVBoxLayout(self)
-        # Form layout for rows
-        form = QFormLayout()
+        # Form layout for rows (kept for dialogs that extend this one)
+        self.form = form = QFormLayout()
 
         # --- Data Object Name ---
         self.data_object_name_edit = QLineEdit()
@@ -84,17 +87,36 @@ class LoadSingleImageDialog(QDialog):
         self.output_space_combo.setCurrentText("Reciprocal Space")
         form.addRow("Output Space:", self.output_space_combo)
 
-        # --- Polarization ---
+        # --- Polarization (unchecked: no correction; 0.0 is the unpolarized one) ---
+        self.polarization_chk = QCheckBox()
+        self.polarization_chk.setChecked(True)
         self.polarization_spin = QDoubleSpinBox()
         self.polarization_spin.setRange(0.0, 1.0)
         self.polarization_spin.setDecimals(4)
         self.polarization_spin.setValue(0.95)  # Default for synchrotron data
-        form.addRow("Polarization:", self.polarization_spin)
+        self.polarization_chk.toggled.connect(self.polarization_spin.setEnabled)
+        polarization_row = QHBoxLayout()
+        polarization_row.addWidget(self.polarization_chk)
+        polarization_row.addWidget(self.polarization_spin)
+        form.addRow("Polarization:", polarization_row)
 
-        # --- Solid angle toggle ---
+        # --- Solid angle toggle (the integrator itself does not apply it) ---
         self.solid_angle_chk = QCheckBox()
+        self.solid_angle_chk.setChecked(True)
         form.addRow("Apply Solid Angle:", self.solid_angle_chk)
 
+        # --- Dark / background references and normalization ---
+        self.dark_file_edit = self._reference_row(form, "Dark File:")
+        self.background_file_edit = self._reference_row(form, "Background File:")
+        self.background_scale_spin = QDoubleSpinBox()
+        self.background_scale_spin.setRange(0.0, 100.0)
+        self.background_scale_spin.setDecimals(4)
+        self.background_scale_spin.setValue(1.0)
+        form.addRow("Background Scale:", self.background_scale_spin)
+        self.normalize_combo = QComboBox()
+        self.normalize_combo.addItems(["None", "Exposure Time", "Monitor"])
+        form.addRow("Normalize By:", self.normalize_combo)
+
         # Add form to main layout
         layout.addLayout(form)
 
@@ -122,6 +144,42 @@ class LoadSingleImageDialog(QDialog):
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
 
+    def _reference_row(self, form, label):
+        edit = QLineEdit()
+        edit.setPlaceholderText("None")
+        btn = QPushButton("Browse...")
+        btn.clicked.connect(lambda: self._browse_reference(edit))
+        row = QHBoxLayout()
+        row.addWidget(edit)
+        row.addWidget(btn)
+        form.addRow(label, row)
+        return edit
+
+    def _browse_reference(self, edit):
+        path, _ = QFileDialog.getOpenFileName(self, "Select Reference Image", "",
+                                              "TIFF Files (*.tif *.tiff)")
+        if path:
+            edit.setText(path)
+
+    def getPolarization(self) -> Optional[float]:
+        """Polarization factor, or None when the correction is turned off."""
+        if not self.polarization_chk.isChecked():
+            return None
+        return float(self.polarization_spin.value())
+
+    def getCorrections(self) -> CorrectionSettings:
+        """Correction settings from the polarization, solid angle and reference rows."""
+        normalize = {"Exposure Time": "exposure", "Monitor": "monitor"}.get(
+            self.normalize_combo.currentText())
+        return CorrectionSettings(
+            dark_file=self.dark_file_edit.text().strip() or None,
+            background_file=self.background_file_edit.text().strip() or None,
+            background_scale=float(self.background_scale_spin.value()),
+            normalize=normalize,
+            polarization=self.getPolarization(),
+            solid_angle=self.solid_angle_chk.isChecked(),
+        )
+
     def _browse_file(self):
         path, _ = QFileDialog.getOpenFileName(
             self,
@@ -233,7 +291,7 @@ class LoadSingleImageDialog(QDialog):
             output_space = "polar"
         else:
             output_space = "both"
-        polarization = float(self.polarization_spin.value())
+        polarization = self.getPolarization()
         solid_angle = self.solid_angle_chk.isChecked()
         metadata_entries = self.get_metadata()
         metadata = {}
@@ -258,7 +316,8 @@ class LoadSingleImageDialog(QDialog):
             output_space=output_space,
             polarization=polarization,
             solid_angle=solid_angle,
-            metadata_attributes=metadata
+            metadata_attributes=metadata,
+            corrections=self.getCorrections()
         )
         self.single_image_loaded.emit(single_image)
         super().accept()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+MemoryDialog: memory used by data objects, caches and plot layers.
+
+Reads a MemoryAccountant report (see dataclass.memory), grouped by category
+with a per-dataset breakdown, next to the process resident size, the
+spill budget of the DataObjectManager and the alert budget.
+"""
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QFormLayout, QLabel, QTreeWidget, QTreeWidgetItem,
+    QDoubleSpinBox, QDialogButtonBox, QPushButton, QHeaderView
+)
+from PyQt6.QtCore import Qt, QTimer
+
+from ...dataclass.memory import format_bytes, process_rss
+
+
+class MemoryDialog(QDialog):
+    def __init__(self, accountant, data_manager=None, parent=None, interval_ms=2000):
+        super().__init__(parent)
+        self.setWindowTitle("Memory Usage")
+        self.resize(520, 480)
+        self.accountant = accountant
+        self.data_manager = data_manager
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.total_label = QLabel()
+        self.rss_label = QLabel()
+        self.spill_label = QLabel()
+        self.budget_spin = QDoubleSpinBox()
+        self.budget_spin.setRange(1.0, 1024.0**2)
+        self.budget_spin.setDecimals(0)
+        self.budget_spin.setSuffix(" MB")
+        self.budget_spin.setValue(accountant.budget_bytes / 1024**2)
+        self.budget_spin.valueChanged.connect(
+            lambda mb: self.accountant.set_budget(int(mb * 1024**2)))
+        form.addRow("Tracked arrays:", self.total_label)
+        form.addRow("Process resident:", self.rss_label)
+        form.addRow("Data spill budget:", self.spill_label)
+        form.addRow("Alert budget:", self.budget_spin)
+        layout.addLayout(form)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Item", "Size"])
+        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.tree)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        refresh = QPushButton("Refresh")
+        buttons.addButton(refresh, QDialogButtonBox.ButtonRole.ActionRole)
+        refresh.clicked.connect(self.refresh)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(lambda: self.isVisible() and self.refresh())
+        self._timer.start()
+        self.refresh()
+
+    def _size_item(self, parent, name, size):
+        item = QTreeWidgetItem(parent, [name, format_bytes(size)])
+        item.setTextAlignment(1, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return item
+
+    def refresh(self):
+        items = self.accountant.report()
+        total, over = self.accountant.check(items)
+        expanded = {self.tree.topLevelItem(i).text(0).split(" (")[0]
+                    for i in range(self.tree.topLevelItemCount())
+                    if self.tree.topLevelItem(i).isExpanded()}
+        self.tree.clear()
+        groups = {}
+        for category, size in self.accountant.totals(items).items():
+            groups[category] = self._size_item(self.tree, category, size)
+        for item in sorted(items, key=lambda it: it.nbytes, reverse=True):
+            child = self._size_item(groups[item.category], item.name, item.nbytes)
+            for part, size in item.detail.items():
+                self._size_item(child, part, size)
+        for category, group in groups.items():
+            group.setText(0, f"{category} ({group.childCount()})")
+            group.setExpanded(not expanded or category in expanded)
+
+        self.total_label.setText(f"{format_bytes(total)} of {format_bytes(self.accountant.budget_bytes)}")
+        self.total_label.setStyleSheet("color: red; font-weight: bold;" if over else "")
+        rss = process_rss()
+        self.rss_label.setText(format_bytes(rss) if rss is not None else "unavailable")
+        if self.data_manager is not None:
+            self.spill_label.setText(
+                f"{format_bytes(self.data_manager.total_bytes())} of "
+                f"{format_bytes(self.data_manager.budget_bytes)} (older objects spill to disk)")
@@ -0,0 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import xarray as xr
+from PyQt6.QtWidgets import (
+    QDialog, QFormLayout, QComboBox, QDoubleSpinBox, QSpinBox, QPushButton,
+    QVBoxLayout, QHBoxLayout, QLabel
+)
+from PyQt6.QtCore import pyqtSignal
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+from ...analysis.series_reduction import ProfileReducer, Waterfall, series_coords, stream_waterfall
+from ...analysis.perf import timer
+from ..center_pane.image_view import resolve_q_axes
+
+_reduction_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ewald-waterfall")
+
+MODE_LABELS = {"Azimuthal I(q)": "azimuthal", "I(q_xy) over q_z band": "qxy",
+               "I(q_z) over q_xy band": "qz"}
+
+
+class WaterfallDialog(QDialog):
+    """
+    I(q) vs series-coordinate map of a SeriesImage. Frames are reduced chunk
+    by chunk on a worker thread and the map is redrawn after every chunk.
+    """
+    # (profiles, coords, q) snapshot emitted from the worker thread; None when done
+    chunkReduced = pyqtSignal(object)
+
+    def __init__(self, series, parent=None):
+        super().__init__(parent)
+        self.series = series
+        self.setWindowTitle(f"Waterfall: {series.data_name}")
+        self.waterfall = None
+        self._cancel = False
+        self._image = None
+        # q axes from the 1D coordinates only; lazy handles are never loaded whole
+        self._coords = series_coords(series)
+        _, self._qxy_key, self._qz_key = resolve_q_axes(xr.Dataset(coords=self._coords))
+        self._init_ui()
+        self.chunkReduced.connect(self._on_chunk)
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(list(MODE_LABELS))
+        form.addRow("Profile:", self.mode_combo)
+
+        self.range_min = QDoubleSpinBox()
+        self.range_max = QDoubleSpinBox()
+        for sb, value in ((self.range_min, 0.0), (self.range_max, 90.0)):
+            sb.setRange(-1000.0, 1000.0)
+            sb.setDecimals(3)
+            sb.setValue(value)
+        range_row = QHBoxLayout()
+        range_row.addWidget(self.range_min)
+        range_row.addWidget(self.range_max)
+        self.range_label = QLabel("Chi Range (°):")
+        form.addRow(self.range_label, range_row)
+        self.mode_combo.currentTextChanged.connect(self._on_mode_change)
+
+        self.chunk_spin = QSpinBox()
+        self.chunk_spin.setRange(1, 4096)
+        self.chunk_spin.setValue(32)
+        form.addRow("Frames per Chunk:", self.chunk_spin)
+        layout.addLayout(form)
+
+        buttons = QHBoxLayout()
+        self.compute_btn = QPushButton("Compute")
+        self.compute_btn.clicked.connect(self.compute)
+        self.status = QLabel("")
+        buttons.addWidget(self.compute_btn)
+        buttons.addWidget(self.status, 1)
+        layout.addLayout(buttons)
+
+        self.fig = Figure()
+        self.canvas = FigureCanvas(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        layout.addWidget(self.canvas)
+        self.resize(700, 600)
+
+    def _on_mode_change(self, text):
+        mode = MODE_LABELS[text]
+        if mode == 'azimuthal':
+            self.range_label.setText("Chi Range (°):")
+            self.range_min.setValue(0.0)
+            self.range_max.setValue(90.0)
+        else:
+            other = self._coords[self._qz_key if mode == 'qxy' else self._qxy_key]
+            self.range_label.setText("q_z Band (Å⁻¹):" if mode == 'qxy' else "q_xy Band (Å⁻¹):")
+            self.range_min.setValue(float(np.min(other)))
+            self.range_max.setValue(float(np.max(other)))
+
+    def reducer(self):
+        mode = MODE_LABELS[self.mode_combo.currentText()]
+        coords = self._coords
+        bounds = (self.range_min.value(), self.range_max.value())
+        kwargs = dict(chi_range=bounds) if mode == 'azimuthal' else dict(band=bounds)
+        return ProfileReducer(coords[self._qxy_key], coords[self._qz_key],
+                              mode=mode, **kwargs)
+
+    def compute(self):
+        self._cancel = False
+        reducer = self.reducer()
+        self.waterfall = Waterfall(reducer)
+        self._image = None
+        self.ax.cla()
+        self.compute_btn.setEnabled(False)
+
+        def _progress(waterfall):
+            self.chunkReduced.emit((waterfall.array.copy(), waterfall.coords, waterfall.q))
+            return self._cancel
+
+        def _run():
+            try:
+                stream_waterfall(self.series, reducer, self.chunk_spin.value(),
+                                 callback=_progress, waterfall=self.waterfall)
+            finally:
+                self.chunkReduced.emit(None)
+
+        _reduction_thread.submit(_run)
+
+    def _on_chunk(self, snapshot):
+        if snapshot is None:
+            self.compute_btn.setEnabled(True)
+            return
+        data, coords, q = snapshot
+        if len(data) == 0:
+            return
+        try:
+            y0, y1 = float(coords[0]), float(coords[-1])
+        except (TypeError, ValueError):
+            y0, y1 = 0.0, float(len(coords) - 1)
+        if y1 == y0:
+            y1 = y0 + 1.0
+        extent = [q[0], q[-1], y0, y1]
+        with timer('render.waterfall_scale'):
+            finite = data[np.isfinite(data)]
+            vmin, vmax = (np.percentile(finite, [1, 99.5]) if finite.size else (0.0, 1.0))
+        if self._image is None:
+            self._image = self.ax.imshow(data, origin='lower', aspect='auto', extent=extent,
+                                         cmap='viridis', vmin=vmin, vmax=vmax)
+            self.ax.set_xlabel(r'$q\,\mathrm{(\AA^{-1})}$')
+            self.ax.set_ylabel(self.series.dim_name)
+        else:
+            self._image.set_data(data)
+            self._image.set_extent(extent)
+            self._image.set_clim(vmin, vmax)
+        self.status.setText(f"{len(data)} frames reduced")
+        self.canvas.draw_idle()
+
+    def closeEvent(self, event):
+        self._cancel = True
+        super().closeEvent(event)
@@ -1,13 +1,17 @@
 # File: ewald/ui/left_pane/file_tree.py
 
 from PyQt6.QtWidgets import QTreeView
-from PyQt6.QtGui import QStandardItemModel, QStandardItem
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtGui import QStandardItemModel, QStandardItem, QIcon
+from PyQt6.QtCore import pyqtSignal, QSize
 
 class FileTreeView(QTreeView):
     """
     Left-hand browser for SingleImage objects.
     Emits `imageSelected(object)` with the clicked SingleImage.
+    When a data manager is set, only names are kept here and the clicked
+    object is fetched (and reloaded if spilled) through the manager.
+    With a ThumbnailService, items show a reciprocal-space preview icon and
+    a tooltip with the raw and reciprocal previews.
     """
     # generic Python object signal
     imageSelected = pyqtSignal("PyQt_PyObject")
@@ -21,13 +25,17 @@ class FileTreeView(QTreeView):
         # mappings for lookup
         self._data_objects = {}
         self._items = {}
+        self.data_manager = None
+        self.thumbnails = None
+        self._thumb_paths = {}  # name -> {'raw'|'recip': png path}
         # connect click
         self.clicked.connect(self.on_clicked)
 
     def add_data_object(self, data_object):
         name = data_object.data_name
         print(f"[FileTreeView] Adding data_object: {name}")
-        self._data_objects[name] = data_object
+        if self.data_manager is None:
+            self._data_objects[name] = data_object
 
         label = f"{name} ({data_object.type})"
         root_item = QStandardItem(label)
@@ -37,6 +45,31 @@ class FileTreeView(QTreeView):
 
         self.model.appendRow(root_item)
         self._items[name] = root_item
+        if self.thumbnails is not None:
+            self.thumbnails.request(name, data_object)
+
+    def set_thumbnail_service(self, service, icon_size: int = 48):
+        """Show previews from a ThumbnailService as item decorations and tooltips."""
+        self.thumbnails = service
+        self.setIconSize(QSize(icon_size, icon_size))
+        service.thumbnailReady.connect(self._on_thumbnail_ready)
+
+    def _on_thumbnail_ready(self, name, kind, path):
+        item = self._items.get(name)
+        if item is None:
+            return
+        paths = self._thumb_paths.setdefault(name, {})
+        paths[kind] = path
+        if kind == 'recip':
+            item.setIcon(QIcon(path))
+        cells = "".join(f"<td align='center'><img src='{paths[k]}'><br>{k}</td>"
+                        for k in ('raw', 'recip') if k in paths)
+        item.setToolTip(f"<b>{name}</b><table><tr>{cells}</tr></table>")
+
+    def set_data_manager(self, manager):
+        """Resolve clicked items through a DataObjectManager instead of holding references."""
+        self.data_manager = manager
+        self._data_objects.clear()
 
     def on_clicked(self, index):
         print(f"[FileTreeView] on_clicked at row={index.row()}, col={index.column()}")
@@ -50,7 +83,10 @@ class FileTreeView(QTreeView):
 
         name = item.text().split(' (', 1)[0]
         print(f"[FileTreeView] Clicked top-level: {name}")
-        single_image = self._data_objects.get(name)
+        if self.data_manager is not None:
+            single_image = self.data_manager.get(name) if name in self.data_manager else None
+        else:
+            single_image = self._data_objects.get(name)
         if single_image is None:
             print(f"[FileTreeView] No SingleImage found for {name}")
             return
@@ -0,0 +1,147 @@
+# File: ewald/ui/left_pane/thumbnails.py
+
+"""
+Thumbnail previews for data objects in the FileTreeView.
+
+Previews are block-averaged, log-scaled and colour-mapped on a background
+thread pool and written to a PNG disk cache keyed by a content hash, so
+browsing never goes through full-resolution matplotlib rendering. Lazy
+handles are keyed by their store entry and file mtime, which lets cached
+previews be shown without reading the arrays back from HDF5.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from matplotlib import colormaps
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from ...dataclass.project import LazyDataObject
+from ...analysis.perf import timed
+from ...analysis.series_reduction import series_frames
+from ..center_pane.image_view import resolve_q_axes
+
+THUMBNAIL_SIZE = 128
+DEFAULT_CACHE_DIR = Path(os.environ.get("EWALD_CACHE_DIR", Path.home() / ".cache" / "ewald")) / "thumbnails"
+
+
+def downsample(image: np.ndarray, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """Block-average a 2D array so its longest side is at most `size` pixels."""
+    image = np.asarray(image, dtype=np.float32)
+    factor = max(1, int(np.ceil(max(image.shape) / size)))
+    if factor == 1:
+        return image
+    h, w = (image.shape[0] // factor) * factor, (image.shape[1] // factor) * factor
+    blocks = image[:h, :w].reshape(h // factor, factor, w // factor, factor)
+    return np.nanmean(blocks, axis=(1, 3))
+
+
+@timed('render.thumbnail_scale')
+def to_rgba(image: np.ndarray, cmap: str = 'viridis') -> np.ndarray:
+    """Log-scale with percentile limits and map to uint8 RGBA (origin at the bottom)."""
+    data = np.log1p(np.clip(np.nan_to_num(image), 0, None))
+    lo, hi = np.percentile(data, [1, 99.5]) if data.size else (0.0, 1.0)
+    norm = np.clip((data - lo) / (hi - lo if hi > lo else 1.0), 0, 1)
+    rgba = colormaps[cmap](norm[::-1], bytes=True)
+    return np.ascontiguousarray(rgba)
+
+
+def to_qimage(rgba: np.ndarray) -> QImage:
+    h, w = rgba.shape[:2]
+    # copy() detaches the QImage from the NumPy buffer
+    return QImage(rgba.data, w, h, 4 * w, QImage.Format.Format_RGBA8888).copy()
+
+
+def _images(data_object):
+    """(kind, 2D array) previews of a data object: raw and reciprocal, or frame 0 of a series."""
+    out = []
+    if getattr(data_object, 'type', 'single') == 'series':
+        # lazy handles read only frame 0 from their store
+        frame = series_frames(data_object, 0, 1).isel({data_object.dim_name: 0})
+        out.append(('recip', resolve_q_axes(frame)[0].values))
+        return out
+    raw = getattr(data_object, 'raw_DS', None)
+    if raw is not None:
+        raw_da = raw if not hasattr(raw, 'data_vars') else raw[list(raw.data_vars)[0]]
+        out.append(('raw', np.squeeze(raw_da.values)))
+    recip = getattr(data_object, 'recip_DS', None)
+    if recip is not None:
+        out.append(('recip', resolve_q_axes(recip)[0].values))
+    return out
+
+
+def thumbnail_key(data_object) -> str:
+    """
+    Cache key for a data object. Lazy handles hash their store entry and
+    mtime; in-memory objects hash their image bytes.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(data_object, LazyDataObject):
+        store = Path(data_object.store_path)
+        mtime = store.stat().st_mtime if store.exists() else 0.0
+        h.update(f"{store.resolve()}|{data_object.entry}|{mtime}".encode())
+        return h.hexdigest()
+    for kind, image in _images(data_object):
+        image = np.ascontiguousarray(image)
+        h.update(kind.encode())
+        h.update(str(image.shape).encode())
+        h.update(image.tobytes())
+    return h.hexdigest()
+
+
+class ThumbnailService(QObject):
+    """
+    Generates and caches thumbnails on a background pool.
+
+    request(name, data_object) returns immediately; `thumbnailReady(name, kind,
+    path)` is emitted (queued onto the GUI thread) for each preview written.
+    """
+    thumbnailReady = pyqtSignal(str, str, str)  # data name, 'raw'|'recip', PNG path
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, size: int = THUMBNAIL_SIZE,
+                 max_workers: int = 2, parent=None):
+        super().__init__(parent)
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ewald-thumb")
+        self._pending = {}
+
+    def path_for(self, key: str, kind: str) -> Path:
+        return self.cache_dir / f"{key}_{kind}.png"
+
+    def request(self, name: str, data_object):
+        """Queue thumbnail generation for one data object (no-op while one is pending)."""
+        if name in self._pending and not self._pending[name].done():
+            return self._pending[name]
+        self._pending[name] = self._pool.submit(self._generate, name, data_object)
+        return self._pending[name]
+
+    def _generate(self, name, data_object):
+        key = thumbnail_key(data_object)
+        kinds = ('recip',) if getattr(data_object, 'type', 'single') == 'series' else ('raw', 'recip')
+        cached = {kind: self.path_for(key, kind) for kind in kinds}
+        if all(p.exists() for p in cached.values()):
+            for kind, path in cached.items():
+                self.thumbnailReady.emit(name, kind, str(path))
+            return cached
+
+        was_loaded = getattr(data_object, 'is_loaded', True)
+        written = {}
+        for kind, image in _images(data_object):
+            path = self.path_for(key, kind)
+            if not path.exists():
+                to_qimage(to_rgba(downsample(image, self.size))).save(str(path), "PNG")
+            written[kind] = path
+            self.thumbnailReady.emit(name, kind, str(path))
+        if not was_loaded:
+            # reading the preview should not keep a lazy handle's arrays resident
+            data_object.unload()
+        return written
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,60 +1,105 @@
 import sys
+from pathlib import Path
 from PyQt6.QtWidgets import (
     QMainWindow, QApplication, QSplitter, QDockWidget,
     QWidget, QVBoxLayout, QMenuBar, QMenu,
-    QDialog, QFormLayout, QLineEdit, QDialogButtonBox, QMessageBox
+    QDialog, QFormLayout, QLineEdit, QDialogButtonBox, QMessageBox,
+    QFileDialog, QInputDialog
 )
 from PyQt6.QtGui import QAction
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 import numpy as np
-from ewald.analysis.reciprocal_calculator import ReciprocalCalculator
+from ewald.analysis.peak_cache import PhasePeakCache
+from ewald.analysis import perf
+from ewald.analysis.perf import timed, timer
+from ewald.analysis.pattern_simulator import PatternSimulator
+from ewald.analysis.series_reduction import series_frames
+from ewald.dataclass.export import export_async
+from ewald.dataclass.project import save_project, load_project
+from ewald.dataclass.data_manager import DataObjectManager
+from ewald.dataclass.memory import MemoryAccountant, data_object_breakdown, format_bytes
+from ewald.dataclass.corrections import reference_cache_nbytes
 
 # UI components
 from .left_pane.file_tree import FileTreeView
-from .center_pane.image_view import ImageCanvas
+from .left_pane.thumbnails import ThumbnailService
+from .center_pane.image_view import create_image_canvas, resolve_q_axes
 from .bottom_pane.peak_table import PeakTableView
+from .bottom_pane.performance_panel import PerformancePanel
 from .right_pane.unit_cell_view import UnitCellView
 from .right_pane.structure_tree import StructureTreeView
 from .right_pane.cell_params import CellParamsEditor
 from .top_window.appmenubar import AppMenuBar
 from .top_window.maintoolbar import MainToolBar
 from .center_pane.roi_manager import ROIManager
+from .center_pane.series_scrubber import SeriesScrubber
 from .dialogs.load_single_image_dialog import LoadSingleImageDialog
+from .dialogs.load_series_dialog import LoadSeriesImageDialog
+from .dialogs.waterfall_dialog import WaterfallDialog
+from .dialogs.memory_dialog import MemoryDialog
 
-def rotate_lattice(a, b, c, axis, angle_deg):
-    """
-    Rotate lattice vectors a, b, c about `axis` by `angle_deg` degrees.
-    """
-    axis = np.array(axis, dtype=float)
-    axis /= np.linalg.norm(axis)
-    theta = np.deg2rad(angle_deg)
-    ux, uy, uz = axis
-    cth, sth = np.cos(theta), np.sin(theta)
-    R = np.array([
-        [cth + ux*ux*(1-cth),    ux*uy*(1-cth) - uz*sth, ux*uz*(1-cth) + uy*sth],
-        [uy*ux*(1-cth) + uz*sth, cth + uy*uy*(1-cth),    uy*uz*(1-cth) - ux*sth],
-        [uz*ux*(1-cth) - uy*sth, uz*uy*(1-cth) + ux*sth, cth + uz*uz*(1-cth)]
-    ], dtype=float)
-    return R.dot(a), R.dot(b), R.dot(c)
+# Marker styles cycled across simultaneously displayed structures
+PHASE_STYLES = [
+    dict(s=50, edgecolors='r', facecolors='none', marker='o'),
+    dict(s=50, edgecolors='cyan', facecolors='none', marker='s'),
+    dict(s=60, edgecolors='yellow', facecolors='none', marker='^'),
+    dict(s=60, edgecolors='magenta', facecolors='none', marker='D'),
+    dict(s=70, edgecolors='white', facecolors='none', marker='v'),
+]
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # emitted from the export thread; Qt queues it onto the GUI thread
+    exportFinished = pyqtSignal(str, str)  # path, error message ('' on success)
+
+    def __init__(self, render_backend=None):
         super().__init__()
-        # keep an in-memory store of data objects
-        self.data_objects = {}
+        # 'matplotlib' or 'pyqtgraph' center pane; None reads $EWALD_RENDER_BACKEND
+        self.render_backend = render_backend
+        # data objects, kept within a memory budget; older ones spill to disk
+        self.data_objects = DataObjectManager()
         self.xmin = self.xmax = None
         self.ymin = self.ymax = None
         self.current_lattice = None
         self.current_orientation = (0.0, 0.0, 0.0)
         self.peak_range = (1, 1, 1)
-        self.calc = None
+        self.current_structure_name = None
+        # 'single' draws oriented peaks, 'powder' draws orientation-free rings,
+        # 'fiber' draws (|q_xy|, q_z) spots averaged over phi
+        self.simulation_mode = 'single'
+        self.ring_chi_range = (0.0, 90.0)
+        # per-structure peak caches and the names currently overlaid
+        self.phases = {}
+        self.active_phases = []
+        # marker style per structure name, kept while the structure exists
+        self.phase_styles = {}
+        self._drawn_versions = {}
+        # simulated-pattern layer: settings, grid-bound simulator, displayed data
+        self.pattern_settings = None  # (sigma_chi, sigma_q, profile) when enabled
+        self.simulator = None
+        self.current_recip = None
+        self.current_data_object = None
+        # bytes per data object, cache and plot layer, checked against an alert budget
+        self.memory = MemoryAccountant()
+        self._memory_alerted = False
+        self._memory_dialog = None
 
         ## Setup the main UI
         self.setup_ui()
+        self._register_memory_sources()
         menu = AppMenuBar(self)
         self.setMenuBar(menu)
         menu.load_action.triggered.connect(self.load_files)
         menu.modify_range_action.triggered.connect(self.open_plot_range_dialog)
+        menu.export_action.triggered.connect(self.export_data_objects)
+        menu.export_figure_action.triggered.connect(self.export_figure)
+        menu.save_project_action.triggered.connect(self.save_project)
+        menu.open_project_action.triggered.connect(self.open_project)
+        menu.memory_budget_action.triggered.connect(self.set_memory_budget)
+        menu.memory_usage_action.triggered.connect(self.open_memory_dialog)
+        menu.waterfall_action.triggered.connect(self.open_waterfall)
+        menu.windows_menu.addAction(self.controls_dock.toggleViewAction())
+        menu.windows_menu.addAction(self.performance_dock.toggleViewAction())
+        self.exportFinished.connect(self._on_export_finished)
 
         ## Add the toolbar
         self.toolbar = MainToolBar(self)
@@ -82,24 +127,33 @@ class MainWindow(QMainWindow):
         # Left: File tree
         self.image_tree = FileTreeView(self)
         self.image_tree.setObjectName("fileTreeView")
+        self.image_tree.set_data_manager(self.data_objects)
+        self.thumbnails = ThumbnailService(parent=self)
+        self.image_tree.set_thumbnail_service(self.thumbnails)
         self.image_tree.imageSelected.connect(self.on_file_selected)
 
         # # Action to load single image
         # self.loadSingleImageAction.triggered.connect(self._show_load_single_dialog)
         ## Initialize the image canvas and peak table
-        self.image_canvas = ImageCanvas()
-        self.image_canvas.fig.set_facecolor('white')
+        self.image_canvas = create_image_canvas(self.render_backend)
+        self.image_canvas.setBackgroundColor('white')
         self.peak_table = PeakTableView()
+        # series playback bar, shown only while a SeriesImage is displayed
+        self.series_scrubber = SeriesScrubber(self.image_canvas)
+        self.series_scrubber.hide()
+        image_panel = QWidget()
+        image_layout = QVBoxLayout(image_panel)
+        image_layout.setContentsMargins(0, 0, 0, 0)
+        image_layout.addWidget(self.image_canvas)
+        image_layout.addWidget(self.series_scrubber)
 
         center_split = QSplitter(Qt.Orientation.Vertical)
-        center_split.addWidget(self.image_canvas)
+        center_split.addWidget(image_panel)
         center_split.addWidget(self.peak_table)
         center_split.setStretchFactor(0, 5)
         center_split.setStretchFactor(1, 1)
 
-        self.image_tree.imageSelected.connect(
-            lambda img: self.image_canvas.displayReciprocal(img.recip_DS)
-        )
+        self.image_tree.imageSelected.connect(self.display_data_object)
         
         main_split = QSplitter(Qt.Orientation.Horizontal)
         main_split.addWidget(self.image_tree)
@@ -122,6 +176,15 @@ class MainWindow(QMainWindow):
         dock.setWidget(right_split)
         dock.setMinimumWidth(250)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, dock)
+        self.controls_dock = dock
+
+        # hot-path timers (analysis.perf); hidden unless timing was enabled at startup
+        self.performance_panel = PerformancePanel(self)
+        self.performance_dock = QDockWidget("Performance", self)
+        self.performance_dock.setObjectName("performanceDock")
+        self.performance_dock.setWidget(self.performance_panel)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.performance_dock)
+        self.performance_dock.setVisible(perf.enabled())
 
         self.cell_params.latticeChanged.connect(self.on_lattice_changed)
         self.cell_params.orientationChanged.connect(self.on_orientation_changed)
@@ -130,11 +193,17 @@ class MainWindow(QMainWindow):
         self.cell_params.orientationChanged.connect(self.update_tree_rotation)
 
         self.cell_params.peakRangeChanged.connect(self.on_peak_range_changed)
+        self.cell_params.simulationModeChanged.connect(self.on_simulation_mode_changed)
+        self.cell_params.ringChiRangeChanged.connect(self.on_ring_chi_range_changed)
+        self.cell_params.contactPlaneChanged.connect(self.on_contact_plane_changed)
+        self.cell_params.patternSimulationChanged.connect(self.on_pattern_simulation_changed)
         self.cell_params.customStructureAdded.connect(
             lambda name, sys_, a,b,c,alpha,beta,gamma: self.struct_tree.addCustomStructure(
                 name, sys_, a,b,c,alpha,beta,gamma)
         )
         self.struct_tree.structureSelected.connect(self.on_structure_selected)
+        self.struct_tree.structureToggled.connect(self.on_structure_toggled)
+        self.struct_tree.structureDeleted.connect(self.on_structure_deleted)
 
     ## --- Single Image Loading Logic ---
     # Initialie the dialog box
@@ -142,7 +211,10 @@ class MainWindow(QMainWindow):
         # Single image loader dialog
         self.loadSingleDialog = LoadSingleImageDialog(self)
         # Series images loader dialog
-        # self.loadSeriesDialog = LoadSeriesImageDialog(self)
+        self.loadSeriesDialog = LoadSeriesImageDialog(self)
+        self.loadSeriesDialog.series_loaded.connect(self._on_new_series)
+        self.loadSeriesDialog.series_failed.connect(
+            lambda msg: QMessageBox.critical(self, "Series Loading Failed", msg))
 
     # Run dialog window
     def openLoadSingleImageDialog(self):
@@ -165,9 +237,19 @@ class MainWindow(QMainWindow):
         index = self.image_tree.model.indexFromItem(self.image_tree._items[name])
         self.image_tree.setCurrentIndex(index)
 
+    def _on_new_series(self, series_images):
+        for series in series_images:
+            if series.data_name in self.data_objects:
+                QMessageBox.warning(self, "Duplicate Data Name",
+                                    f"A data object named '{series.data_name}' already exists.")
+                continue
+            self.data_objects[series.data_name] = series
+            self.image_tree.add_data_object(series)
+        self.statusBar().showMessage(f"Loaded {len(series_images)} series", 5000)
+
     def update_tree_rotation(self, omega, chi, phi):
         # push into the tree model
-        if hasattr(self, "current_structure_name"):
+        if self.current_structure_name is not None:
             self.struct_tree.updateStructureRotation(
                 self.current_structure_name,
                 omega, chi, phi
@@ -176,15 +258,213 @@ class MainWindow(QMainWindow):
     def load_files(self):
         pass
 
+    def save_project(self):
+        """Save data references, structures, ROIs and calculated peaks to a .ewld file."""
+        path, _ = QFileDialog.getSaveFileName(self, "Save Project", "", "EWALD Project (*.ewld)")
+        if not path:
+            return
+        structures = self.struct_tree.structures()
+        for rec in structures:
+            phase = self.phases.get(rec["Name"])
+            if phase is not None:
+                rec["orientation"] = list(phase.orientation)
+                rec["contact_plane"] = list(phase.contact_plane)
+                rec["peak_range"] = list(phase.peak_range)
+        peaks = {}
+        for name, phase in self.phases.items():
+            qxy_vals, qz_vals, hkl = phase.peaks()
+            peaks[name] = [[float(x), float(y), int(h), int(k), int(l)]
+                           for x, y, (h, k, l) in zip(qxy_vals, qz_vals, hkl)]
+        try:
+            save_project(path, self.data_objects.values(), structures,
+                         self.roi_manager.roi_boxes(), peaks)
+        except (OSError, ImportError) as err:
+            QMessageBox.warning(self, "Save Project", str(err))
+            return
+        self.statusBar().showMessage(f"Saved project {path}", 5000)
+
+    def open_project(self):
+        """
+        Open a .ewld file. Data objects are added as lazy handles, so the file
+        tree fills immediately and arrays load only when an item is clicked.
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Open Project", "", "EWALD Project (*.ewld)")
+        if not path:
+            return
+        try:
+            project = load_project(path)
+        except (OSError, ValueError) as err:
+            QMessageBox.warning(self, "Open Project", str(err))
+            return
+        for handle in project.lazy_data_objects(Path(path).parent):
+            if handle.data_name in self.data_objects:
+                continue
+            self.data_objects[handle.data_name] = handle
+            self.image_tree.add_data_object(handle)
+
+        lattice_keys = ("a", "b", "c", "alpha", "beta", "gamma")
+        existing = {r["Name"]: r for r in self.struct_tree.structures()}
+        for rec in project.structures:
+            name = rec["Name"]
+            lattice = tuple(float(rec[k]) for k in lattice_keys)
+            if name in existing or name in self.phases:
+                # the same structure is already open; a different one gets a new name
+                if name in existing and np.allclose(
+                        [float(existing[name][k]) for k in lattice_keys], lattice, atol=1e-2):
+                    continue
+                name = self._unique_structure_name(name, existing)
+            existing[name] = rec
+            self.struct_tree.addCustomStructure(name, rec.get("System", "Custom"), *lattice)
+            orientation = rec.get("orientation", (0.0, 0.0, 0.0))
+            self.struct_tree.updateStructureRotation(name, *orientation)
+            phase = PhasePeakCache(name, lattice, orientation,
+                                   rec.get("peak_range", self.peak_range),
+                                   rec.get("contact_plane", (0, 0, 1)))
+            saved = project.peaks.get(rec["Name"])
+            if saved:
+                qxy_vals, qz_vals, h, k, l = zip(*saved)
+                phase.seed(qxy_vals, qz_vals, list(zip(h, k, l)))
+            self.phases[name] = phase
+            if rec.get("checked"):
+                self._set_phase_active(name, True)
+
+        for box in project.rois:
+            self.roi_manager.add_roi_box(box["x"], box["y"], box["width"], box["height"])
+        self.compute_peaks()
+
+    def _unique_structure_name(self, name, taken):
+        """`name (2)`, `name (3)`, ... : the first not in `taken` or self.phases."""
+        n = 2
+        while f"{name} ({n})" in taken or f"{name} ({n})" in self.phases:
+            n += 1
+        return f"{name} ({n})"
+
+    def _register_memory_sources(self):
+        self.memory.register("Data objects", lambda: {
+            name: (sum(parts.values()), parts)
+            for name, parts in ((n, data_object_breakdown(o)) for n, o in self.data_objects.items())
+        })
+        self.memory.register("Caches", lambda: {
+            "Series frame cache": self.series_scrubber.cache.nbytes(),
+            "Peak caches": (sum(p.nbytes() for p in self.phases.values()),
+                            {name: p.nbytes() for name, p in self.phases.items()}),
+            "Pattern simulator": self.simulator.nbytes() if self.simulator is not None else 0,
+            "Correction references": reference_cache_nbytes(),
+        })
+        self.memory.register("Plot layers", self.image_canvas.memoryLayers)
+        self._memory_timer = QTimer(self)
+        self._memory_timer.setInterval(5000)
+        self._memory_timer.timeout.connect(self._check_memory)
+        self._memory_timer.start()
+
+    def _check_memory(self):
+        """Warn once each time tracked memory rises above the alert budget."""
+        total, over = self.memory.check()
+        if over and not self._memory_alerted:
+            message = (f"Tracked memory {format_bytes(total)} exceeds the alert budget "
+                       f"of {format_bytes(self.memory.budget_bytes)}.")
+            self.statusBar().showMessage(message, 10000)
+            box = QMessageBox(QMessageBox.Icon.Warning, "Memory Budget Exceeded",
+                              message + "\nSee Data Manager > Memory Usage for details.",
+                              QMessageBox.StandardButton.Ok, self)
+            box.setModal(False)
+            box.show()
+        self._memory_alerted = over
+
+    def open_memory_dialog(self):
+        if self._memory_dialog is None:
+            self._memory_dialog = MemoryDialog(self.memory, self.data_objects, self)
+        self._memory_dialog.refresh()
+        self._memory_dialog.show()
+        self._memory_dialog.raise_()
+
+    def set_memory_budget(self):
+        current_mb = self.data_objects.budget_bytes / 1024**2
+        value, ok = QInputDialog.getDouble(
+            self, "Memory Budget", "Budget for loaded datasets (MB):",
+            current_mb, 1.0, 1024.0**2, 0)
+        if ok:
+            self.data_objects.set_budget(int(value * 1024**2))
+
+    def export_data_objects(self):
+        """Write all loaded data objects into one compressed HDF5 file in the background."""
+        if not self.data_objects:
+            QMessageBox.information(self, "Export", "No data objects to export.")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Data Objects", "", "HDF5 Files (*.h5 *.nxs)")
+        if not path:
+            return
+        try:
+            future = export_async(path, self.data_objects.values())
+        except ImportError as err:
+            QMessageBox.warning(self, "Export", str(err))
+            return
+
+        def _done(fut, path=path):
+            err = fut.exception()
+            self.exportFinished.emit(path, "" if err is None else str(err))
+
+        future.add_done_callback(_done)
+        self.statusBar().showMessage(f"Exporting {len(self.data_objects)} data object(s) to {path}...")
+
+    def export_figure(self):
+        """Save the main image with its overlays as a Matplotlib figure (any render backend)."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Figure", "", "Images (*.png *.pdf *.svg *.tif)")
+        if not path:
+            return
+        try:
+            self.image_canvas.exportFigure(path)
+        except (OSError, ValueError) as err:
+            QMessageBox.warning(self, "Export Figure", str(err))
+            return
+        self.statusBar().showMessage(f"Saved figure to {path}", 5000)
+
+    def _on_export_finished(self, path, error):
+        if error:
+            QMessageBox.warning(self, "Export Failed", error)
+            self.statusBar().clearMessage()
+        else:
+            self.statusBar().showMessage(f"Exported to {path}", 5000)
+
     def on_file_selected(self, path: str):
         self.compute_peaks()
 
+    def display_data_object(self, data_object):
+        if data_object.type == 'series':
+            # show the first frame of the stack (lazy handles read just that frame)
+            recip = series_frames(data_object, 0, 1).isel({data_object.dim_name: 0})
+        else:
+            recip = data_object.recip_DS
+        if recip is not self.current_recip:
+            # the simulator's lookup table is bound to the image grid
+            self.simulator = None
+        self.current_recip = recip
+        self.current_data_object = data_object
+        self.series_scrubber.clearSeries()
+        self.image_canvas.displayReciprocal(recip)
+        if data_object.type == 'series':
+            self.series_scrubber.setSeries(data_object)
+            self.series_scrubber.show()
+        else:
+            self.series_scrubber.hide()
+
+    def open_waterfall(self):
+        series = self.current_data_object
+        if series is None or series.type != 'series':
+            QMessageBox.information(self, "Series Waterfall",
+                                    "Select a series data object first.")
+            return
+        dlg = WaterfallDialog(series, self)
+        dlg.show()
+        dlg.compute()
+
     def open_plot_range_dialog(self):
         dlg = QDialog(self)
         dlg.setWindowTitle("Modify Plot Range")
         form = QFormLayout(dlg)
-        cur_xlim = self.image_canvas.ax_main.get_xlim()
-        cur_ylim = self.image_canvas.ax_main.get_ylim()
+        cur_xlim, cur_ylim = self.image_canvas.viewLimits()
         self.xmin_edit = QLineEdit(str(cur_xlim[0] if self.xmin is None else self.xmin))
         self.xmax_edit = QLineEdit(str(cur_xlim[1] if self.xmax is None else self.xmax))
         self.ymin_edit = QLineEdit(str(cur_ylim[0] if self.ymin is None else self.ymin))
@@ -210,86 +490,258 @@ class MainWindow(QMainWindow):
     def on_lattice_changed(self, a, b, c, alpha, beta, gamma):
         self.current_lattice = (a, b, c, alpha, beta, gamma)
         self.unit_cell_view.setCell(a, b, c, alpha, beta, gamma)
-        self.calc = ReciprocalCalculator(a, b, c, alpha, beta, gamma)
+        phase = self._current_phase()
+        if phase is not None:
+            phase.set_lattice(a, b, c, alpha, beta, gamma)
         self.compute_peaks()
 
     def on_orientation_changed(self, omega, chi, phi):
+        previous = self.current_orientation
         self.current_orientation = (omega, chi, phi)
         self.unit_cell_view.setOrientation(omega, chi, phi)
+        phase = self._current_phase()
+        if phase is not None:
+            phase.set_orientation(omega, chi, phi)
+        # fiber peaks are independent of phi, and powder rings of any rotation
+        if self.simulation_mode == 'powder':
+            return
+        if self.simulation_mode == 'fiber' and previous[:2] == (omega, chi):
+            return
+        self.compute_peaks()
+
+    def on_contact_plane_changed(self, h, k, l):
+        if (h, k, l) == (0, 0, 0):
+            # transient while editing; keep the last valid plane
+            return
+        phase = self._current_phase()
+        if phase is not None:
+            phase.set_contact_plane(h, k, l)
         self.compute_peaks()
 
     def on_peak_range_changed(self, hmax, kmax, lmax):
         self.peak_range = (hmax, kmax, lmax)
+        for phase in self.phases.values():
+            phase.set_peak_range(hmax, kmax, lmax)
         self.compute_peaks()
 
+    def on_simulation_mode_changed(self, mode):
+        self.simulation_mode = mode
+        self.compute_peaks()
+
+    def on_ring_chi_range_changed(self, chi_min, chi_max):
+        self.ring_chi_range = (chi_min, chi_max)
+        # arcs change shape for every structure, not just stale ones
+        self._drawn_versions.clear()
+        self.compute_peaks()
+
+    def on_pattern_simulation_changed(self, enabled, sigma_chi, sigma_q, profile):
+        self.pattern_settings = (sigma_chi, sigma_q, profile) if enabled else None
+        self.update_simulated_pattern()
+
+    def update_simulated_pattern(self):
+        """
+        Render the active structures' peaks, broadened by mosaicity and
+        instrumental resolution, on the grid of the displayed image.
+        """
+        if self.pattern_settings is None or self.current_recip is None \
+                or self.simulation_mode == 'powder':
+            self.image_canvas.removeSimulatedLayer()
+            return
+        da, qxy_key, qz_key = resolve_q_axes(self.current_recip)
+        q_xy = da.coords[qxy_key].values
+        q_z = da.coords[qz_key].values
+        if self.simulator is None:
+            self.simulator = PatternSimulator(q_xy, q_z)
+        qxy_all, qz_all, weights = [], [], []
+        for name in self.active_phases:
+            phase = self.phases[name]
+            if self.simulation_mode == 'fiber':
+                qxy_vals, qz_vals, hkl, mult = phase.fiber_peaks()
+            else:
+                qxy_vals, qz_vals, hkl = phase.peaks()
+                mult = np.ones_like(qxy_vals)
+            qxy_all.append(qxy_vals)
+            qz_all.append(qz_vals)
+            weights.append(mult)
+        if not qxy_all:
+            self.image_canvas.removeSimulatedLayer()
+            return
+        sigma_chi, sigma_q, profile = self.pattern_settings
+        sim = self.simulator.render(np.concatenate(qxy_all), np.concatenate(qz_all),
+                                    np.concatenate(weights), sigma_chi=sigma_chi,
+                                    sigma_q=sigma_q, mosaic_profile=profile)
+        extent = [float(q_xy.min()), float(q_xy.max()), float(q_z.min()), float(q_z.max())]
+        self.image_canvas.setSimulatedLayer(sim, extent)
+
     def on_structure_selected(self, name, sys_, a, b, c, alpha, beta, gamma):
         self.current_structure_name = name
         self.current_lattice = (a, b, c, alpha, beta, gamma)
-        self.calc = ReciprocalCalculator(a, b, c, alpha, beta, gamma)
-        self.current_orientation = (0.0, 0.0, 0.0)
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = PhasePeakCache(name, self.current_lattice, peak_range=self.peak_range)
+            self.phases[name] = phase
+            # a structure is drawn when first selected; afterwards its checkbox decides
+            self._set_phase_active(name, True)
+        else:
+            phase.set_lattice(a, b, c, alpha, beta, gamma)
+        # restore this structure's own orientation instead of resetting it
+        self.current_orientation = phase.orientation
+        self.cell_params.setOrientation(*phase.orientation)
+        self.cell_params.setContactPlane(*phase.contact_plane)
         self.unit_cell_view.setCell(a, b, c, alpha, beta, gamma)
-        self.unit_cell_view.setOrientation(0.0, 0.0, 0.0)
+        self.unit_cell_view.setOrientation(*phase.orientation)
         self.compute_peaks()
 
-    def compute_peaks(self):
-        if not self.calc or self.current_lattice is None:
-            return
-        a, b, c, alpha, beta, gamma = self.current_lattice
-        omega, chi, phi = self.current_orientation
-        # Rotate real-space cell
-        a_vec, b_vec, c_vec = self.calc.a_vec, self.calc.b_vec, self.calc.c_vec
-        a_r, b_r, c_r = rotate_lattice(a_vec, b_vec, c_vec, [1,0,0], omega)
-        a_r, b_r, c_r = rotate_lattice(a_r, b_r, c_r, [0,1,0], chi)
-        a_r, b_r, c_r = rotate_lattice(a_r, b_r, c_r, [0,0,1], phi)
-        self.calc.update_reciprocal(a_r, b_r, c_r)
-        hmax, kmax, lmax = self.peak_range
-        peaks = self.calc.find_peaks(hkl_range=range(-hmax, hmax+1), target_q=None, tol=0.0)
-        qxy_vals, qz_vals, data_peaks = [], [], []
-        for (h,k,l), q_mag, chi_deg in peaks:
-            cr = np.deg2rad(chi_deg)
-            qxy_val = q_mag * np.sin(cr)
-            qz_val = q_mag * np.cos(cr)
-            if qxy_val <= 0 or qz_val <= 0:
-                continue
-            qxy_vals.append(qxy_val)
-            qz_vals.append(qz_val)
-            data_peaks.append((qxy_val, qz_val, h, k, l))
-        if not qxy_vals:
+    def on_structure_toggled(self, name, checked):
+        if checked and name not in self.phases:
+            # lattice is only known once the row has been selected
             return
-        ax = self.image_canvas.ax_main
-        self.image_canvas.clear()
+        self._set_phase_active(name, checked)
+        self.compute_peaks()
+
+    def on_structure_deleted(self, name):
+        self.phases.pop(name, None)
+        self.phase_styles.pop(name, None)
+        self._set_phase_active(name, False)
+        if name == self.current_structure_name:
+            self.current_structure_name = None
+        self.compute_peaks()
+
+    def _current_phase(self):
+        """
+        Return the peak cache of the selected structure. Lattices applied
+        before any structure is selected go to an 'Untitled' phase.
+        """
+        if self.current_lattice is None:
+            return None
+        name = self.current_structure_name or "Untitled"
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = PhasePeakCache(name, self.current_lattice,
+                                   self.current_orientation, self.peak_range)
+            self.phases[name] = phase
+            self._set_phase_active(name, True)
+        return phase
+
+    def _phase_style(self, name):
+        """Marker style of a structure: the first one no other structure uses."""
+        if name not in self.phase_styles:
+            used = set(self.phase_styles.values())
+            free = [i for i in range(len(PHASE_STYLES)) if i not in used]
+            self.phase_styles[name] = free[0] if free else len(self.phase_styles) % len(PHASE_STYLES)
+        return PHASE_STYLES[self.phase_styles[name]]
+
+    def _set_phase_active(self, name, active):
+        if active and name not in self.active_phases:
+            self.active_phases.append(name)
+        elif not active and name in self.active_phases:
+            self.active_phases.remove(name)
+        self.struct_tree.setStructureChecked(name, active)
+
+    @timed('ui.compute_peaks')
+    def compute_peaks(self):
+        """
+        Redraw the overlay of every active structure. Only structures whose
+        lattice, orientation or hkl range changed are recomputed; in powder
+        mode orientation changes do not recompute or redraw anything, and in
+        fiber mode neither do phi changes.
+        """
+        powder = self.simulation_mode == 'powder'
+        fiber = self.simulation_mode == 'fiber'
+        canvas = self.image_canvas
+        # drop overlays of inactive structures and of the other mode
+        for name in canvas.peakOverlayNames():
+            if powder or name not in self.active_phases:
+                canvas.removePeakOverlay(name, redraw=False)
+                self._drawn_versions.pop(name, None)
+        for name in canvas.ringOverlayNames():
+            if not powder or name not in self.active_phases:
+                canvas.removeRingOverlay(name, redraw=False)
+                self._drawn_versions.pop(name, None)
+
+        qxy_all, qz_all = [], []
+        for name in self.active_phases:
+            phase = self.phases[name]
+            style = self._phase_style(name)
+            if powder:
+                q_vals, mult, hkl = phase.rings()
+                qxy_all.append(q_vals)
+                qz_all.append(q_vals)
+                version = ('powder', phase.ring_version)
+                if self._drawn_versions.get(name) != version:
+                    canvas.setRingOverlay(name, q_vals, chi_range=self.ring_chi_range,
+                                          redraw=False, colors=style['edgecolors'], linewidths=1.0)
+                    self._drawn_versions[name] = version
+            else:
+                if fiber:
+                    qxy_vals, qz_vals, hkl, mult = phase.fiber_peaks()
+                    version = ('fiber', phase.fiber_version)
+                else:
+                    qxy_vals, qz_vals, hkl = phase.peaks()
+                    version = ('single', phase.version)
+                qxy_all.append(qxy_vals)
+                qz_all.append(qz_vals)
+                if self._drawn_versions.get(name) != version:
+                    canvas.setPeakOverlay(name, qxy_vals, qz_vals, redraw=False, **style)
+                    self._drawn_versions[name] = version
+
+        current = self.phases.get(self.current_structure_name or "Untitled")
+        with timer('ui.peak_table'):
+            self.peak_table.calc_model.clear()
+            if current is not None and current.name in self.active_phases:
+                if powder:
+                    q_vals, mult, hkl = current.rings()
+                    self.peak_table.calc_model.add_rings(
+                        (float(q), int(m), int(h), int(k), int(l))
+                        for q, m, (h, k, l) in zip(q_vals, mult, hkl)
+                    )
+                else:
+                    qxy_vals, qz_vals, hkl = current.fiber_peaks()[:3] if fiber else current.peaks()
+                    self.peak_table.calc_model.add_peaks(
+                        (float(x), float(y), int(h), int(k), int(l))
+                        for x, y, (h, k, l) in zip(qxy_vals, qz_vals, hkl)
+                    )
+
+        qxy_all = np.concatenate(qxy_all) if qxy_all else np.empty(0)
+        qz_all = np.concatenate(qz_all) if qz_all else np.empty(0)
         if self.xmin is not None:
-            ax.set_xlim(self.xmin, self.xmax)
-        else:
-            ax.set_xlim(min(qxy_vals)*0.9, max(qxy_vals)*1.1)
+            canvas.setViewLimits(xlim=(self.xmin, self.xmax))
+        elif qxy_all.size:
+            canvas.setViewLimits(xlim=(qxy_all.min()*0.9, qxy_all.max()*1.1))
         if self.ymin is not None:
-            ax.set_ylim(self.ymin, self.ymax)
-        else:
-            ax.set_ylim(min(qz_vals)*0.9, max(qz_vals)*1.1)
-        ax.scatter(qxy_vals, qz_vals, s=50, edgecolors='r', facecolors='none')
-        self.image_canvas.canvas.draw()
-        self.peak_table.calc_model.clear()
-        self.peak_table.calc_model.add_peaks(data_peaks)
+            canvas.setViewLimits(ylim=(self.ymin, self.ymax))
+        elif qz_all.size:
+            canvas.setViewLimits(ylim=(qz_all.min()*0.9, qz_all.max()*1.1))
+        if self.pattern_settings is not None:
+            self.update_simulated_pattern()
+        canvas.requestRedraw()
 
     def openLoadSeriesImageDialog(self):
-        self.loadSeriesDialog.show()
+        self.loadSeriesDialog.exec()
 
     # Handlers for toolbar file-loading signals
     def onPoniLoaded(self, filePath: str):
         """Receive new PONI path and add to single-image dialog dropdown."""
-        try:
-            self.loadSingleDialog.addPoniFile(filePath)
-        except AttributeError:
-            # Fallback: reload full list
-            self.loadSingleDialog.reloadPoniList()
+        for dlg in (self.loadSingleDialog, self.loadSeriesDialog):
+            try:
+                dlg.addPoniFile(filePath)
+            except AttributeError:
+                # Fallback: reload full list
+                dlg.reloadPoniList()
 
     def onMaskLoaded(self, filePath: str):
         """Receive new mask path and add to single-image dialog dropdown."""
-        try:
-            self.loadSingleDialog.addMaskFile(filePath)
-        except AttributeError:
-            # Fallback: reload full list
-            self.loadSingleDialog.reloadMaskList()
+        for dlg in (self.loadSingleDialog, self.loadSeriesDialog):
+            try:
+                dlg.addMaskFile(filePath)
+            except AttributeError:
+                # Fallback: reload full list
+                dlg.reloadMaskList()
+
+    def closeEvent(self, event):
+        # spilled objects live in a temporary folder that only this session uses
+        self.data_objects.close()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -6,10 +6,22 @@ Tabs: "Lattice", "Orientation", "Bragg".
 from PyQt6.QtWidgets import (
     QWidget, QTabWidget, QFormLayout, QDoubleSpinBox,
     QSpinBox, QVBoxLayout, QPushButton, QComboBox, QLineEdit,
-    QSlider, QLabel
+    QSlider, QLabel, QCheckBox
 )
 from PyQt6.QtCore import pyqtSignal, Qt
 
+# Crystal system -> default (a, b, c, alpha, beta, gamma)
+LATTICE_PRESETS = {
+    "Triclinic":    (1.0,1.2,1.3,100.0,110.0,120.0),
+    "Monoclinic":   (1.0,1.1,1.3, 90.0,110.0, 90.0),
+    "Orthorhombic": (1.0,1.2,1.3, 90.0, 90.0, 90.0),
+    "Tetragonal":   (1.0,1.0,1.2, 90.0, 90.0, 90.0),
+    "Trigonal":     (1.0,1.0,1.0, 60.0, 60.0, 60.0),
+    "Hexagonal":    (1.0,1.0,1.5, 90.0, 90.0,120.0),
+    "Cubic":        (1.0,1.0,1.0, 90.0, 90.0, 90.0),
+    "Custom":       None
+}
+
 
 class CellParamsEditor(QWidget):
     # Signals
@@ -18,6 +30,18 @@ class CellParamsEditor(QWidget):
     peakRangeChanged        = pyqtSignal(int, int, int)
     calculateRequested      = pyqtSignal()
     customStructureAdded    = pyqtSignal(str, str, float, float, float, float, float, float)
+    simulationModeChanged   = pyqtSignal(str)
+    ringChiRangeChanged     = pyqtSignal(float, float)
+    contactPlaneChanged     = pyqtSignal(int, int, int)
+    # enabled, mosaic sigma (deg), instrumental sigma_q (1/Å), mosaic profile
+    patternSimulationChanged = pyqtSignal(bool, float, float, str)
+
+    # Bragg-tab mode label -> mode key used by the main window
+    SIMULATION_MODES = {
+        "Single Crystal": "single",
+        "Powder Rings":   "powder",
+        "Fiber Texture":  "fiber",
+    }
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -59,17 +83,19 @@ class CellParamsEditor(QWidget):
         # 2) Sliders
         # map unicode to spinboxes
         orient_map = {"ω": self.spin_omega, "χ": self.spin_chi, "φ": self.spin_phi}
+        self.orient_sliders = []
         for label_sym, slider in [("ω", QSlider(Qt.Orientation.Horizontal)),
                                   ("χ", QSlider(Qt.Orientation.Horizontal)),
                                   ("φ", QSlider(Qt.Orientation.Horizontal))]:
             slider.setRange(-360, 360)
+            self.orient_sliders.append(slider)
             v_orient.addWidget(QLabel(f"{label_sym} slider"))
             v_orient.addWidget(slider)
 
             # keep spinbox and slider in sync
             sb = orient_map[label_sym]
             slider.valueChanged.connect(sb.setValue)
-            sb.valueChanged.connect(slider.setValue)
+            sb.valueChanged.connect(lambda v, sl=slider: sl.setValue(int(round(v))))
 
             # broadcast orientationChanged on any change
             sb.valueChanged.connect(lambda _, s=self: s.orientationChanged.emit(
@@ -87,6 +113,49 @@ class CellParamsEditor(QWidget):
         for label, spin in [("h_max", self.spin_h),("k_max", self.spin_k),("l_max", self.spin_l)]:
             spin.setRange(0, 10)
             form_bragg.addRow(label, spin)
+        # Simulation mode: oriented peaks or orientation-independent rings
+        self.combo_mode = QComboBox()
+        self.combo_mode.addItems(self.SIMULATION_MODES.keys())
+        self.combo_mode.currentTextChanged.connect(self._on_mode_change)
+        form_bragg.addRow("Mode", self.combo_mode)
+        # contact plane (film normal) for fiber texture
+        self.spin_contact_h = QSpinBox(); self.spin_contact_k = QSpinBox(); self.spin_contact_l = QSpinBox()
+        for label, spin, val in [("Contact h", self.spin_contact_h, 0),
+                                 ("Contact k", self.spin_contact_k, 0),
+                                 ("Contact l", self.spin_contact_l, 1)]:
+            spin.setRange(-10, 10)
+            spin.setValue(val)
+            spin.valueChanged.connect(lambda _, s=self: s.contactPlaneChanged.emit(
+                s.spin_contact_h.value(), s.spin_contact_k.value(), s.spin_contact_l.value()))
+            form_bragg.addRow(label, spin)
+        # chi window for rings; narrower than 0-90 draws fiber arcs
+        self.spin_chi_min = QDoubleSpinBox(); self.spin_chi_max = QDoubleSpinBox()
+        for label, spin, val in [("Ring χ min", self.spin_chi_min, 0.0),
+                                 ("Ring χ max", self.spin_chi_max, 90.0)]:
+            spin.setRange(0.0, 90.0)
+            spin.setDecimals(1)
+            spin.setValue(val)
+            spin.valueChanged.connect(lambda _, s=self: s.ringChiRangeChanged.emit(
+                s.spin_chi_min.value(), s.spin_chi_max.value()))
+            form_bragg.addRow(label, spin)
+        # Broadened pattern simulation (mosaicity + instrumental resolution)
+        self.sim_chk = QCheckBox("Simulate pattern")
+        self.spin_mosaic = QDoubleSpinBox(); self.spin_mosaic.setRange(0.0, 45.0)
+        self.spin_mosaic.setDecimals(2); self.spin_mosaic.setValue(1.0)
+        self.spin_sigma_q = QDoubleSpinBox(); self.spin_sigma_q.setRange(0.0, 0.5)
+        self.spin_sigma_q.setDecimals(4); self.spin_sigma_q.setSingleStep(0.001); self.spin_sigma_q.setValue(0.005)
+        self.combo_profile = QComboBox(); self.combo_profile.addItems(["gaussian", "lorentzian"])
+        form_bragg.addRow(self.sim_chk)
+        form_bragg.addRow("Mosaic σ (°)", self.spin_mosaic)
+        form_bragg.addRow("Resolution σ_q", self.spin_sigma_q)
+        form_bragg.addRow("Mosaic profile", self.combo_profile)
+        emit_sim = lambda *_, s=self: s.patternSimulationChanged.emit(
+            s.sim_chk.isChecked(), s.spin_mosaic.value(),
+            s.spin_sigma_q.value(), s.combo_profile.currentText())
+        self.sim_chk.toggled.connect(emit_sim)
+        self.spin_mosaic.valueChanged.connect(emit_sim)
+        self.spin_sigma_q.valueChanged.connect(emit_sim)
+        self.combo_profile.currentTextChanged.connect(emit_sim)
         # Calculate button
         self.calc_btn = QPushButton("Calculate")
         self.calc_btn.clicked.connect(self.calculateRequested)
@@ -106,16 +175,7 @@ class CellParamsEditor(QWidget):
         self.combo_system.currentTextChanged.connect(self._on_system_change)
 
     def _setup_presets(self):
-        self.lattice_presets = {
-            "Triclinic":    (1.0,1.2,1.3,100.0,110.0,120.0),
-            "Monoclinic":   (1.0,1.1,1.3, 90.0,110.0, 90.0),
-            "Orthorhombic": (1.0,1.2,1.3, 90.0, 90.0, 90.0),
-            "Tetragonal":   (1.0,1.0,1.2, 90.0, 90.0, 90.0),
-            "Trigonal":     (1.0,1.0,1.0, 60.0, 60.0, 60.0),
-            "Hexagonal":    (1.0,1.0,1.5, 90.0, 90.0,120.0),
-            "Cubic":        (1.0,1.0,1.0, 90.0, 90.0, 90.0),
-            "Custom":       None
-        }
+        self.lattice_presets = dict(LATTICE_PRESETS)
         self.disable_map = {
             "Triclinic": [],
             "Monoclinic": ["alpha","gamma"],
@@ -140,6 +200,32 @@ class CellParamsEditor(QWidget):
         disabled = set(self.disable_map.get(system, []))
         for name, spin in fields.items(): spin.setEnabled(name not in disabled)
 
+    def _on_mode_change(self, text):
+        mode = self.SIMULATION_MODES[text]
+        # phi (rotation about the film normal) is averaged out in fiber mode
+        fiber = mode == "fiber"
+        self.spin_phi.setEnabled(not fiber)
+        self.orient_sliders[2].setEnabled(not fiber)
+        self.simulationModeChanged.emit(mode)
+
+    def setContactPlane(self, h, k, l):
+        """Show a stored contact plane without emitting `contactPlaneChanged`."""
+        for spin, val in [(self.spin_contact_h, h), (self.spin_contact_k, k), (self.spin_contact_l, l)]:
+            spin.blockSignals(True)
+            spin.setValue(val)
+            spin.blockSignals(False)
+
+    def setOrientation(self, omega, chi, phi):
+        """Show a stored orientation without emitting `orientationChanged`."""
+        for spin, val in [(self.spin_omega, omega), (self.spin_chi, chi), (self.spin_phi, phi)]:
+            spin.blockSignals(True)
+            spin.setValue(val)
+            spin.blockSignals(False)
+        for slider, val in zip(self.orient_sliders, (omega, chi, phi)):
+            slider.blockSignals(True)
+            slider.setValue(int(round(val)))
+            slider.blockSignals(False)
+
     def _on_apply(self):
         # Emit lattice
         a,b,c = self.spin_a.value(), self.spin_b.value(), self.spin_c.value()
@@ -1,7 +1,8 @@
 # File: ewald/ui/right_pane/structure_tree.py
 """
 StructureTreeView: table of structures showing lattice parameters and source.
-Columns: Name | System | a | b | c | alpha | beta | gamma | Source
+Columns: Name | System | a | b | c | alpha | beta | gamma | rot_ω | rot_χ | rot_φ | Source
+The Name column is checkable; checked structures are drawn as overlays.
 """
 from PyQt6.QtWidgets import QTreeView, QMenu
 from PyQt6.QtGui      import QStandardItemModel, QStandardItem
@@ -11,6 +12,8 @@ class StructureTreeView(QTreeView):
     # name, system, a, b, c, alpha, beta, gamma
     structureSelected = pyqtSignal(str, str, float, float, float, float, float, float)
     structureDeleted  = pyqtSignal(str)
+    # name, checked
+    structureToggled  = pyqtSignal(str, bool)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -27,6 +30,7 @@ class StructureTreeView(QTreeView):
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self._open_context_menu)
         self.clicked.connect(self._on_item_clicked)
+        self.model.itemChanged.connect(self._on_item_changed)
 
     def addCustomStructure(self, name, system, a, b, c, alpha, beta, gamma):
         src = "Custom"
@@ -39,10 +43,14 @@ class StructureTreeView(QTreeView):
             QStandardItem(f"{alpha:.2f}"),
             QStandardItem(f"{beta:.2f}"),
             QStandardItem(f"{gamma:.2f}"),
+            QStandardItem("0.0"),
+            QStandardItem("0.0"),
+            QStandardItem("0.0"),
             QStandardItem(src)
         ]
         for it in items:
             it.setEditable(False)
+        items[0].setCheckable(True)
         self.model.appendRow(items)
 
     def _on_item_clicked(self, index: QModelIndex):
@@ -53,6 +61,24 @@ class StructureTreeView(QTreeView):
         alpha, beta, gamma = map(float, vals[5:8])
         self.structureSelected.emit(name, sys_, a, b, c, alpha, beta, gamma)
 
+    def _on_item_changed(self, item):
+        if item.column() != 0 or not item.isCheckable():
+            return
+        checked = item.checkState() == Qt.CheckState.Checked
+        self.structureToggled.emit(item.text(), checked)
+
+    def setStructureChecked(self, name, checked):
+        """Check or uncheck a structure without emitting `structureToggled`."""
+        state = Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
+        for row in range(self.model.rowCount()):
+            item = self.model.item(row, 0)
+            if item.text() == name:
+                self.model.blockSignals(True)
+                item.setCheckState(state)
+                self.model.blockSignals(False)
+                self.viewport().update()
+                return
+
     def _open_context_menu(self, pos):
         idx = self.indexAt(pos)
         if not idx.isValid():
@@ -74,3 +100,14 @@ class StructureTreeView(QTreeView):
                 self.model.item(row, 9).setText(f"{rot_chi:.1f}")
                 self.model.item(row,10).setText(f"{rot_phi:.1f}")
                 return
+
+    def structures(self):
+        """Return every row as a dict keyed by column header."""
+        headers = [self.model.horizontalHeaderItem(c).text() for c in range(self.model.columnCount())]
+        rows = []
+        for row in range(self.model.rowCount()):
+            vals = {h: (self.model.item(row, c).text() if self.model.item(row, c) else "")
+                    for c, h in enumerate(headers)}
+            vals["checked"] = self.model.item(row, 0).checkState() == Qt.CheckState.Checked
+            rows.append(vals)
+        return rows
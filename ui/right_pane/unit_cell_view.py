@@ -7,7 +7,8 @@ from PyQt6.QtCore import Qt
 from vispy.scene import SceneCanvas, visuals
 from vispy.visuals.transforms import MatrixTransform
 import numpy as np
-import math
+
+from ...analysis.lattice import direct_basis, euler_matrix
 
 class UnitCellView(QWidget):
     def __init__(self, parent=None):
@@ -28,9 +29,11 @@ class UnitCellView(QWidget):
         self.cell_lines = visuals.Line(color='white', parent=self.view.scene)
 
     def setCell(self, a, b, c, alpha, beta, gamma):
+        va, vb, vc = direct_basis(a, b, c, alpha, beta, gamma)
+        o = np.zeros(3)
         corners = np.array([
-            [0, 0, 0], [a, 0, 0], [a, b, 0], [0, b, 0], [0, 0, 0],
-            [0, 0, c], [a, 0, c], [a, b, c], [0, b, c], [0, 0, c]
+            o, va, va + vb, vb, o,
+            vc, va + vc, va + vb + vc, vb + vc, vc
         ], dtype=float)
         self.cell_lines.set_data(corners, connect='strip')
 
@@ -44,33 +47,8 @@ class UnitCellView(QWidget):
         Apply Euler rotations (omega, chi, phi in degrees) to the unit cell wireframe.
         Rotation order: X (omega), then Y (chi), then Z (phi).
         """
-        # Convert degrees to radians
-        o = math.radians(omega)
-        c_ang = math.radians(chi)
-        p = math.radians(phi)
-
-        # Rotation matrices (4x4 homogeneous)
-        Rx = np.array([
-            [1, 0, 0, 0],
-            [0, math.cos(o), -math.sin(o), 0],
-            [0, math.sin(o),  math.cos(o), 0],
-            [0, 0, 0, 1]
-        ], dtype=float)
-        Ry = np.array([
-            [ math.cos(c_ang), 0, math.sin(c_ang), 0],
-            [0, 1, 0, 0],
-            [-math.sin(c_ang), 0, math.cos(c_ang), 0],
-            [0, 0, 0, 1]
-        ], dtype=float)
-        Rz = np.array([
-            [math.cos(p), -math.sin(p), 0, 0],
-            [math.sin(p),  math.cos(p), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ], dtype=float)
-
-        # Combined rotation
-        matrix = Rz @ Ry @ Rx
+        matrix = np.eye(4)
+        matrix[:3, :3] = euler_matrix(omega, chi, phi)
         transform = MatrixTransform()
         transform.matrix = matrix
         self.cell_lines.transform = transform
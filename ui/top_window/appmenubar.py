@@ -16,6 +16,18 @@ class AppMenuBar(QMenuBar):
         load_menu.addAction(load_action)
         file_menu.addMenu(load_menu)
         self.load_action = load_action
+        open_project_action = QAction("Open Project...", self)
+        save_project_action = QAction("Save Project...", self)
+        file_menu.addAction(open_project_action)
+        file_menu.addAction(save_project_action)
+        self.open_project_action = open_project_action
+        self.save_project_action = save_project_action
+        export_action = QAction("Export Data Objects...", self)
+        file_menu.addAction(export_action)
+        self.export_action = export_action
+        export_figure_action = QAction("Export Figure...", self)
+        file_menu.addAction(export_figure_action)
+        self.export_figure_action = export_figure_action
 
         # --- Edit Menu ---
         edit_menu = self.addMenu("Edit")
@@ -30,17 +42,26 @@ class AppMenuBar(QMenuBar):
         # --- Data Manager Menu ---
         data_manager_menu = self.addMenu("Data Manager")
         self.data_manager_menu = data_manager_menu
+        memory_budget_action = QAction("Memory Budget...", self)
+        data_manager_menu.addAction(memory_budget_action)
+        self.memory_budget_action = memory_budget_action
+        memory_usage_action = QAction("Memory Usage...", self)
+        data_manager_menu.addAction(memory_usage_action)
+        self.memory_usage_action = memory_usage_action
 
         # --- Tools Menu ---
         tools_menu = self.addMenu("Tools")
         self.tools_menu = tools_menu
+        waterfall_action = QAction("Series Waterfall...", self)
+        tools_menu.addAction(waterfall_action)
+        self.waterfall_action = waterfall_action
 
         # --- Fit Menu ---
         fit_menu = self.addMenu("Fit")
         self.fit_menu = fit_menu
 
         # --- Windows Menu ---
-        windows_menu = self.addMenu("Fit")
+        windows_menu = self.addMenu("Windows")
         self.windows_menu = windows_menu
 
         # --- Settings Menu ---